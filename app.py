@@ -1,14 +1,25 @@
 import os
+import hmac
 import json
 import logging
 import argparse
+import time
+from functools import wraps
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, url_for, abort
+from werkzeug.security import safe_join
+from flask_socketio import SocketIO, emit, join_room
+from markupsafe import Markup, escape
 
 # Import the main ELearningCourseGenerator class
 from modules.elearning_generator import ELearningCourseGenerator
+from modules.llm_manager import DummyLLM
+from modules.metrics import REGISTRY, TURN_DURATION, ACTIVE_SESSIONS, read_process_rss
+from modules.offload import configure_offloading, call_on_hub
+from modules.http_cache import StaticFingerprinter, send_download
+from modules.profiler import RequestProfiler
+from modules.memory_profiler import MemoryProfiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -18,6 +29,11 @@ logger = logging.getLogger(__name__)
 def parse_arguments():
     parser = argparse.ArgumentParser(description='E-Learning Course Generator for Information Security')
     parser.add_argument('--reindex', action='store_true', help='Reindex all documents in the documents directory')
+    parser.add_argument('--batch', metavar='FILE', help='Generate courses for the pre-filled interviews in a JSONL file and exit')
+    parser.add_argument('--format', choices=['txt', 'html', 'json'], default='txt', help='Output format of batch-generated courses')
+    parser.add_argument('--workers', type=int, default=None, help='Number of interviews processed in parallel in batch mode')
+    parser.add_argument('--output-dir', default=None, help='Output directory of batch-generated courses')
+    parser.add_argument('--no-llm-cache', action='store_true', help='Send every prompt to the LLM instead of reusing cached responses or section content')
     return parser.parse_args()
 
 # Initialize Flask app
@@ -25,11 +41,136 @@ app = Flask(__name__, static_folder='static', template_folder='templates')
 app.config['SECRET_KEY'] = 'elearning-generator-secret-key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Static assets are linked with a content hash in their name and can be cached forever
+fingerprinter = StaticFingerprinter(app.static_folder)
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+@app.context_processor
+def inject_asset_url():
+    """Make asset_url() available in templates"""
+    def asset_url(filename):
+        return url_for('static_asset', filename=fingerprinter.fingerprint(filename))
+    return {'asset_url': asset_url}
+
 # Create the ELearningCourseGenerator instance
 generator = ELearningCourseGenerator(config_path="./config.json")
 
-# Store active conversations
-active_conversations = {}
+# Admin endpoints (profiling) are only available with a configured token
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', generator.config["admin_token"])
+
+# Profiles selected requests on demand, see /admin/profile
+request_profiler = RequestProfiler(generator.config["profiles_dir"], generator.config["profile_interval"])
+
+# tracemalloc is only enabled on demand, see /admin/memory
+memory_profiler = MemoryProfiler()
+
+# Embedding, FAISS and Ollama calls must not block the eventlet hub serving all sockets
+configure_offloading(socketio.async_mode, generator.config["blocking_pool_size"])
+
+def emit_session_event(event, payload):
+    """Push an event (e.g. streamed LLM tokens) to the session's Socket.IO room"""
+    # Events are also produced on worker and pool threads
+    call_on_hub(socketio.emit, event, payload, to=payload['session_id'])
+
+def forward_job_event(event, job):
+    """Push progress of background section generation to the session's Socket.IO room"""
+    emit_session_event(event, {
+        'session_id': job['session_id'],
+        'section_id': job['section_id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'error': job['error']
+    })
+
+def start_server_components():
+    """Start the health monitor, job events and component setup needed to serve requests"""
+    generator.event_handler = emit_session_event
+    ACTIVE_SESSIONS.set_function(lambda: len(generator.session_manager) if generator.session_manager else 0)
+    generator.llm_health_monitor.start()
+    if generator.job_manager is not None:
+        generator.job_manager.add_listener(forward_job_event)
+    
+    # With lazy startup the server binds immediately and the components are initialized in the background
+    if generator.config["lazy_startup"]:
+        generator.start_background_setup()
+    else:
+        generator.setup()
+
+# Imported by a WSGI server; run as a script, the CLI modes (--reindex, --batch) must not start anything
+if __name__ != '__main__':
+    start_server_components()
+
+def require_ready(view):
+    """Answer with 503 while the components are still being initialized"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not generator.is_ready():
+            response = jsonify({
+                'success': False,
+                'error': 'Service is starting, please try again shortly',
+                'components': generator.get_component_status()
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        return view(*args, **kwargs)
+    return wrapper
+
+def require_admin(view):
+    """Restrict a view to requests carrying the admin token (X-Admin-Token header)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Admin endpoints do not exist unless a token is configured
+        if not ADMIN_TOKEN:
+            abort(404)
+        if not is_admin_request():
+            return jsonify({'success': False, 'error': 'Invalid admin token'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def is_admin_request():
+    """Check the admin token of the current request"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def profiled(view):
+    """Sample the view while the profiler is armed or the admin sends an X-Profile header"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not (request_profiler.claim(request.endpoint) or ('X-Profile' in request.headers and is_admin_request())):
+            return view(*args, **kwargs)
+
+        session_id = (request.view_args or {}).get('session_id') or (request.get_json(silent=True) or {}).get('session_id')
+        with request_profiler.profile(request.endpoint, {'session_id': session_id, 'path': request.path}) as tags:
+            response = view(*args, **kwargs)
+            # Tag the profile with the section the request ended up in
+            session = get_session(session_id)
+            if session is not None:
+                tags['section_id'] = session.dialog_manager.conversation_state.get('current_section')
+        return response
+    return wrapper
+
+def get_session(session_id):
+    """Look up a session in the registry, returns None for unknown or expired sessions"""
+    if not session_id or generator.session_manager is None:
+        return None
+    return generator.session_manager.get_session(session_id)
+
+@app.template_filter('nl2br')
+def nl2br(value):
+    """Escape text and keep its line breaks (used by result.html)"""
+    return Markup('<br>\n').join(escape(value).split('\n'))
+
+def llm_busy_response():
+    """503 answer telling the client to resend its message shortly"""
+    response = jsonify({
+        'success': False,
+        'busy': True,
+        'error': 'The language model is busy, please try again shortly'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
 
 @app.route('/')
 def index():
@@ -37,27 +178,23 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/start-conversation', methods=['POST'])
+@require_ready
 def start_conversation():
     """API endpoint to start a new conversation"""
-    session_id = datetime.now().strftime("%Y%m%d%H%M%S") + str(hash(request.remote_addr))[:5]
-    
     try:
-        # Initialize the generator if not already done
-        if not hasattr(generator, 'dialog_manager') or generator.dialog_manager is None:
-            generator.setup()
+        # Every conversation gets its own dialog manager
+        session = generator.session_manager.create_session()
         
-        # Start the conversation
-        first_question = generator.start_conversation()
+        with session.lock:
+            # Start the conversation
+            first_question = generator.start_conversation(session.session_id)
+            session.messages.append({"role": "assistant", "content": first_question})
         
-        # Store the session
-        active_conversations[session_id] = {
-            'messages': [{"role": "assistant", "content": first_question}],
-            'script_generated': False
-        }
+        generator.session_manager.record_turn(session)
         
         return jsonify({
             'success': True,
-            'session_id': session_id,
+            'session_id': session.session_id,
             'message': first_question
         })
     except Exception as e:
@@ -68,13 +205,16 @@ def start_conversation():
         }), 500
 
 @app.route('/api/send-message', methods=['POST'])
+@require_ready
+@profiled
 def send_message():
     """API endpoint to send a message in an existing conversation"""
     data = request.json
     session_id = data.get('session_id')
     user_input = data.get('message')
     
-    if not session_id or session_id not in active_conversations:
+    session = get_session(session_id)
+    if session is None:
         return jsonify({
             'success': False,
             'error': 'Invalid session ID'
@@ -86,34 +226,42 @@ def send_message():
             'error': 'Message cannot be empty'
         }), 400
     
+    # Back-pressure: reject before the turn changes any state when the LLM queue is full
+    if generator.llm_manager.is_saturated():
+        return llm_busy_response()
+    
     try:
-        # Add user message to conversation history
-        active_conversations[session_id]['messages'].append({"role": "user", "content": user_input})
-        
-        # Process user input with detailed error handling
-        try:
-            bot_response = generator.process_user_input(user_input)
+        with session.lock:
+            # Add user message to conversation history
+            session.messages.append({"role": "user", "content": user_input})
             
-            # Ensure bot_response is a string
-            if not isinstance(bot_response, str):
-                logger.error(f"Bot response is not a string: {type(bot_response)}")
-                bot_response = f"Es ist ein Fehler aufgetreten. Die Antwort hat ein unerwartetes Format: {type(bot_response)}"
+            # Process user input with detailed error handling
+            try:
+                with TURN_DURATION.time():
+                    bot_response = generator.process_user_input(session_id, user_input)
                 
-        except Exception as inner_e:
-            logger.error(f"Error in process_user_input: {inner_e}")
-            bot_response = "Entschuldigung, bei der Verarbeitung Ihrer Nachricht ist ein Fehler aufgetreten."
-        
-        # Add bot response to conversation history
-        active_conversations[session_id]['messages'].append({"role": "assistant", "content": bot_response})
+                # Ensure bot_response is a string
+                if not isinstance(bot_response, str):
+                    logger.error(f"Bot response is not a string: {type(bot_response)}")
+                    bot_response = f"Es ist ein Fehler aufgetreten. Die Antwort hat ein unerwartetes Format: {type(bot_response)}"
+                    
+            except Exception as inner_e:
+                logger.error(f"Error in process_user_input: {inner_e}")
+                bot_response = "Entschuldigung, bei der Verarbeitung Ihrer Nachricht ist ein Fehler aufgetreten."
+            
+            # Add bot response to conversation history
+            session.messages.append({"role": "assistant", "content": bot_response})
+            
+            # Check if script was generated
+            if "Hier ist der entworfene E-Learning-Kurs" in bot_response:
+                session.script_generated = True
         
-        # Check if script was generated
-        if "Hier ist der entworfene E-Learning-Kurs" in bot_response:
-            active_conversations[session_id]['script_generated'] = True
+        generator.session_manager.record_turn(session)
         
         return jsonify({
             'success': True,
             'message': bot_response,
-            'script_generated': active_conversations[session_id]['script_generated']
+            'script_generated': session.script_generated
         })
     except Exception as e:
         logger.error(f"Error processing message: {e}")
@@ -123,27 +271,30 @@ def send_message():
         }), 500
 
 @app.route('/api/save-script', methods=['POST'])
+@require_ready
 def save_script():
     """API endpoint to save the generated script"""
     data = request.json
     session_id = data.get('session_id')
     format_type = data.get('format', 'txt')
     
-    if not session_id or session_id not in active_conversations:
+    session = get_session(session_id)
+    if session is None:
         return jsonify({
             'success': False,
             'error': 'Invalid session ID'
         }), 400
     
-    if not active_conversations[session_id]['script_generated']:
+    if not session.script_generated:
         return jsonify({
             'success': False,
             'error': 'No script has been generated for this session'
         }), 400
     
     try:
-        # Save the script
-        script_path = generator.save_generated_script(format=format_type)
+        # Save the script (under the session lock, like every access that may change the state)
+        with session.lock:
+            script_path = generator.save_generated_script(session_id, format=format_type)
         filename = os.path.basename(script_path)
         
         return jsonify({
@@ -160,36 +311,62 @@ def save_script():
 
 @app.route('/api/download/<filename>')
 def download_file(filename):
-    """API endpoint to download a generated script"""
-    return send_from_directory(os.path.abspath(generator.config["output_dir"]), filename, as_attachment=True)
+    """API endpoint to download a generated script (conditional, precompressed if the client accepts it)"""
+    path = safe_join(os.path.abspath(generator.config["output_dir"]), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    return send_download(path, filename)
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    """Serve a static asset by its fingerprinted name with long-lived cache headers"""
+    original, current = fingerprinter.resolve(filename)
+    if original is None:
+        abort(404)
+    
+    response = send_from_directory(app.static_folder, original, conditional=True)
+    if current:
+        response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    else:
+        # Outdated hash (e.g. a cached page): serve the current file, but don't pin it
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/result/<session_id>')
+@require_ready
+@profiled
 def view_result(session_id):
     """Render the result page with the full generated script"""
-    if session_id not in active_conversations or not active_conversations[session_id]['script_generated']:
+    session = get_session(session_id)
+    if session is None or not session.script_generated:
         return render_template('index.html')
     
     try:
         # Get format preference from query parameters, default to txt
         format_type = request.args.get('format', 'txt')
         
-        script = generator.dialog_manager.generate_script()
+        dialog_manager = session.dialog_manager
+        # Rendering applies finished section jobs to the state, so it must not overlap a turn
+        with session.lock:
+            script = dialog_manager.generate_script()
+            
+            # Get organization and audience from context info
+            organization = dialog_manager.conversation_state["context_info"].get(
+                "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", "")
+            audience = dialog_manager.conversation_state["context_info"].get(
+                "Welche Mitarbeitergruppen sollen geschult werden?", "")
+            
+            # Save the script to make it available for download
+            script_path = generator.save_generated_script(session_id, format=format_type)
         
         # Get script metadata
         script_title = script.get('title', 'E-Learning-Kurs zur Informationssicherheit')
         script_description = script.get('description', '')
         
-        # Get organization and audience from context info
-        organization = generator.dialog_manager.conversation_state["context_info"].get(
-            "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", "")
-        audience = generator.dialog_manager.conversation_state["context_info"].get(
-            "Welche Mitarbeitergruppen sollen geschult werden?", "")
-        
         # Get current date
         created_date = datetime.now().strftime("%d.%m.%Y")
         
-        # Save the script to make it available for download
-        script_path = generator.save_generated_script(format=format_type)
         filename = os.path.basename(script_path)
         download_url = f'/api/download/{filename}'
         
@@ -211,19 +388,21 @@ def view_result(session_id):
         return render_template('index.html')
 
 @app.route('/api/preview-script', methods=['POST'])
+@require_ready
 def preview_script():
     """API endpoint to preview the generated script"""
     data = request.json
     session_id = data.get('session_id')
     format_type = data.get('format', 'txt')
     
-    if not session_id or session_id not in active_conversations:
+    session = get_session(session_id)
+    if session is None:
         return jsonify({
             'success': False,
             'error': 'Invalid session ID'
         }), 400
     
-    if not active_conversations[session_id]['script_generated']:
+    if not session.script_generated:
         return jsonify({
             'success': False,
             'error': 'No script has been generated for this session'
@@ -231,12 +410,13 @@ def preview_script():
     
     try:
         # Get script preview based on format
-        if format_type == 'html':
-            script_content = generator.dialog_manager.generate_html_script()
-            content_type = 'html'
-        else:
-            script_content = generator.dialog_manager.get_script_summary()
-            content_type = 'text'
+        with session.lock:
+            if format_type == 'html':
+                script_content = session.dialog_manager.generate_html_script()
+                content_type = 'html'
+            else:
+                script_content = session.dialog_manager.get_script_summary()
+                content_type = 'text'
         
         return jsonify({
             'success': True,
@@ -250,7 +430,24 @@ def preview_script():
             'error': str(e)
         }), 500
 
+@app.route('/api/section-jobs/<session_id>', methods=['GET'])
+@require_ready
+def get_section_jobs(session_id):
+    """API endpoint to get the status of background section generation"""
+    if get_session(session_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid session ID'
+        }), 400
+    
+    jobs = generator.job_manager.get_jobs(session_id) if generator.job_manager else []
+    return jsonify({
+        'success': True,
+        'jobs': jobs
+    })
+
 @app.route('/api/reindex-documents', methods=['POST'])
+@require_ready
 def reindex_documents():
     """API endpoint to reindex documents"""
     try:
@@ -267,29 +464,29 @@ def reindex_documents():
         }), 500
 
 @app.route('/api/reset-conversation', methods=['POST'])
+@require_ready
 def reset_conversation():
     """API endpoint to reset the conversation"""
     data = request.json
     session_id = data.get('session_id')
     
-    if not session_id or session_id not in active_conversations:
+    session = get_session(session_id)
+    if session is None:
         return jsonify({
             'success': False,
             'error': 'Invalid session ID'
         }), 400
     
     try:
-        # Reset the conversation
-        generator.reset_conversation()
-        
-        # Start a new conversation
-        first_question = generator.start_conversation()
+        with session.lock:
+            # Reset only this session's conversation
+            generator.reset_conversation(session_id)
+            
+            # Start a new conversation
+            first_question = generator.start_conversation(session_id)
+            session.messages.append({"role": "assistant", "content": first_question})
         
-        # Update the session
-        active_conversations[session_id] = {
-            'messages': [{"role": "assistant", "content": first_question}],
-            'script_generated': False
-        }
+        generator.session_manager.record_turn(session)
         
         return jsonify({
             'success': True,
@@ -306,9 +503,19 @@ def reset_conversation():
 def get_stats():
     """API endpoint to get generator statistics"""
     try:
+        session_stats = generator.session_manager.get_stats() if generator.session_manager else {}
         return jsonify({
             'success': True,
-            'generated_scripts_count': generator.generated_scripts_count
+            'generated_scripts_count': generator.generated_scripts_count,
+            'sessions': session_stats,
+            'llm_gateway': generator.llm_manager.get_gateway_stats(),
+            'llm_cache': generator.llm_manager.get_cache_stats(),
+            'llm_endpoints': generator.llm_manager.get_endpoint_stats(),
+            'content_cache': generator.content_cache.get_stats() if generator.content_cache else None,
+            'process': {
+                'rss_bytes': read_process_rss(),
+                'uptime': time.time() - generator.started_at
+            }
         })
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
@@ -317,46 +524,105 @@ def get_stats():
             'error': str(e)
         }), 500
         
+@app.route('/admin/profile', methods=['POST'])
+@require_admin
+def arm_profiler():
+    """Admin endpoint to profile the next N requests of send-message and/or result"""
+    data = request.get_json(silent=True) or {}
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'count must be a number'}), 400
+
+    endpoints = data.get('endpoints')
+    unknown = set(endpoints or []) - {'send_message', 'view_result'}
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown endpoints: {', '.join(sorted(unknown))}"}), 400
+
+    request_profiler.arm(count, endpoints)
+    return jsonify({
+        'success': True,
+        'remaining': request_profiler.remaining,
+        'endpoints': sorted(request_profiler.endpoints) if request_profiler.endpoints else None
+    })
+
+@app.route('/admin/profiles', methods=['GET'])
+@require_admin
+def list_profiles():
+    """Admin endpoint to list the saved profiles"""
+    return jsonify({'success': True, 'profiles': request_profiler.list_profiles()})
+
+@app.route('/admin/profiles/<path:filename>', methods=['GET'])
+@require_admin
+def download_profile(filename):
+    """Admin endpoint to download the folded stacks of a profile (flamegraph.pl / speedscope input)"""
+    return send_from_directory(os.path.abspath(request_profiler.profiles_dir), filename, mimetype='text/plain')
+
+@app.route('/admin/memory', methods=['GET'])
+@require_admin
+def get_memory_report():
+    """Admin endpoint reporting the memory held per session and per cache"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({
+            'success': True,
+            'tracemalloc': memory_profiler.get_status(),
+            **generator.get_memory_report(limit)
+        })
+    except Exception as e:
+        logger.error(f"Error creating memory report: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/admin/memory/tracemalloc', methods=['POST'])
+@require_admin
+def control_tracemalloc():
+    """Admin endpoint to start/stop tracemalloc and to diff heap snapshots"""
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    try:
+        if action == 'start':
+            memory_profiler.start(frames=data.get('frames', 25))
+            return jsonify({'success': True, 'tracemalloc': memory_profiler.get_status()})
+        if action == 'stop':
+            memory_profiler.stop()
+            return jsonify({'success': True, 'tracemalloc': memory_profiler.get_status()})
+        if action == 'snapshot':
+            key_type = data.get('group_by', 'lineno')
+            if key_type not in ('lineno', 'filename', 'traceback'):
+                return jsonify({'success': False, 'error': f'Unknown grouping: {key_type}'}), 400
+            report = memory_profiler.snapshot(limit=int(data.get('limit', 20)), key_type=key_type)
+            return jsonify({'success': True, 'tracemalloc': memory_profiler.get_status(), **report})
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error controlling tracemalloc: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': False, 'error': "action must be 'start', 'stop' or 'snapshot'"}), 400
+
 @app.route('/api/vectordb-stats', methods=['GET'])
+@require_ready
 def get_vectordb_stats():
     """API endpoint to get vector database statistics"""
     try:
         # Check if vectorstore exists
-        if not hasattr(generator, 'vector_store_manager') or generator.vector_store_manager.vectorstore is None:
+        if generator.vector_store_manager is None or generator.vector_store_manager.vectorstore is None:
             return jsonify({
                 'success': False,
                 'error': 'Vector database not initialized'
             }), 400
-            
-        # Get collection info
-        collection = generator.vector_store_manager.vectorstore._collection
         
-        # Get count of items
-        count = collection.count()
+        # Served from the metadata record kept by the VectorStoreManager
+        index_stats = generator.vector_store_manager.get_index_stats()
         
-        # Try to get additional metadata
-        try:
-            # Get schema information
-            schema = collection.schema
-            embedding_size = getattr(schema, 'embedding_size', 'Unknown')
-            
-            # Get some sample document IDs
-            sample_ids = []
-            if count > 0:
-                sample_ids = collection.get(limit=5)['ids']
-        except Exception as e:
-            schema = None
-            embedding_size = 'Error retrieving'
-            sample_ids = []
-            
         return jsonify({
             'success': True,
-            'stats': {
-                'document_count': count,
-                'embedding_size': embedding_size,
-                'sample_ids': sample_ids,
-                'database_path': generator.config["vectorstore_dir"]
-            }
+            'stats': dict(
+                index_stats,
+                document_count=index_stats.get('vector_count', 0),
+                embedding_size=index_stats.get('dimension'),
+                database_path=generator.config["vectorstore_dir"]
+            )
         })
     except Exception as e:
         logger.error(f"Error retrieving vector database stats: {e}")
@@ -367,7 +633,7 @@ def get_vectordb_stats():
         
 @app.route('/api/llm-status', methods=['GET'])
 def get_llm_status():
-    """API endpoint to check if the LLM is accessible"""
+    """API endpoint to check if the LLM is accessible (reads the cached background check)"""
     try:
         # Check if the LLM manager exists
         if not hasattr(generator, 'llm_manager'):
@@ -376,41 +642,40 @@ def get_llm_status():
                 'error': 'LLM Manager not initialized',
                 'status': 'unavailable'
             })
-            
-        # Try a simple generation with the LLM
-        test_prompt = "Gib mir nur das Wort 'Funktioniert' zurück, nicht mehr."
-        try:
-            start_time = datetime.now()
-            response = generator.llm_manager.llm(test_prompt)
-            end_time = datetime.now()
-            response_time = (end_time - start_time).total_seconds()
-            
-            # Check if the response contains expected text
-            if 'funktioniert' in response.lower():
-                return jsonify({
-                    'success': True,
-                    'status': 'available',
-                    'model': generator.config["model_name"],
-                    'response_time': response_time,
-                    'response': response[:50]  # Just return the first 50 chars as sample
-                })
-            else:
-                # If response doesn't contain expected text, LLM might be responding but incorrectly
-                return jsonify({
-                    'success': True,
-                    'status': 'degraded',
-                    'model': generator.config["model_name"],
-                    'response_time': response_time,
-                    'response': response[:50]
-                })
-        except Exception as e:
-            # LLM is unavailable
-            return jsonify({
-                'success': False,
-                'error': str(e),
-                'status': 'unavailable',
-                'model': generator.config["model_name"]
-            })
+        
+        health = generator.llm_health_monitor.get_status()
+        status = health['status']
+        
+        # The server may be reachable while requests are still answered by the fallback model
+        fallback_active = isinstance(generator.llm_manager.llm, DummyLLM)
+        if status == 'available' and fallback_active:
+            status = 'degraded'
+        
+        response = {
+            # Until the first probe has finished the LLM must not be reported as healthy
+            'success': status in ('available', 'degraded'),
+            'pending': status == 'unknown',
+            'status': status,
+            'model': generator.config["model_name"],
+            'response_time': health['response_time'],
+            'average_response_time': health['average_response_time'],
+            'latency_history': health['latency_history'],
+            'last_checked': health['last_checked'],
+            'last_success': health['last_success'],
+            'last_error': health['last_error'],
+            'last_error_at': health['last_error_at'],
+            'consecutive_failures': health['consecutive_failures'],
+            'endpoints': health['endpoints'],
+            'fallback_active': fallback_active
+        }
+        if status == 'degraded':
+            response['message'] = 'Fallback-Modell aktiv' if fallback_active else health['last_error']
+        elif status == 'unavailable':
+            response['error'] = health['last_error']
+        elif status == 'unknown':
+            response['message'] = 'LLM status is being checked'
+        
+        return jsonify(response)
     
     except Exception as e:
         logger.error(f"Error checking LLM status: {e}")
@@ -420,6 +685,29 @@ def get_llm_status():
             'status': 'error'
         }), 500    
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({
+        'status': 'ok',
+        'uptime': time.time() - generator.started_at
+    })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe: reports the initialization state of each component"""
+    ready = generator.is_ready()
+    return jsonify({
+        'ready': ready,
+        'uptime': time.time() - generator.started_at,
+        'components': generator.get_component_status()
+    }), 200 if ready else 503
+
 # WebSocket for real-time updates
 @socketio.on('connect')
 def handle_connect():
@@ -429,6 +717,16 @@ def handle_connect():
 def handle_disconnect():
     logger.info(f"Client disconnected: {request.sid}")
 
+@socketio.on('join_session')
+def handle_join_session(data):
+    """Subscribe the client to the events of its conversation"""
+    session_id = (data or {}).get('session_id')
+    if get_session(session_id) is None:
+        emit('error', {'error': 'Invalid session ID'})
+        return
+    join_room(session_id)
+    logger.info(f"Client {request.sid} joined session {session_id}")
+
 def create_default_config():
     """Create a default configuration file if it doesn't exist"""
     config_path = "./config.json"
@@ -461,12 +759,17 @@ if __name__ == '__main__':
     
     # Create default config if not exists
     create_default_config()
+
+    # Applies to every mode; the cached data stays untouched for later runs
+    if args.no_llm_cache:
+        generator.llm_manager.cache_bypass = True
+        logger.info("LLM response and section content caches are bypassed")
     
     # Handle reindexing command if specified
     if args.reindex:
         try:
             # Make sure the generator is set up
-            if not hasattr(generator, 'dialog_manager') or generator.dialog_manager is None:
+            if generator.session_manager is None:
                 generator.setup()
             
             # Perform reindexing
@@ -482,6 +785,29 @@ if __name__ == '__main__':
             print(f"Error during reindexing: {e}")
             import sys
             sys.exit(1)
+
+    # Handle batch generation if specified
+    if args.batch:
+        import sys
+        try:
+            from modules.batch_runner import BatchRunner
+
+            generator.setup()
+
+            runner = BatchRunner(generator, workers=args.workers, format=args.format, output_dir=args.output_dir)
+            results = runner.run_file(args.batch)
+
+            failed = [result for result in results if result["status"] != "ok"]
+            print(f"Batch generation completed: {len(results) - len(failed)} of {len(results)} courses written to {runner.output_dir}")
+            for result in failed:
+                print(f"  {result['id']}: {result['error']}")
+            sys.exit(1 if failed else 0)
+        except Exception as e:
+            logger.error(f"Error during batch generation: {e}")
+            print(f"Error during batch generation: {e}")
+            sys.exit(1)
+    
+    start_server_components()
     
     # Get port from environment or use default
     port = int(os.environ.get('PORT', 8000))
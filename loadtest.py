@@ -0,0 +1,382 @@
+"""
+Load generator for the E-Learning Course Generator.
+
+Replays complete interviews against the REST API with N concurrent virtual
+users: start a conversation, answer the five context questions and the seven
+template sections, confirm the review, then preview and save the script.
+
+Run the server with a predictable LLM, e.g. the dummy LLM with simulated latency:
+
+    LLM_BACKEND=dummy DUMMY_LLM_LATENCY=1.5 python app.py
+    python loadtest.py --url http://localhost:8000 --users 20 --duration 300
+
+or point it at an Ollama-compatible fake server started by this script:
+
+    python loadtest.py --fake-llm-port 11500 --fake-llm-latency 2 --users 0
+    OLLAMA_HOST=http://127.0.0.1:11500 python app.py
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple
+
+CONTEXT_ANSWERS = [
+    "Für ein Krankenhaus der Maximalversorgung mit mehreren Standorten",
+    "Pflegekräfte, Ärztinnen und Ärzte sowie Mitarbeitende der Verwaltung",
+    "Maximal 30 Minuten",
+    "Patientendaten, Befunde, Dienstpläne und Abrechnungsdaten im Krankenhausinformationssystem",
+    "Per E-Mail, Telefon, Fax und über das interne Messaging mit Laboren und Hausarztpraxen"
+]
+
+# Each answer is long enough and mentions a threat and a measure, so no follow-up questions are asked
+SECTION_ANSWER = (
+    "Im Stationsalltag sehen wir eine Gefahr durch Phishing-E-Mails mit gefälschten Laborbefunden, "
+    "das Risiko ist hoch, weil Anhänge schnell geöffnet werden. Unsere Maßnahme ist, den Absender "
+    "telefonisch zu prüfen und verdächtige Nachrichten an die IT zu melden, bevor jemand klickt."
+)
+
+# Question of the review step, answered with "Ja" to generate the script
+REVIEW_PROMPT = "Möchten Sie das Ergebnis sehen?"
+
+# Upper bound of messages per conversation, in case follow-up questions are asked
+MAX_TURNS = 30
+
+
+class LatencyRecorder:
+    """Collects request latencies and errors per endpoint."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.conversations = 0
+        self.failed_conversations = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, duration: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(duration)
+            if error:
+                counts = self.errors.setdefault(endpoint, {})
+                counts[error] = counts.get(error, 0) + 1
+
+    def conversation_done(self, ok: bool) -> None:
+        with self._lock:
+            self.conversations += 1
+            if not ok:
+                self.failed_conversations += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for endpoint, samples in sorted(self.samples.items()):
+                ordered = sorted(samples)
+                errors = sum(self.errors.get(endpoint, {}).values())
+                endpoints[endpoint] = {
+                    "requests": len(ordered),
+                    "errors": errors,
+                    "error_rate": errors / len(ordered),
+                    "error_kinds": dict(self.errors.get(endpoint, {})),
+                    "throughput": len(ordered) / elapsed if elapsed else 0.0,
+                    "p50": percentile(ordered, 50),
+                    "p95": percentile(ordered, 95),
+                    "p99": percentile(ordered, 99),
+                    "max": ordered[-1]
+                }
+
+            total = sum(item["requests"] for item in endpoints.values())
+            errors = sum(item["errors"] for item in endpoints.values())
+            return {
+                "elapsed": elapsed,
+                "requests": total,
+                "errors": errors,
+                "error_rate": errors / total if total else 0.0,
+                "throughput": total / elapsed if elapsed else 0.0,
+                "conversations": self.conversations,
+                "failed_conversations": self.failed_conversations,
+                "conversations_per_minute": self.conversations * 60 / elapsed if elapsed else 0.0,
+                "endpoints": endpoints
+            }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class ApiClient:
+    """Minimal JSON client for the REST API that records every request."""
+
+    def __init__(self, base_url: str, recorder: LatencyRecorder, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+
+    def request(self, endpoint: str, path: str, payload: Dict[str, Any] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Sends one request and records its latency under the endpoint name.
+
+        Returns:
+            Tuple (success, decoded JSON body)
+        """
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data,
+                                     headers={"Content-Type": "application/json"},
+                                     method="POST" if data is not None else "GET")
+        start_time = time.perf_counter()
+        error = None
+        body: Dict[str, Any] = {}
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                body = json.loads(response.read().decode("utf-8") or "{}")
+            if body.get("success") is False:
+                error = "unsuccessful"
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read().decode("utf-8") or "{}")
+            except ValueError:
+                body = {}
+            error = "busy" if body.get("busy") else f"http_{e.code}"
+        except Exception as e:
+            error = type(e).__name__
+        self.recorder.record(endpoint, time.perf_counter() - start_time, error)
+        return error is None, body
+
+
+def run_conversation(client: ApiClient, think_time: float, format: str) -> bool:
+    """
+    Runs one complete interview.
+
+    Returns:
+        True if the script was generated and saved
+    """
+    ok, body = client.request("start-conversation", "/api/start-conversation", {})
+    if not ok:
+        return False
+    session_id = body["session_id"]
+
+    def think():
+        if think_time:
+            time.sleep(random.uniform(0.5, 1.5) * think_time)
+
+    answers = list(CONTEXT_ANSWERS)
+    script_generated = False
+    for _ in range(MAX_TURNS):
+        think()
+        if answers:
+            endpoint, message = "send-message:context", answers.pop(0)
+        elif REVIEW_PROMPT in body.get("message", ""):
+            endpoint, message = "send-message:review", "Ja, gerne zeigen"
+        else:
+            endpoint, message = "send-message:section", SECTION_ANSWER
+
+        ok, body = client.request(endpoint, "/api/send-message", {"session_id": session_id, "message": message})
+        if not ok:
+            return False
+        if body.get("script_generated"):
+            script_generated = True
+            break
+
+    if not script_generated:
+        return False
+
+    think()
+    ok, _ = client.request("preview-script", "/api/preview-script", {"session_id": session_id, "format": format})
+    if not ok:
+        return False
+
+    ok, _ = client.request("save-script", "/api/save-script", {"session_id": session_id, "format": format})
+    return ok
+
+
+def virtual_user(client: ApiClient, deadline: float, iterations: int, think_time: float, format: str) -> None:
+    done = 0
+    while time.time() < deadline and (not iterations or done < iterations):
+        try:
+            ok = run_conversation(client, think_time, format)
+        except Exception:
+            ok = False
+        client.recorder.conversation_done(ok)
+        done += 1
+
+
+def sample_server(base_url: str, interval: float, stop: threading.Event, samples: List[Dict[str, Any]]) -> None:
+    """Polls /api/stats for the server's RSS, sessions and LLM queue."""
+    start_time = time.time()
+    while not stop.is_set():
+        try:
+            with urllib.request.urlopen(base_url.rstrip("/") + "/api/stats", timeout=5) as response:
+                stats = json.loads(response.read().decode("utf-8"))
+            samples.append({
+                "t": round(time.time() - start_time, 1),
+                "rss_mb": round(stats.get("process", {}).get("rss_bytes", 0) / 1024 / 1024, 1),
+                "sessions": stats.get("sessions", {}).get("active_sessions"),
+                "llm_active": stats.get("llm_gateway", {}).get("active_calls"),
+                "llm_waiting": stats.get("llm_gateway", {}).get("waiting_calls")
+            })
+        except Exception:
+            pass
+        stop.wait(interval)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Answers the Ollama API calls of the app after a configurable delay."""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    model = "llama3.1:latest"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: str, content_type: str = "application/json", status: int = 200) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/api/tags"):
+            self._send(json.dumps({"models": [{"name": self.model, "model": self.model, "size": 1, "digest": "fake",
+                                               "modified_at": "2024-01-01T00:00:00Z", "details": {}}]}))
+        else:
+            self._send("{}", status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = request.get("prompt", "")
+        time.sleep(random.uniform(0.8, 1.2) * self.latency)
+
+        if "Überprüfe" in prompt:
+            text = "KEINE_PROBLEME"
+        elif "Extrahiere" in prompt:
+            text = "- E-Mails\n- Patientendaten"
+        elif "Frage" in prompt:
+            text = "Welche Risiken sehen Sie im Umgang mit E-Mails und Patientendaten?"
+        else:
+            text = "Ein neuer Arbeitstag im Krankenhaus beginnt. Prüfen Sie Absender, bevor Sie Anhänge öffnen."
+
+        chunk = {"model": request.get("model"), "created_at": "2024-01-01T00:00:00Z", "done": True,
+                 "done_reason": "stop", "response": text}
+        if request.get("stream", True):
+            lines = [json.dumps(dict(chunk, done=False, done_reason=None)), json.dumps(dict(chunk, response=""))]
+            self._send("\n".join(lines) + "\n", "application/x-ndjson")
+        else:
+            self._send(json.dumps(chunk))
+
+
+def start_fake_llm(port: int, latency: float, model: str) -> ThreadingHTTPServer:
+    FakeOllamaHandler.latency = latency
+    FakeOllamaHandler.model = model
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_report(summary: Dict[str, Any], samples: List[Dict[str, Any]]) -> None:
+    print()
+    print(f"{'endpoint':<24}{'requests':>9}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for endpoint, item in summary["endpoints"].items():
+        print(f"{endpoint:<24}{item['requests']:>9}{item['errors']:>8}{item['throughput']:>8.2f}"
+              f"{item['p50'] * 1000:>9.0f}{item['p95'] * 1000:>9.0f}{item['p99'] * 1000:>9.0f}{item['max'] * 1000:>9.0f}")
+    print()
+    print(f"Duration:       {summary['elapsed']:.1f}s")
+    print(f"Requests:       {summary['requests']} ({summary['throughput']:.2f}/s), error rate {summary['error_rate']:.2%}")
+    print(f"Conversations:  {summary['conversations']} ({summary['conversations_per_minute']:.1f}/min), "
+          f"{summary['failed_conversations']} failed")
+
+    if samples:
+        rss = [sample["rss_mb"] for sample in samples]
+        print(f"Server RSS:     start {rss[0]:.0f} MB, max {max(rss):.0f} MB, end {rss[-1]:.0f} MB")
+        print()
+        print(f"{'t [s]':>7}{'RSS MB':>9}{'sessions':>10}{'LLM active':>12}{'LLM waiting':>13}")
+        step = max(1, len(samples) // 20)
+        for sample in samples[::step]:
+            print(f"{sample['t']:>7}{sample['rss_mb']:>9}{str(sample['sessions']):>10}"
+                  f"{str(sample['llm_active']):>12}{str(sample['llm_waiting']):>13}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Load test for the E-Learning Course Generator REST API')
+    parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the server')
+    parser.add_argument('--users', type=int, default=10, help='Number of concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Test duration in seconds')
+    parser.add_argument('--iterations', type=int, default=0, help='Conversations per user (0 = until the duration is over)')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which the users are started')
+    parser.add_argument('--think-time', type=float, default=0, help='Mean pause between messages of a user in seconds')
+    parser.add_argument('--format', choices=['txt', 'html', 'json'], default='txt', help='Format of previewed and saved scripts')
+    parser.add_argument('--timeout', type=float, default=300, help='Timeout of a single request in seconds')
+    parser.add_argument('--sample-interval', type=float, default=2, help='Seconds between samples of the server stats')
+    parser.add_argument('--json', metavar='FILE', help='Write the results as JSON')
+    parser.add_argument('--fake-llm-port', type=int, help='Start an Ollama-compatible fake LLM on this port')
+    parser.add_argument('--fake-llm-latency', type=float, default=1.0, help='Response time of the fake LLM in seconds')
+    parser.add_argument('--fake-llm-model', default='llama3.1:latest', help='Model name reported by the fake LLM')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+
+    if args.fake_llm_port:
+        start_fake_llm(args.fake_llm_port, args.fake_llm_latency, args.fake_llm_model)
+        print(f"Fake LLM listening on http://127.0.0.1:{args.fake_llm_port} ({args.fake_llm_latency}s latency)")
+        if args.users == 0:
+            # Only serve the fake LLM, e.g. for a server started separately
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return 0
+
+    recorder = LatencyRecorder()
+    samples: List[Dict[str, Any]] = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_server, args=(args.url, args.sample_interval, stop, samples), daemon=True)
+    sampler.start()
+
+    print(f"Starting {args.users} virtual users against {args.url} for {args.duration:.0f}s")
+    start_time = time.time()
+    deadline = start_time + args.duration
+    users = []
+    for index in range(args.users):
+        client = ApiClient(args.url, recorder, args.timeout)
+        user = threading.Thread(target=virtual_user, daemon=True,
+                                args=(client, deadline, args.iterations, args.think_time, args.format))
+        user.start()
+        users.append(user)
+        if args.ramp_up and args.users > 1:
+            time.sleep(args.ramp_up / (args.users - 1) if index < args.users - 1 else 0)
+
+    try:
+        for user in users:
+            user.join()
+    except KeyboardInterrupt:
+        print("Interrupted, reporting partial results")
+
+    elapsed = time.time() - start_time
+    stop.set()
+    sampler.join(timeout=args.sample_interval + 5)
+
+    summary = recorder.summary(elapsed)
+    print_report(summary, samples)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(summary, server_samples=samples), f, indent=2)
+
+    return 1 if summary["requests"] == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,4 @@
 from modules.document_processor import DocumentProcessor
-from modules.vector_store_manager import VectorStoreManager
 from modules.llm_manager import LLMManager
 from modules.template_manager import TemplateManager
 from modules.dialog_manager import DialogManager
@@ -12,4 +11,12 @@ __all__ = [
     'TemplateManager',
     'DialogManager',
     'ELearningCourseGenerator'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # VectorStoreManager pulls in torch and the embedding model, so it is only imported when used
+    if name == 'VectorStoreManager':
+        from modules.vector_store_manager import VectorStoreManager
+        return VectorStoreManager
+    raise AttributeError(f"module 'modules' has no attribute '{name}'")
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine
+
+from modules.offload import wait_future
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRunner:
+    """
+    Runs coroutines on one asyncio event loop in a daemon thread.
+
+    Flask views and Socket.IO handlers are synchronous, so async turns are handed
+    to this shared loop; any number of turns can wait on the LLM there without a
+    thread per request.
+    """
+
+    def __init__(self, name: str = "async-turns"):
+        """
+        Initializes the AsyncRunner.
+
+        Args:
+            name: Name of the loop thread
+        """
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Starts the event loop thread if it is not running yet."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+            self._thread.start()
+            logger.info("Async turn loop started")
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Schedules a coroutine on the loop.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            Future with the coroutine's result
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: float = None) -> Any:
+        """
+        Runs a coroutine on the loop and waits for its result without blocking
+        the eventlet hub.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Maximum time in seconds (None waits indefinitely)
+
+        Returns:
+            Result of the coroutine; its exception is re-raised
+        """
+        future = self.submit(coro)
+        try:
+            return wait_future(future, timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        """Stops the event loop."""
+        with self._lock:
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from modules.metrics import SCRIPTS_GENERATED
+from modules.http_cache import precompress_file
+
+logger = logging.getLogger(__name__)
+
+# Short keys that may be used instead of the full context questions, in question order
+CONTEXT_KEYS = ("organization", "audience", "duration", "information", "communication")
+
+SUPPORTED_FORMATS = ("txt", "html", "json")
+
+
+class BatchRunner:
+    """
+    Generates courses for pre-filled interviews without the web chat.
+    All interviews share the generator's embedding model, index and LLM.
+    """
+
+    def __init__(self, generator, workers: int = None, format: str = "txt", output_dir: str = None):
+        """
+        Initializes the BatchRunner.
+
+        Args:
+            generator: Set up ELearningCourseGenerator instance
+            workers: Number of interviews processed in parallel (defaults to batch_workers)
+            format: Format of the written scripts ("txt", "json", or "html")
+            output_dir: Directory for the scripts (defaults to output_dir of the config)
+        """
+        if format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+
+        self.generator = generator
+        self.workers = max(1, int(workers or generator.config.get("batch_workers", 4)))
+        self.format = format
+        self.output_dir = output_dir or generator.config["output_dir"]
+
+    @staticmethod
+    def load_interviews(path: str) -> List[Dict[str, Any]]:
+        """
+        Reads interviews from a JSONL file, one JSON object per line:
+        {"id": ..., "context": {...} or [...], "sections": {section_id: answer}}
+
+        Args:
+            path: Path of the JSONL file
+
+        Returns:
+            List of interviews
+        """
+        interviews = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    interview = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON: {e}")
+                if not isinstance(interview, dict):
+                    raise ValueError(f"{path}:{line_number}: expected a JSON object")
+
+                interview.setdefault("id", f"interview_{line_number}")
+                interviews.append(interview)
+
+        return interviews
+
+    def run_file(self, path: str) -> List[Dict[str, Any]]:
+        """
+        Generates the courses of all interviews in a JSONL file and writes a summary next to them.
+
+        Args:
+            path: Path of the JSONL file
+
+        Returns:
+            One result per interview
+        """
+        results = self.run(self.load_interviews(path))
+
+        summary_path = os.path.join(
+            self.output_dir, f"batch_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        logger.info(f"Batch summary written to {summary_path}")
+
+        return results
+
+    def run(self, interviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generates the courses of the given interviews on a pool of worker threads.
+
+        Args:
+            interviews: Interviews as returned by load_interviews()
+
+        Returns:
+            One result per interview, in input order
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        logger.info(f"Generating {len(interviews)} courses with {self.workers} workers")
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(interviews)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            futures = {
+                executor.submit(self._run_interview, interview): index
+                for index, interview in enumerate(interviews)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results[futures[future]] = result
+                logger.info(f"[{done}/{len(interviews)}] {result['id']}: {result['status']}")
+
+        return results
+
+    def _run_interview(self, interview: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Runs one interview and saves its script.
+
+        Args:
+            interview: Interview with context and section answers
+
+        Returns:
+            Result with status, output path, duration and error
+        """
+        interview_id = str(interview["id"])
+        result = {"id": interview_id, "status": "failed", "path": None,
+                  "missing_sections": [], "duration": None, "error": None}
+        start_time = time.time()
+
+        try:
+            dialog_manager = self.generator.create_dialog_manager(session_id=f"batch-{interview_id}", headless=True)
+            context_answers = self._context_answers(dialog_manager, interview.get("context", {}))
+            section_answers = interview.get("sections", {})
+            if not isinstance(section_answers, dict):
+                raise ValueError("'sections' must map section IDs to answers")
+
+            # Batch runs may wait for the LLM instead of being rejected like interactive requests
+            with self.generator.llm_manager.background_calls():
+                result["missing_sections"] = dialog_manager.run_prefilled_interview(context_answers, section_answers)
+
+            format = interview.get("format", self.format)
+            filename = os.path.basename(interview.get("filename") or "") or f"{self._sanitize(interview_id)}.{format}"
+            output_path = dialog_manager.save_script(os.path.join(self.output_dir, filename), format)
+            precompress_file(output_path)
+
+            SCRIPTS_GENERATED.inc()
+            result["status"] = "ok"
+            result["path"] = output_path
+        except Exception as e:
+            logger.error(f"Error generating course for interview {interview_id}: {e}")
+            result["error"] = str(e)
+
+        result["duration"] = round(time.time() - start_time, 3)
+        return result
+
+    @staticmethod
+    def _context_answers(dialog_manager, context: Any) -> Dict[str, str]:
+        """
+        Maps the context answers of an interview to the context questions.
+
+        Args:
+            dialog_manager: DialogManager providing the context questions
+            context: List of answers in question order, or a dictionary keyed by
+                question text or by one of CONTEXT_KEYS
+
+        Returns:
+            Answers keyed by the context question
+        """
+        questions = dialog_manager.context_questions
+        if isinstance(context, list):
+            return {question: str(answer) for question, answer in zip(questions, context)}
+        if not isinstance(context, dict):
+            raise ValueError("'context' must be a list or an object")
+
+        answers = {}
+        for key, answer in context.items():
+            if key in questions:
+                answers[key] = str(answer)
+            elif key in CONTEXT_KEYS:
+                answers[questions[CONTEXT_KEYS.index(key)]] = str(answer)
+            else:
+                logger.warning(f"Ignoring unknown context key: {key}")
+        return answers
+
+    @staticmethod
+    def _sanitize(name: str) -> str:
+        """Turns an interview ID into a safe file name."""
+        return re.sub(r"[^\w\-]+", "_", name).strip("_") or "interview"
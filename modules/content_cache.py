@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where only one process writes the file
+    fcntl = None
+
+from modules.metrics import CONTENT_CACHE
+from modules.offload import offloaded
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticContentCache:
+    """
+    Reuses verified section content for semantically similar answers.
+
+    Each entry is embedded from the section, organization, audience and the
+    user's response. Lookups only compare entries of the same section (one small
+    inner product index per section, the embeddings are normalized); a match
+    above `threshold` is reused as is, a match above `draft_threshold` serves as
+    a draft that only goes through the hallucination check.
+    """
+
+    def __init__(self, embeddings, threshold: float = 0.95, draft_threshold: Optional[float] = 0.9,
+                 max_entries: int = 1000, persist_path: Optional[str] = "./data/content_cache.jsonl"):
+        """
+        Initializes the SemanticContentCache.
+
+        Args:
+            embeddings: LangChain embeddings model (the one of the vector store)
+            threshold: Minimum cosine similarity to reuse content unchanged
+            draft_threshold: Minimum cosine similarity to use content as a draft (None disables drafts)
+            max_entries: Maximum number of entries, the oldest are dropped first
+            persist_path: JSONL file the entries are appended to (None keeps them in memory only)
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.draft_threshold = draft_threshold if draft_threshold is not None else threshold
+        self.max_entries = max(1, int(max_entries))
+        self.persist_path = persist_path
+
+        self._entries: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Any] = {}
+        self._positions: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._persisted_lines = 0
+
+        self.lookups = {"reuse": 0, "draft": 0, "miss": 0}
+        self.additions = 0
+
+        if persist_path:
+            self._load()
+
+    @staticmethod
+    def make_text(section_id: str, organization: str, audience: str, user_response: str) -> str:
+        """
+        Builds the text that is embedded for a section answer.
+
+        Args:
+            section_id: ID of the section
+            organization: Organization the course is created for
+            audience: Target audience of the course
+            user_response: The user's answer for the section
+
+        Returns:
+            Text to embed
+        """
+        return (f"Abschnitt: {section_id}\nOrganisation: {organization.strip()}\n"
+                f"Zielgruppe: {audience.strip()}\nAntwort: {user_response.strip()}")
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @offloaded
+    def lookup(self, section_id: str, organization: str, audience: str,
+               user_response: str) -> Optional[Dict[str, Any]]:
+        """
+        Searches the most similar cached answer of the section.
+
+        Args:
+            section_id: ID of the section
+            organization: Organization the course is created for
+            audience: Target audience of the course
+            user_response: The user's answer for the section
+
+        Returns:
+            Dictionary with mode ("reuse" or "draft"), content and similarity, or None
+        """
+        try:
+            with self._lock:
+                if section_id not in self._indexes:
+                    self._count("miss")
+                    return None
+
+            vector = self._embed(self.make_text(section_id, organization, audience, user_response))
+
+            with self._lock:
+                index = self._indexes.get(section_id)
+                if index is None:
+                    self._count("miss")
+                    return None
+                scores, ids = index.search(vector.reshape(1, -1), 1)
+                similarity = float(scores[0][0])
+                if ids[0][0] < 0 or similarity < self.draft_threshold:
+                    self._count("miss")
+                    return None
+                entry = self._entries[self._positions[section_id][ids[0][0]]]
+
+            mode = "reuse" if similarity >= self.threshold else "draft"
+            self._count(mode)
+            logger.info(f"Content cache {mode} for section {section_id} (similarity {similarity:.3f})")
+            return {"mode": mode, "content": entry["content"], "similarity": similarity}
+        except Exception as e:
+            logger.warning(f"Error looking up the content cache: {e}")
+            return None
+
+    @offloaded
+    def add(self, section_id: str, organization: str, audience: str, user_response: str, content: str) -> None:
+        """
+        Stores verified content of a section.
+
+        Args:
+            section_id: ID of the section
+            organization: Organization the course is created for
+            audience: Target audience of the course
+            user_response: The user's answer for the section
+            content: Content that passed the quality check
+        """
+        if not isinstance(content, str) or not content.strip():
+            return
+        try:
+            vector = self._embed(self.make_text(section_id, organization, audience, user_response))
+            entry = {
+                "section_id": section_id,
+                "content": content,
+                "vector": vector,
+                "created_at": time.time()
+            }
+            with self._lock:
+                self._append(entry)
+                self.additions += 1
+                if len(self._entries) > self.max_entries:
+                    self._entries = self._entries[-self.max_entries:]
+                    self._rebuild()
+                self._persist(entry)
+        except Exception as e:
+            logger.warning(f"Error adding to the content cache: {e}")
+
+    def _count(self, result: str) -> None:
+        self.lookups[result] += 1
+        CONTENT_CACHE.inc(result=result)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        section_id = entry["section_id"]
+        index = self._indexes.get(section_id)
+        if index is None:
+            index = self._indexes[section_id] = faiss.IndexFlatIP(len(entry["vector"]))
+            self._positions[section_id] = []
+        index.add(entry["vector"].reshape(1, -1))
+        self._entries.append(entry)
+        self._positions[section_id].append(len(self._entries) - 1)
+
+    def _rebuild(self) -> None:
+        """Rebuilds the per-section indexes from the retained entries."""
+        entries = self._entries
+        self._entries = []
+        self._indexes = {}
+        self._positions = {}
+        for entry in entries:
+            self._append(entry)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            for line in lines[-self.max_entries:]:
+                try:
+                    record = json.loads(line)
+                    record["vector"] = np.asarray(record["vector"], dtype="float32")
+                    self._append(record)
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Skipping invalid content cache entry: {e}")
+            self._persisted_lines = len(lines)
+            logger.info(f"Loaded {len(self._entries)} entries of the content cache from {self.persist_path}")
+        except Exception as e:
+            logger.error(f"Error loading the content cache: {e}")
+            self._entries, self._indexes, self._positions = [], {}, {}
+
+    @contextmanager
+    def _file_lock(self):
+        """Serializes writes to the file between the processes sharing it."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.persist_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _persist(self, entry: Dict[str, Any]) -> None:
+        if not self.persist_path:
+            return
+        try:
+            line = json.dumps(dict(entry, vector=entry["vector"].tolist()), ensure_ascii=False) + "\n"
+            os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+            with self._file_lock():
+                # Dropped entries stay in the file until it holds twice the limit, then it is rewritten
+                if self._persisted_lines + 1 >= 2 * self.max_entries:
+                    self._compact(line)
+                else:
+                    with open(self.persist_path, "a", encoding="utf-8") as f:
+                        f.write(line)
+                    self._persisted_lines += 1
+        except Exception as e:
+            logger.warning(f"Error writing the content cache: {e}")
+
+    def _compact(self, line: str) -> None:
+        """
+        Rewrites the file with its newest entries. Reads the current file, so entries
+        appended by other processes are kept, and replaces it atomically.
+        """
+        lines = []
+        if os.path.exists(self.persist_path):
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                lines = [item for item in f.readlines() if item.endswith("\n")]
+        lines = (lines + [line])[-self.max_entries:]
+
+        directory = os.path.dirname(os.path.abspath(self.persist_path))
+        fd, temp_path = tempfile.mkstemp(prefix=".content_cache.", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(temp_path, self.persist_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._persisted_lines = len(lines)
+        logger.info(f"Compacted the content cache file to {len(lines)} entries")
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._entries, self._indexes, self._positions = [], {}, {}
+            if self.persist_path and os.path.exists(self.persist_path):
+                with self._file_lock():
+                    try:
+                        os.remove(self.persist_path)
+                    except FileNotFoundError:
+                        # Cleared by another process in the meantime
+                        pass
+            self._persisted_lines = 0
+
+    def estimate_memory(self) -> int:
+        """
+        Approximates the memory held by the entries.
+
+        Returns:
+            Bytes held by the vectors (twice, in the entries and the indexes) and the contents
+        """
+        with self._lock:
+            return sum(2 * entry["vector"].nbytes + len(entry["content"]) for entry in self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns statistics about the cache.
+
+        Returns:
+            Dictionary with size, thresholds and lookup results
+        """
+        with self._lock:
+            entries = len(self._entries)
+            sections = len(self._indexes)
+        lookups = sum(self.lookups.values())
+        return {
+            "entries": entries,
+            "sections": sections,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "draft_threshold": self.draft_threshold,
+            "persist_path": self.persist_path,
+            "reuses": self.lookups["reuse"],
+            "drafts": self.lookups["draft"],
+            "misses": self.lookups["miss"],
+            "hit_rate": (self.lookups["reuse"] + self.lookups["draft"]) / lookups if lookups else None,
+            "additions": self.additions
+        }
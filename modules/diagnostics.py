@@ -49,12 +49,34 @@ def diagnose_type_error(error: Exception, context: Dict[str, Any] = None) -> str
     
     return result
 
-def run_diagnostics(dialog_manager) -> Dict[str, Any]:
+# Steps of the dialog flow
+VALID_STEPS = ("greeting", "context_gathering", "template_navigation", "review", "completion")
+
+# Expected types of the conversation state variables
+EXPECTED_STATE_TYPES = {
+    "current_step": str,
+    "context_info": dict,
+    "section_responses": dict,
+    "generated_content": dict,
+    "completed_sections": list,
+    "current_section": (str, type(None)),
+    "content_quality_checks": dict,
+    "current_section_question_count": int,
+    "question_error_count": int
+}
+
+def run_diagnostics(dialog_manager, dry_run: bool = True) -> Dict[str, Any]:
     """
     Runs diagnostics on a DialogManager instance to identify type issues.
     
+    The default dry run only inspects the conversation state and the template.
+    It never changes the state and never calls the LLM or the vector store, so
+    it is cheap enough for error paths.
+    
     Args:
         dialog_manager: DialogManager instance to check
+        dry_run: If False, additionally calls get_next_question(), which can
+                 advance the dialog and trigger retrieval and LLM calls
         
     Returns:
         Dictionary with diagnostic results
@@ -64,42 +86,73 @@ def run_diagnostics(dialog_manager) -> Dict[str, Any]:
         "details": [],
         "recommendations": []
     }
+
+    def add_issue(detail: str, recommendation: str = None) -> None:
+        results["issues_found"] = True
+        results["details"].append(detail)
+        if recommendation:
+            results["recommendations"].append(recommendation)
+
+    state = dialog_manager.conversation_state
     
     # Check state variable types
-    for key, value in dialog_manager.conversation_state.items():
-        expected_types = {
-            "current_step": str,
-            "context_info": dict,
-            "section_responses": dict,
-            "generated_content": dict,
-            "completed_sections": list,
-            "current_section": (str, type(None)),
-            "content_quality_checks": dict,
-            "current_section_question_count": int,
-            "question_error_count": int
-        }
-        
-        if key in expected_types:
-            expected = expected_types[key]
-            if isinstance(expected, tuple):
-                if not any(isinstance(value, t) for t in expected):
-                    results["issues_found"] = True
-                    results["details"].append(f"State variable '{key}' has incorrect type: expected {expected}, got {type(value)}")
-                    results["recommendations"].append(f"Ensure '{key}' is always set with the correct type")
-            elif not isinstance(value, expected):
-                results["issues_found"] = True
-                results["details"].append(f"State variable '{key}' has incorrect type: expected {expected.__name__}, got {type(value).__name__}")
-                results["recommendations"].append(f"Ensure '{key}' is always set with the correct type")
+    for key, expected in EXPECTED_STATE_TYPES.items():
+        if key not in state:
+            add_issue(f"State variable '{key}' is missing", f"Initialize '{key}' in the conversation state")
+            continue
+
+        value = state[key]
+        if isinstance(expected, tuple):
+            if not any(isinstance(value, t) for t in expected):
+                add_issue(f"State variable '{key}' has incorrect type: expected {expected}, got {type(value)}",
+                          f"Ensure '{key}' is always set with the correct type")
+        elif not isinstance(value, expected):
+            add_issue(f"State variable '{key}' has incorrect type: expected {expected.__name__}, got {type(value).__name__}",
+                      f"Ensure '{key}' is always set with the correct type")
+
+    # Check the state against the dialog flow and the template
+    current_step = state.get("current_step")
+    if isinstance(current_step, str) and current_step not in VALID_STEPS:
+        add_issue(f"Unknown dialog step '{current_step}'", f"Use one of: {', '.join(VALID_STEPS)}")
+
+    section_ids = {section.get("id") for section in dialog_manager.template_manager.template.get("sections", [])}
+    current_section = state.get("current_section")
+    if isinstance(current_section, str) and current_section not in section_ids:
+        add_issue(f"Current section '{current_section}' does not exist in the template")
+    if current_step == "template_navigation" and not current_section and \
+            len(state.get("completed_sections") or []) < len(section_ids):
+        add_issue("Template navigation without a current section",
+                  "Set current_section when entering template navigation")
+
+    for key in ("completed_sections", "section_responses", "generated_content"):
+        value = state.get(key)
+        if isinstance(value, (list, dict)):
+            unknown = [section_id for section_id in value if section_id not in section_ids]
+            if unknown:
+                add_issue(f"'{key}' refers to unknown sections: {', '.join(map(str, unknown))}")
+
+    generated_content = state.get("generated_content")
+    if isinstance(generated_content, dict):
+        for section_id, content in generated_content.items():
+            if not isinstance(content, str):
+                add_issue(f"Generated content of section '{section_id}' is {type(content).__name__} instead of str",
+                          "Apply ensure_str() to generated content")
+
+    for key in ("current_section_question_count", "question_error_count"):
+        value = state.get(key)
+        if isinstance(value, int) and value < 0:
+            add_issue(f"State variable '{key}' is negative: {value}")
+
+    if dry_run:
+        return results
     
     # Check other key components
     try:
         test_response = dialog_manager.get_next_question()
         if not isinstance(test_response, str):
-            results["issues_found"] = True
-            results["details"].append(f"get_next_question returned {type(test_response).__name__} instead of str")
-            results["recommendations"].append("Apply ensure_str() to get_next_question return value")
+            add_issue(f"get_next_question returned {type(test_response).__name__} instead of str",
+                      "Apply ensure_str() to get_next_question return value")
     except Exception as e:
-        results["issues_found"] = True
-        results["details"].append(f"Error in get_next_question: {e}")
+        add_issue(f"Error in get_next_question: {e}")
     
-    return results
\ No newline at end of file
+    return results
@@ -1,22 +1,47 @@
+import os
 import html
+import json
+import time
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+import threading
+from concurrent.futures import CancelledError
+from typing import Dict, Any, Generator, List, Optional, Tuple
 from datetime import datetime
 import re
 from langchain_core.documents import Document
-from modules.utils import ensure_type, ensure_list, ensure_dict, ensure_str
 from modules.utils import ensure_type, ensure_list, ensure_dict, ensure_str, ensure_int
+from modules.metrics import StageTimer, FALLBACKS, SECTION_STAGE_DURATION, RENDER_CACHE, SPECULATIVE_QUESTIONS
+from modules.offload import wait_future, run_blocking
+from modules.steps import run_steps, arun_steps
+from modules.log_pipeline import log_context
+from modules.memory_profiler import deep_sizeof
+from modules.tracing import traced, span, set_span_attributes
+from modules.session_store import MERGED_STATE_KEYS
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+def _turn_attributes(dialog_manager, response) -> Dict[str, Any]:
+    """Span attributes of a user turn."""
+    state = dialog_manager.conversation_state
+    return {
+        "session_id": dialog_manager.session_id,
+        "step": state.get("current_step"),
+        "section_id": state.get("current_section"),
+        "response_chars": len(ensure_str(response))
+    }
+
+
 class DialogManager:
     """
     Implements a dialog-based process for creating an e-learning course.
     """
 
-    def __init__(self, template_manager, llm_manager, vector_store_manager):
+    def __init__(self, template_manager, llm_manager, vector_store_manager,
+                 job_manager=None, session_id: str = None, event_handler=None,
+                 stream_tokens: bool = False, content_cache=None, structured_generation: bool = False,
+                 speculation_executor=None, section_results_loader=None):
         """
         Initializes the DialogManager.
 
@@ -24,10 +49,45 @@ class DialogManager:
             template_manager: TemplateManager instance
             llm_manager: LLMManager instance
             vector_store_manager: VectorStoreManager instance
+            job_manager: Optional JobManager to generate section content in the background
+            session_id: ID of the session this dialog belongs to
+            event_handler: Optional callable(event, payload) that receives session events
+            stream_tokens: Whether LLM output is forwarded token by token via the event handler
+            content_cache: Optional SemanticContentCache shared by all dialogs
+            structured_generation: Whether section content is generated with a single JSON call
+                instead of separate calls for key information, content and quality check
+            speculation_executor: Optional executor that generates the question of the next
+                section while the user answers the current one
+            section_results_loader: Optional callable returning the section results stored for
+                the session, to wait for jobs that run in another worker process
         """
         self.template_manager = template_manager
         self.llm_manager = llm_manager
         self.vector_store_manager = vector_store_manager
+        self.job_manager = job_manager
+        self.session_id = session_id
+        self.event_handler = event_handler
+        self.stream_tokens = stream_tokens
+        self.content_cache = content_cache
+        self.structured_generation = structured_generation
+        self.speculation_executor = speculation_executor
+        self.section_results_loader = section_results_loader
+
+        # Maximum number of seconds to wait for background jobs before the review
+        self.section_job_timeout = 600
+        # Seconds between two reads of the session store while waiting for jobs of other workers
+        self.section_poll_interval = 1.0
+
+        # Question of the next section generated ahead of time: {"key", "future", "cancelled"}
+        self._speculation = None
+        self._speculation_lock = threading.Lock()
+        self.speculation_timeout = 60
+
+        # Section results of background jobs: not yet applied to the conversation state,
+        # and all results for persisting them (the job thread never writes the state itself)
+        self._pending_results: Dict[str, Dict[str, Any]] = {}
+        self._job_results: Dict[str, Dict[str, Any]] = {key: {} for key in MERGED_STATE_KEYS}
+        self._results_lock = threading.Lock()
 
         # Initialize conversation state
         self.conversation_state = {
@@ -38,10 +98,17 @@ class DialogManager:
             "completed_sections": [],
             "current_section": None,
             "content_quality_checks": {},
+            "background_sections": {},  # Job ID per section generated in the background
             "current_section_question_count": 0,
-            "question_error_count": 0
+            "question_error_count": 0,
+            "state_version": 0  # Incremented on every change, keys the render cache
         }
 
+        # Assembled script and its renderings for one state version
+        self._render_cache: Dict[str, Any] = {}
+        self._render_cache_version = None
+        self._render_lock = threading.Lock()
+
         # List of context questions
         self.context_questions = [
         "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?",
@@ -58,6 +125,9 @@ class DialogManager:
         Returns:
             Next question as a string
         """
+        return self._run_steps(self._next_question_steps())
+
+    def _next_question_steps(self) -> Generator:
         if self.conversation_state["current_step"] == "greeting":
             # Switch to next step
             self.conversation_state["current_step"] = "context_gathering"
@@ -71,10 +141,10 @@ class DialogManager:
 
             # All context questions have been answered
             self.conversation_state["current_step"] = "template_navigation"
-            return "Vielen Dank für diese Informationen! Jetzt werde ich Ihnen einige Fragen zu spezifischen Bereichen der Informationssicherheit stellen, damit wir einen gut angepassten Kurs erstellen können.\n\n" + self.get_next_template_question()
+            return "Vielen Dank für diese Informationen! Jetzt werde ich Ihnen einige Fragen zu spezifischen Bereichen der Informationssicherheit stellen, damit wir einen gut angepassten Kurs erstellen können.\n\n" + (yield from self._next_template_question_steps())
 
         elif self.conversation_state["current_step"] == "template_navigation":
-            return self.get_next_template_question()
+            return (yield from self._next_template_question_steps())
 
         elif self.conversation_state["current_step"] == "review":
             return "Ich habe basierend auf Ihren Eingaben einen E-Learning-Kurs zur Informationssicherheit entworfen. Möchten Sie das Ergebnis sehen?"
@@ -92,6 +162,9 @@ class DialogManager:
         Returns:
             Next question as a string
         """
+        return self._run_steps(self._next_template_question_steps())
+
+    def _next_template_question_steps(self) -> Generator:
         # Predefined questions for emergencies
         predefined_questions = {
             "threat_awareness": "Wie sieht ein typischer Arbeitstag in Ihrem Unternehmen aus, besonders in Bezug auf den Umgang mit externen E-Mails oder Informationen?",
@@ -113,7 +186,7 @@ class DialogManager:
             if next_section is None:
                 # All sections have been completed
                 self.conversation_state["current_step"] = "review"
-                return self.get_next_question()
+                return (yield from self._next_question_steps())
 
             # Extract section information
             section_id = ensure_str(next_section["id"])
@@ -146,36 +219,24 @@ class DialogManager:
             }
 
             try:
-                # Get relevant documents for this section
-                retrieval_queries = self.generate_retrieval_queries(section_title, section_id)
-
-                retrieved_docs = self.vector_store_manager.retrieve_with_multiple_queries(
-                    queries=retrieval_queries,
-                    filter={"section_type": section_type},
-                    top_k=2  # Reduce to 2 instead of 3 for less memory usage
-                )
-
-                # Limit context to max. 1000 characters
-                context_text = "\n\n".join([doc.page_content for doc in retrieved_docs])
-                if len(context_text) > 1000:
-                    context_text = context_text[:1000] + "..."
-
                 # Context information for question generation
-                organization = self.conversation_state["context_info"].get(
-                    "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", "")
-                audience = self.conversation_state["context_info"].get(
-                    "Welche Mitarbeitergruppen sollen geschult werden?", "")
-
-                # Try to generate question with LLM
-                question = ensure_str(
-                    self.llm_manager.generate_question(
-                        section_title=section_title,
-                        section_description=section_description,
-                        context_text=context_text,
-                        organization=organization,
-                        audience=audience
-                    )
-                )
+                organization = ensure_str(self.conversation_state["context_info"].get(
+                    "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", ""))
+                audience = ensure_str(self.conversation_state["context_info"].get(
+                    "Welche Mitarbeitergruppen sollen geschult werden?", ""))
+
+                # The question may already have been generated while the user answered the previous section
+                question = None
+                if self.speculation_executor is not None:
+                    question = yield ("blocking", self._claim_speculative_question, {
+                        "section_id": section_id,
+                        "organization": organization,
+                        "audience": audience
+                    })
+
+                if not question:
+                    question = ensure_str((yield from self._question_generation_steps(
+                        next_section, organization, audience, self._stream_callbacks("question", section_id))))
 
                 # Reset error counter on success
                 self.conversation_state["question_error_count"] = 0
@@ -192,9 +253,10 @@ class DialogManager:
                 if self.conversation_state["question_error_count"] > 2:
                     logger.warning(f"Too many errors with {section_title}, skipping section")
                     self.conversation_state["completed_sections"].append(section_id)
-                    return self.get_next_template_question()
+                    return (yield from self._next_template_question_steps())
 
                 # Use predefined question as fallback
+                FALLBACKS.inc(kind="predefined_question")
                 question = user_friendly_questions.get(section_id, 
                                                     predefined_questions.get(section_type, 
                                                                             f"Können Sie mir mehr über {section_title} in Ihrem Arbeitsalltag erzählen?"))
@@ -210,6 +272,9 @@ class DialogManager:
                 "tactic_check_follow_up": "Nachverfolgung von Vorfällen"
             }
             
+            # Generate the question of the following section while the user answers this one
+            self._speculate_next_question(section_id)
+
             if is_new_section:
                 friendly_name = friendly_section_names.get(section_id, section_title)
                 return f"Nun sprechen wir über {friendly_name}.\n\n{question}"
@@ -219,12 +284,158 @@ class DialogManager:
         except Exception as e:
             logger.error(f"Error in get_next_template_question: {e}")
             # General fallback if something unexpected happens
+            FALLBACKS.inc(kind="predefined_question")
             section_id = ensure_str(self.conversation_state.get("current_section", ""))
             if section_id:
                 return predefined_questions.get(section_id, "Können Sie mir mehr über Ihre tägliche Arbeit erzählen?")
             else:
                 return "Können Sie mir mehr über Ihre tägliche Arbeit erzählen?"
 
+    def _question_generation_steps(self, section: Dict[str, Any], organization: str, audience: str,
+                                   callbacks: Optional[List[Any]]) -> Generator:
+        """Retrieves the context of a section and generates its question with the LLM."""
+        section_id = ensure_str(section["id"])
+        section_title = ensure_str(section.get("title", ""))
+
+        # Get relevant documents for this section
+        retrieval_queries = self.generate_retrieval_queries(section_title, section_id)
+
+        retrieved_docs = yield ("retrieve", "retrieve_with_multiple_queries", {
+            "queries": retrieval_queries,
+            "filter": {"section_type": ensure_str(section.get("type", "generic"))},
+            "top_k": 2  # Reduce to 2 instead of 3 for less memory usage
+        })
+
+        # Limit context to max. 1000 characters
+        context_text = "\n\n".join([doc.page_content for doc in retrieved_docs])
+        if len(context_text) > 1000:
+            context_text = context_text[:1000] + "..."
+
+        # Try to generate question with LLM
+        return ensure_str((yield ("llm", "generate_question", {
+            "section_title": section_title,
+            "section_description": ensure_str(section.get("description", "")),
+            "context_text": context_text,
+            "organization": organization,
+            "audience": audience,
+            "callbacks": callbacks
+        })))
+
+    def _speculate_next_question(self, current_section_id: str) -> None:
+        """
+        Starts generating the question of the section after the current one in the
+        background, so it is ready when the current section is completed.
+
+        Args:
+            current_section_id: ID of the section whose question is being shown
+        """
+        if self.speculation_executor is None:
+            return
+
+        completed_sections = ensure_list(self.conversation_state.get("completed_sections", []))
+        next_section = self.template_manager.get_next_section(completed_sections + [current_section_id])
+        if next_section is None:
+            return
+
+        organization = ensure_str(self.conversation_state["context_info"].get(
+            "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", ""))
+        audience = ensure_str(self.conversation_state["context_info"].get(
+            "Welche Mitarbeitergruppen sollen geschult werden?", ""))
+        key = (ensure_str(next_section["id"]), organization, audience)
+
+        with self._speculation_lock:
+            if self._speculation is not None:
+                if self._speculation["key"] == key:
+                    return
+                self._discard_speculation()
+
+            # Speculative calls only use spare capacity of the LLM
+            if self.llm_manager.is_saturated():
+                return
+
+            cancelled = threading.Event()
+            try:
+                future = self.speculation_executor.submit(
+                    self._generate_speculative_question, next_section, organization, audience, cancelled)
+            except RuntimeError as e:
+                logger.warning(f"Could not start speculative question generation: {e}")
+                return
+            self._speculation = {"key": key, "future": future, "cancelled": cancelled}
+        logger.info(f"Generating the question of section {key[0]} speculatively")
+
+    def _generate_speculative_question(self, section: Dict[str, Any], organization: str, audience: str,
+                                       cancelled: threading.Event) -> str:
+        """
+        Entry point of the speculation executor; the question is not streamed to the client.
+        A discarded speculation stops before its next retrieval or LLM call.
+        """
+        def perform(request):
+            if cancelled.is_set():
+                raise CancelledError("speculation discarded")
+            return self._perform(request)
+
+        section_id = ensure_str(section["id"])
+        with log_context(session_id=self.session_id, section_id=section_id), \
+                span("dialog.speculative_question", section_id=section_id):
+            return run_steps(self._question_generation_steps(section, organization, audience, None), perform)
+
+    def _claim_speculative_question(self, section_id: str, organization: str, audience: str) -> Optional[str]:
+        """
+        Takes the speculatively generated question of a section, waiting for it if it is
+        still being generated. A question generated for another section or context is discarded.
+
+        Args:
+            section_id: ID of the section that is asked next
+            organization: Current organization
+            audience: Current audience
+
+        Returns:
+            The question or None if it has to be generated now
+        """
+        with self._speculation_lock:
+            speculation = self._speculation
+            if speculation is None:
+                SPECULATIVE_QUESTIONS.inc(result="miss")
+                return None
+            if speculation["key"] != (section_id, organization, audience):
+                self._discard_speculation()
+                SPECULATIVE_QUESTIONS.inc(result="miss")
+                return None
+            self._speculation = None
+
+        future = speculation["future"]
+        result = "hit" if future.done() else "waited"
+        try:
+            question = wait_future(future, self.speculation_timeout)
+        except Exception as e:
+            logger.warning(f"Speculative question for section {section_id} failed: {e}")
+            future.cancel()
+            SPECULATIVE_QUESTIONS.inc(result="failed")
+            return None
+
+        if not question:
+            SPECULATIVE_QUESTIONS.inc(result="failed")
+            return None
+        SPECULATIVE_QUESTIONS.inc(result=result)
+        return question
+
+    def close(self) -> None:
+        """Releases work done for the dialog in the background, e.g. when its session is reset or evicted."""
+        with self._speculation_lock:
+            self._discard_speculation()
+
+    def _discard_speculation(self) -> None:
+        """Drops the speculative question; must be called with the speculation lock held."""
+        if self._speculation is not None:
+            self._speculation["cancelled"].set()
+            self._speculation["future"].cancel()
+            SPECULATIVE_QUESTIONS.inc(result="discarded")
+            logger.info(f"Discarded speculative question of section {self._speculation['key'][0]}")
+            self._speculation = None
+
+    @traced("dialog.generate_retrieval_queries",
+            attributes=lambda self, section_title, section_id: {"section_id": section_id},
+            result_attributes=lambda queries: {"queries": len(queries)})
     def generate_retrieval_queries(self, section_title: str, section_id: str) -> List[str]:
         """
         Generates retrieval queries for a section of the template.
@@ -306,12 +517,26 @@ class DialogManager:
             logger.error(f"Error generating retrieval queries for section '{section_id}': {e}")
             return []
 
+    @traced("dialog.process_user_response", attributes=_turn_attributes)
     def process_user_response(self, response: str) -> str:
         """
         Processes the user's response and updates the conversation state.
         """
+        return self._run_steps(self._user_response_steps(response))
+
+    @traced("dialog.process_user_response", attributes=_turn_attributes)
+    async def aprocess_user_response(self, response: str) -> str:
+        """
+        Async variant of process_user_response: LLM calls use ainvoke and independent
+        steps run concurrently, so a waiting turn does not hold a thread.
+        """
+        return await self._arun_steps(self._user_response_steps(response))
+
+    def _user_response_steps(self, response: str) -> Generator:
         # Ensure response is a string
         response = ensure_str(response)
+        self.apply_section_results()
+        self._bump_state_version()
         
         try:
             # Handle context gathering phase
@@ -350,7 +575,7 @@ class DialogManager:
                         # If no valid section can be found, move to review
                         self.conversation_state["current_step"] = "review"
                         logger.info("No valid sections found, transitioning to review")
-                        return self.get_next_question()
+                        return (yield from self._next_question_steps())
 
                 # Now that we've ensured current_section is valid, continue processing
                 current_section = ensure_str(self.conversation_state["current_section"])
@@ -366,33 +591,15 @@ class DialogManager:
                     # Save the response for the current section
                     self.conversation_state["section_responses"][current_section] = response
 
-                    try:
-                        # Generate content for this section
-                        logger.info(f"Generating content for section {current_section}")
-                        self._generate_section_content(current_section)
-                    except Exception as content_error:
-                        # Handle errors in content generation
-                        logger.error(f"Error generating content for section {current_section}: {content_error}")
-                        
-                        # Use diagnostics if available
-                        try:
-                            from modules.diagnostics import diagnose_type_error
-                            if isinstance(content_error, TypeError):
-                                context = {
-                                    "section_id": current_section,
-                                    "response": response[:100] + "..." if len(response) > 100 else response
-                                }
-                                diagnosis = diagnose_type_error(content_error, context)
-                                logger.error(f"DIAGNOSTIC INFORMATION:\n{diagnosis}")
-                        except ImportError:
-                            # Diagnostics not available
-                            pass
-                        
-                        # Store a placeholder in case of error
-                        self.conversation_state["generated_content"][current_section] = (
-                            f"Inhalt für diesen Abschnitt konnte nicht generiert werden. "
-                            f"Bitte versuchen Sie es später erneut."
-                        )
+                    if self.job_manager is not None:
+                        # Generate content in the background so the next question is returned immediately
+                        job_id = self.job_manager.submit(self.session_id, current_section,
+                                                         self._generate_section_content_job, current_section)
+                        # Persisted with the turn, so every worker knows which sections are still pending
+                        self.conversation_state.setdefault("background_sections", {})[current_section] = job_id
+                        logger.info(f"Queued content generation for section {current_section}")
+                    else:
+                        yield from self._section_content_inline_steps(current_section, response)
 
                     # Mark section as completed
                     completed_sections = ensure_list(self.conversation_state.get("completed_sections", []))
@@ -406,7 +613,7 @@ class DialogManager:
                 else:
                     # Response is not adequate, generate a follow-up question
                     try:
-                        followup = ensure_str(self.generate_followup_question(response))
+                        followup = ensure_str((yield from self._followup_question_steps(response)))
                         return followup
                     except Exception as followup_error:
                         logger.error(f"Error generating follow-up question: {followup_error}")
@@ -418,6 +625,8 @@ class DialogManager:
                 if isinstance(response, str) and any(word in response.lower() for word in ["ja", "gerne", "zeigen", "ansehen"]):
                     self.conversation_state["current_step"] = "completion"
                     try:
+                        # Sections may still be generated in the background
+                        yield ("blocking", self.wait_for_pending_sections, {})
                         summary = ensure_str(self.get_script_summary())
                         return "Hier ist der entworfene E-Learning-Kurs zur Informationssicherheit basierend auf Ihren Eingaben:\n\n" + summary
                     except Exception as summary_error:
@@ -444,7 +653,7 @@ class DialogManager:
 
             # Determine the next question
             try:
-                next_question = ensure_str(self.get_next_question())
+                next_question = ensure_str((yield from self._next_question_steps()))
                 return next_question
             except Exception as question_error:
                 logger.error(f"Error getting next question: {question_error}")
@@ -467,10 +676,9 @@ class DialogManager:
                     diagnosis = diagnose_type_error(e, context)
                     logger.error(f"DIAGNOSTIC INFORMATION:\n{diagnosis}")
                 else:
-                    # Run general diagnostics on state
-                    results = run_diagnostics(self)
+                    # Structural checks only: a failing turn must not cause further LLM calls
+                    results = run_diagnostics(self, dry_run=True)
                     if results["issues_found"]:
-                        import json
                         logger.error(f"DIAGNOSTIC RESULTS:\n{json.dumps(results, indent=2)}")
             except ImportError:
                 # Diagnostics module not available
@@ -479,7 +687,62 @@ class DialogManager:
             # Provide a user-friendly message and try to continue the conversation
             self.conversation_state["current_step"] = "template_navigation"
             return "Es tut mir leid, bei der Verarbeitung Ihrer Antwort ist ein Fehler aufgetreten. Lassen Sie uns mit einer anderen Frage fortfahren."
-    
+
+        finally:
+            # Content generated inline during the turn must not be served from an older rendering
+            self._bump_state_version()
+
+    def run_prefilled_interview(self, context_answers: Dict[str, str],
+                                section_answers: Dict[str, str]) -> List[str]:
+        """
+        Runs a complete interview from given answers without asking any questions.
+        The content of every answered section is generated on the calling thread.
+
+        Args:
+            context_answers: Answers keyed by the context question
+            section_answers: Answers keyed by template section ID
+
+        Returns:
+            IDs of the template sections without an answer
+        """
+        self._bump_state_version()
+        try:
+            for question in self.context_questions:
+                if question in context_answers:
+                    self.conversation_state["context_info"][question] = ensure_str(context_answers[question])
+
+            unknown = [section_id for section_id in section_answers
+                       if self.template_manager.get_section_by_id(section_id) is None]
+            if unknown:
+                logger.warning(f"Ignoring answers for unknown sections: {', '.join(unknown)}")
+
+            missing = []
+            completed_sections = ensure_list(self.conversation_state.get("completed_sections", []))
+            self.conversation_state["completed_sections"] = completed_sections
+            while True:
+                section = self.template_manager.get_next_section(completed_sections)
+                if section is None:
+                    break
+
+                section_id = section["id"]
+                completed_sections.append(section_id)
+                answer = ensure_str(section_answers.get(section_id, "")).strip()
+                if not answer:
+                    missing.append(section_id)
+                    continue
+
+                self.conversation_state["section_responses"][section_id] = answer
+                self._generate_section_content_inline(section_id, answer)
+
+            self.conversation_state["current_section"] = None
+            self.conversation_state["current_step"] = "completion"
+            return missing
+        finally:
+            self._bump_state_version()
+
+    @traced("dialog.is_response_adequate",
+            attributes=lambda self, response: {"response_chars": len(ensure_str(response))},
+            result_attributes=lambda adequate: {"adequate": adequate})
     def is_response_adequate(self, response: str) -> bool:
         """
         Checks if the user's response is sufficiently detailed.
@@ -521,6 +784,9 @@ class DialogManager:
         Returns:
             Follow-up question as a string
         """
+        return self._run_steps(self._followup_question_steps(response))
+
+    def _followup_question_steps(self, response: str) -> Generator:
         current_section_id = self.conversation_state["current_section"]
         
         if not current_section_id:
@@ -551,134 +817,375 @@ class DialogManager:
         """
 
         try:
-            followup_question = self.llm_manager.llm(followup_prompt)
+            followup_question = yield ("llm", "generate_text", {
+                "prompt": followup_prompt,
+                "callbacks": self._stream_callbacks("followup", current_section_id)
+            })
             return followup_question
         except Exception as e:
             logger.error(f"Error generating followup question: {e}")
             return "Vielen Dank für Ihre Antwort. Könnten Sie vielleicht noch etwas konkreter werden? Beispiele aus Ihrem Arbeitsalltag wären besonders hilfreich."
 
-    def _generate_section_content(self, section_id: str) -> None:
+    def _generate_section_content_inline(self, section_id: str, response: str) -> None:
+        """
+        Generates the content for a section on the calling thread.
+
+        Args:
+            section_id: ID of the section
+            response: The user's response for the section
+        """
+        self._run_steps(self._section_content_inline_steps(section_id, response))
+
+    def _section_content_inline_steps(self, section_id: str, response: str) -> Generator:
+        try:
+            # Generate content for this section
+            logger.info(f"Generating content for section {section_id}")
+            with log_context(section_id=section_id), span("dialog.section_content", section_id=section_id):
+                yield from self._section_content_steps(section_id)
+        except Exception as content_error:
+            # Handle errors in content generation
+            logger.error(f"Error generating content for section {section_id}: {content_error}")
+
+            # Use diagnostics if available
+            try:
+                from modules.diagnostics import diagnose_type_error
+                if isinstance(content_error, TypeError):
+                    context = {
+                        "section_id": section_id,
+                        "response": response[:100] + "..." if len(response) > 100 else response
+                    }
+                    diagnosis = diagnose_type_error(content_error, context)
+                    logger.error(f"DIAGNOSTIC INFORMATION:\n{diagnosis}")
+            except ImportError:
+                # Diagnostics not available
+                pass
+
+            # Store a placeholder in case of error
+            FALLBACKS.inc(kind="placeholder_content")
+            self.conversation_state["generated_content"][section_id] = (
+                f"Inhalt für diesen Abschnitt konnte nicht generiert werden. "
+                f"Bitte versuchen Sie es später erneut."
+            )
+
+    def wait_for_pending_sections(self, timeout: float = None) -> bool:
+        """
+        Waits until the content of all sections generated in the background is available.
+
+        Jobs started by this process are awaited directly. A job may also run in another
+        worker process sharing the session store; its results are polled from the store.
+
+        Args:
+            timeout: Maximum number of seconds to wait (defaults to section_job_timeout)
+
+        Returns:
+            True if no sections are pending anymore
+        """
+        if timeout is None:
+            timeout = self.section_job_timeout
+        deadline = time.time() + timeout
+
+        if self.job_manager is not None:
+            self.job_manager.wait_for_session(self.session_id, timeout=timeout)
+        self.apply_section_results()
+
+        pending = self._pending_background_sections()
+        while pending and self.section_results_loader is not None and time.time() < deadline:
+            self._apply_stored_section_results(pending)
+            pending = self._pending_background_sections()
+            if pending:
+                time.sleep(max(0.0, min(self.section_poll_interval, deadline - time.time())))
+
+        if pending:
+            logger.warning(f"Background content generation for session {self.session_id} did not finish "
+                           f"within {timeout}s (pending: {', '.join(pending)})")
+            return False
+        return True
+
+    def _pending_background_sections(self) -> List[str]:
+        """Sections handed to a background job whose content is not in the state yet."""
+        generated = self.conversation_state.get("generated_content", {})
+        return [section_id for section_id in self.conversation_state.get("background_sections", {})
+                if section_id not in generated]
+
+    def _apply_stored_section_results(self, section_ids: List[str]) -> None:
+        """Takes the results of the given sections from the session store, if they are there."""
+        try:
+            stored = self.section_results_loader() or {}
+        except Exception as e:
+            logger.warning(f"Error loading section results of session {self.session_id}: {e}")
+            return
+
+        applied = False
+        for key in MERGED_STATE_KEYS:
+            values = {section_id: value for section_id, value in (stored.get(key) or {}).items()
+                      if section_id in section_ids}
+            if values:
+                self.conversation_state.setdefault(key, {}).update(values)
+                applied = True
+        if applied:
+            self._bump_state_version()
+
+    def _emit(self, event: str, payload: Dict[str, Any]) -> None:
+        """Sends an event for this session to the event handler, if one is set."""
+        if self.event_handler is None:
+            return
+        try:
+            self.event_handler(event, dict(payload, session_id=self.session_id))
+        except Exception as e:
+            logger.warning(f"Error emitting event {event}: {e}")
+
+    def _stream_callbacks(self, stream: str, section_id: str = None) -> Optional[List[Any]]:
+        """
+        Creates callback handlers that forward the tokens of one LLM call as events.
+
+        Args:
+            stream: Kind of output ("question", "followup" or "section_content")
+            section_id: Section the output belongs to
+
+        Returns:
+            List with a TokenStreamHandler or None if streaming is disabled
+        """
+        if not self.stream_tokens or self.event_handler is None:
+            return None
+
+        from modules.llm_manager import TokenStreamHandler
+        payload = {"stream": stream, "section_id": section_id}
+        return [TokenStreamHandler(
+            on_token=lambda token: self._emit("llm_token", dict(payload, token=token)),
+            on_done=lambda text: self._emit("llm_done", dict(payload, text=text))
+        )]
+
+    def _report_progress(self, progress_callback, stage: str) -> None:
+        """Forwards the current generation stage to an optional progress callback."""
+        if progress_callback is None:
+            return
+        try:
+            progress_callback(stage)
+        except Exception as e:
+            logger.warning(f"Error reporting progress for stage {stage}: {e}")
+
+    def _generate_section_content_job(self, section_id: str, progress_callback=None) -> None:
+        """
+        Entry point of background jobs: their LLM calls wait for a free slot
+        instead of being rejected when the LLM queue is full.
+        """
+        results = {key: {} for key in MERGED_STATE_KEYS}
+        try:
+            with self.llm_manager.background_calls(), log_context(session_id=self.session_id):
+                self._generate_section_content(section_id, progress_callback=progress_callback, results=results)
+        finally:
+            self._publish_section_results(results)
+
+    def _publish_section_results(self, results: Dict[str, Dict[str, Any]]) -> None:
+        """Hands the results of a background job to the request thread, see apply_section_results()."""
+        with self._results_lock:
+            for key in MERGED_STATE_KEYS:
+                self._pending_results.setdefault(key, {}).update(results.get(key) or {})
+                self._job_results[key].update(results.get(key) or {})
+
+    def apply_section_results(self) -> bool:
+        """
+        Writes the section results of finished background jobs into the conversation state.
+        Called by the thread that owns the state (a turn, a rendering or the serialization
+        of the session), so background jobs never change the state concurrently.
+
+        Returns:
+            True if results were applied
+        """
+        with self._results_lock:
+            pending, self._pending_results = self._pending_results, {}
+        if not pending:
+            return False
+
+        for key, values in pending.items():
+            self.conversation_state.setdefault(key, {}).update(values)
+        self._bump_state_version()
+        return True
+
+    def get_job_results(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns a copy of all section results produced by background jobs of this dialog.
+
+        Returns:
+            Dictionary with generated_content and content_quality_checks per section
+        """
+        with self._results_lock:
+            return {key: dict(values) for key, values in self._job_results.items()}
+
+    def _generate_section_content(self, section_id: str, progress_callback=None,
+                                  results: Dict[str, Dict[str, Any]] = None) -> None:
         """
         Generates the content for a section and performs quality checks.
 
         Args:
             section_id: ID of the section
+            progress_callback: Optional callable that receives the name of each stage
+            results: Dictionary receiving generated_content and content_quality_checks
+                (defaults to the conversation state)
         """
+        with log_context(section_id=section_id), span("dialog.section_content", section_id=section_id):
+            self._run_steps(self._section_content_steps(section_id, progress_callback, results))
+
+    def _section_content_steps(self, section_id: str, progress_callback=None,
+                               results: Dict[str, Dict[str, Any]] = None) -> Generator:
         logger.info(f"Starting content generation for section: {section_id}")
+        stage_timer = StageTimer(SECTION_STAGE_DURATION)
+        if results is None:
+            results = self.conversation_state
         
         try:
             # Get the user's response
             user_response = self.conversation_state["section_responses"].get(section_id, "")
             if not user_response:
                 logger.error(f"No user response found for section {section_id}")
-                self.conversation_state["generated_content"][section_id] = f"Inhalt für {section_id} konnte nicht generiert werden. Keine Antwort vorhanden."
+                FALLBACKS.inc(kind="placeholder_content")
+                results["generated_content"][section_id] = f"Inhalt für {section_id} konnte nicht generiert werden. Keine Antwort vorhanden."
                 return
                     
             # Get the section details from the template
             section = self.template_manager.get_section_by_id(section_id)
             if not section:
                 logger.error(f"Section {section_id} not found in template")
-                self.conversation_state["generated_content"][section_id] = f"Inhalt für {section_id} konnte nicht generiert werden. Abschnitt nicht gefunden."
+                FALLBACKS.inc(kind="placeholder_content")
+                results["generated_content"][section_id] = f"Inhalt für {section_id} konnte nicht generiert werden. Abschnitt nicht gefunden."
                 return
 
-            # STEP 1: Extract key information for retrieval
-            try:
-                # Get key concepts from user response
-                key_concepts = ensure_list(
-                    self.llm_manager.extract_key_information(
-                        section_type=section.get("type", "generic"),
-                        user_response=user_response
-                    ),
-                    str  # Ensure all items are strings
-                )
-                logger.info(f"Extracted {len(key_concepts)} key concepts for section {section_id}")
-                
-            except Exception as e:
-                logger.error(f"Error extracting key information: {e}")
-                key_concepts = []  # Use empty list as fallback
-
-            # STEP 2: Generate retrieval queries based on key concepts
-            retrieval_queries = []
+            # Get organization, audience and duration info
+            organization = self.conversation_state["context_info"].get(
+                "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", "")
+            audience = self.conversation_state["context_info"].get(
+                "Welche Mitarbeitergruppen sollen geschult werden?", "")
+            duration = self.conversation_state["context_info"].get(
+                "Wie lang sollte der E-Learning-Kurs maximal dauern?", "")
+
+            # STEP 0: Look up verified content of a similar answer to the same section
+            cached = None
+            cache_key = {
+                "section_id": section_id,
+                "organization": ensure_str(organization),
+                "audience": ensure_str(audience),
+                "user_response": user_response
+            }
+            if self.content_cache is not None and not self.llm_manager.cache_bypassed():
+                self._report_progress(progress_callback, "content_cache")
+                stage_timer.start("content_cache")
+                cached = yield ("blocking", self.content_cache.lookup, cache_key)
+                if cached:
+                    set_span_attributes(content_cache=cached["mode"], similarity=round(cached["similarity"], 4))
+
+            if cached and cached["mode"] == "reuse":
+                # Near-identical answer: the content already passed the quality check
+                advanced_check = ensure_dict(self.llm_manager.advanced_hallucination_detection(cached["content"]))
+                stage_timer.stop()
+                results["content_quality_checks"][section_id] = {
+                    "has_issues": False,
+                    "confidence_score": advanced_check.get("confidence_score", 0.5),
+                    "suspicious_sections": advanced_check.get("suspicious_sections", []),
+                    "reused_similarity": cached["similarity"]
+                }
+                results["generated_content"][section_id] = cached["content"]
+                logger.info(f"Reused cached content for section {section_id}")
+                return
+            draft = cached["content"] if cached else None
+            # The single structured call extracts the key information itself
+            single_call = self.structured_generation and draft is None
+
+            # STEP 1: Extract key information and retrieve the section-specific documents.
+            # Both only depend on the user's response and the section, so they run concurrently.
+            # A draft is only checked against the context, so its key concepts are not needed.
+            self._report_progress(progress_callback, "key_information")
+            stage_timer.start("key_information")
+            section_filter = {"section_type": section.get("type", "generic")}
             try:
-                # Build queries from key concepts
-                for concept in key_concepts:
-                    concept = ensure_str(concept)
-                    if concept.strip():
-                        retrieval_queries.append(f"{concept} Informationssicherheit")
-                
-                # Add section-specific queries
-                additional_queries = ensure_list(
+                section_queries = ensure_list(
                     self.generate_retrieval_queries(section["title"], section_id),
                     str  # Ensure all queries are strings
                 )
-                
-                # Add the additional queries
-                retrieval_queries.extend(additional_queries)
-                
-                logger.info(f"Generated {len(retrieval_queries)} total retrieval queries")
-                
             except Exception as e:
                 logger.error(f"Error generating retrieval queries: {e}")
-                # If we have no queries at this point, add a basic fallback query
-                if not retrieval_queries:
-                    retrieval_queries = [f"Informationssicherheit {section_id}"]
+                section_queries = []
+            if single_call:
+                # Without extracted key concepts the response itself serves as retrieval query
+                section_queries = section_queries + [user_response]
+
+            section_request = ("retrieve", "retrieve_with_multiple_queries", {
+                "queries": section_queries,
+                "filter": section_filter,
+                "top_k": 5
+            })
+            if draft is None and not single_call:
+                key_information, section_docs = yield ("gather", [
+                    ("llm", "extract_key_information", {
+                        "section_type": section.get("type", "generic"),
+                        "user_response": user_response
+                    }),
+                    section_request
+                ], None)
+            else:
+                key_information = []
+                section_docs = (yield ("gather", [section_request], None))[0]
 
-            # STEP 3: Retrieve relevant documents
-            try:
-                # Get relevant documents using the queries
-                retrieved_docs = ensure_list(
-                    self.vector_store_manager.retrieve_with_multiple_queries(
-                        queries=retrieval_queries,
-                        filter={"section_type": section.get("type", "generic")},
-                        top_k=5
-                    )
-                )
-                
-                logger.info(f"Retrieved {len(retrieved_docs)} documents for context")
-                
-            except Exception as e:
-                logger.error(f"Error retrieving documents: {e}")
-                retrieved_docs = []  # Use empty list as fallback
+            if isinstance(section_docs, Exception):
+                logger.error(f"Error retrieving documents: {section_docs}")
+                section_docs = []
 
-            # STEP 4: Extract context from retrieved documents
-            context_text = ""
-            try:
-                # Join document contents into a single context string
-                if retrieved_docs:
-                    context_text = "\n\n".join([
-                        doc.page_content for doc in retrieved_docs 
-                        if hasattr(doc, 'page_content') and isinstance(doc.page_content, str)
-                    ])
-                    
-                else:
-                    # If no documents were retrieved, use a minimal context
-                    context_text = f"Bitte erstellen Sie Inhalte zum Thema {section['title']} für Informationssicherheitsschulungen."
-                    
-            except Exception as e:
-                logger.error(f"Error creating context text: {e}")
-                # Fallback to minimal context
-                context_text = f"Informationssicherheit Schulung für {section['title']}"
+            # STEP 2-4: Retrieve the documents for the key concepts and build the context
+            self._report_progress(progress_callback, "retrieval")
+            stage_timer.start("retrieval")
+            retrieved_docs, context_text = yield from self._section_context_steps(
+                section, section_id, key_information, section_queries, section_docs, section_filter)
+
+            set_span_attributes(documents=len(retrieved_docs), context_chars=len(context_text))
 
             # STEP 5: Generate content using LLM
+            self._report_progress(progress_callback, "content_generation")
+            stage_timer.start("content_generation")
+            structured = None
             try:
-                # Get organization, audience and duration info
-                organization = self.conversation_state["context_info"].get(
-                    "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", "")
-                audience = self.conversation_state["context_info"].get(
-                    "Welche Mitarbeitergruppen sollen geschult werden?", "")
-                duration = self.conversation_state["context_info"].get(
-                    "Wie lang sollte der E-Learning-Kurs maximal dauern?", "")
-
-                # Generate content with the LLM
-                content = self.llm_manager.generate_content(
-                    section_title=section["title"],
-                    section_description=section.get("description", ""),
-                    user_response=user_response,
-                    organization=organization,
-                    audience=audience,
-                    duration=duration,
-                    context_text=context_text
-                )
+                if single_call:
+                    # Key information, content and self-check in one JSON response
+                    structured = yield ("llm", "generate_section_structured", {
+                        "section_title": section["title"],
+                        "section_description": section.get("description", ""),
+                        "user_response": user_response,
+                        "organization": organization,
+                        "audience": audience,
+                        "duration": duration,
+                        "context_text": context_text
+                    })
+
+                if draft is not None:
+                    # Similar answer: its verified content only has to be checked against this one
+                    content = draft
+                    logger.info(f"Using cached content as draft for section {section_id}")
+                elif structured is not None:
+                    content = structured["content"]
+                    set_span_attributes(structured=True)
+                    logger.info(f"Generated content for section {section_id} with a single structured call")
+                else:
+                    if single_call:
+                        # Invalid structured response: run the complete pipeline with several calls,
+                        # including the key information the single call would have extracted
+                        FALLBACKS.inc(kind="structured_multi_call")
+                        logger.info(f"Falling back to the multi-call generation for section {section_id}")
+                        key_information = (yield ("gather", [("llm", "extract_key_information", {
+                            "section_type": section.get("type", "generic"),
+                            "user_response": user_response
+                        })], None))[0]
+                        retrieved_docs, context_text = yield from self._section_context_steps(
+                            section, section_id, key_information, section_queries, section_docs, section_filter)
+
+                    # Generate content with the LLM
+                    content = yield ("llm", "generate_content", {
+                        "section_title": section["title"],
+                        "section_description": section.get("description", ""),
+                        "user_response": user_response,
+                        "organization": organization,
+                        "audience": audience,
+                        "duration": duration,
+                        "context_text": context_text,
+                        "callbacks": self._stream_callbacks("section_content", section_id)
+                    })
                 
                 # Validate content is a string
                 if not isinstance(content, str):
@@ -691,12 +1198,27 @@ class DialogManager:
             except Exception as e:
                 logger.error(f"Error generating content: {e}")
                 # Fallback content
+                FALLBACKS.inc(kind="placeholder_content")
                 content = f"Für diesen Abschnitt ({section['title']}) konnte kein Inhalt generiert werden. Bitte versuchen Sie es später erneut."
 
             # STEP 6: Perform quality checks on generated content
+            verified = False
+            if structured is None:
+                self._report_progress(progress_callback, "quality_check")
+                stage_timer.start("quality_check")
             try:
+                if structured is not None:
+                    # The structured response already contains the checked and corrected content
+                    advanced_check = ensure_dict(self.llm_manager.advanced_hallucination_detection(content))
+                    results["content_quality_checks"][section_id] = {
+                        "has_issues": structured["verdict"] == "revised",
+                        "confidence_score": advanced_check.get("confidence_score", 0.5),
+                        "suspicious_sections": advanced_check.get("suspicious_sections", []) + structured["issues"]
+                    }
+                    verified = structured["verdict"] == "ok" and not self.llm_manager.is_fallback
+
                 # Check for hallucinations if we have content
-                if content:
+                elif content:
                     # Perform advanced hallucination check
                     advanced_check = self.llm_manager.advanced_hallucination_detection(content)
                     
@@ -709,11 +1231,12 @@ class DialogManager:
                         }
                     
                     # Perform standard hallucination check
-                    has_issues, verified_content = self.llm_manager.check_hallucinations(
-                        content=content,
-                        user_input=user_response,
-                        context_text=context_text
-                    )
+                    has_issues, verified_content = yield ("llm", "check_hallucinations", {
+                        "content": content,
+                        "user_input": user_response,
+                        "context_text": context_text,
+                        "callbacks": self._stream_callbacks("section_content", section_id)
+                    })
                     
                     # Verify output is a string
                     if not isinstance(verified_content, str):
@@ -721,7 +1244,7 @@ class DialogManager:
                         verified_content = content  # Fallback to original content
                     
                     # Save the result of the quality check
-                    self.conversation_state["content_quality_checks"][section_id] = {
+                    results["content_quality_checks"][section_id] = {
                         "has_issues": has_issues,
                         "confidence_score": advanced_check.get("confidence_score", 0.5),
                         "suspicious_sections": advanced_check.get("suspicious_sections", [])
@@ -729,10 +1252,13 @@ class DialogManager:
                     
                     # Use the verified content
                     content = verified_content
+
+                    # Only content that passed unchanged counts as verified (never answers of the fallback LLM)
+                    verified = not has_issues and not self.llm_manager.is_fallback
                     
                 else:
                     # No content to check
-                    self.conversation_state["content_quality_checks"][section_id] = {
+                    results["content_quality_checks"][section_id] = {
                         "has_issues": True,
                         "confidence_score": 0.0,
                         "suspicious_sections": ["No content generated"]
@@ -741,15 +1267,20 @@ class DialogManager:
             except Exception as e:
                 logger.error(f"Error during quality checks: {e}")
                 # Don't let quality check failure prevent content delivery
-                self.conversation_state["content_quality_checks"][section_id] = {
+                results["content_quality_checks"][section_id] = {
                     "has_issues": True,
                     "confidence_score": 0.0,
                     "suspicious_sections": [f"Error during quality check: {str(e)}"]
                 }
 
             # STEP 7: Save the generated content
-            self.conversation_state["generated_content"][section_id] = content
+            stage_timer.stop()
+            results["generated_content"][section_id] = content
             logger.info(f"Content generation completed for section {section_id}")
+
+            # Offer the verified content to similar answers of other sessions
+            if verified and self.content_cache is not None:
+                yield ("blocking", self.content_cache.add, dict(cache_key, content=content))
             
         except Exception as e:
             # Master exception handler to ensure the method never crashes
@@ -763,25 +1294,291 @@ class DialogManager:
             }
             
             if isinstance(e, TypeError):
+                from modules.diagnostics import diagnose_type_error
                 diagnosis = diagnose_type_error(e, context)
                 logger.error(f"DIAGNOSTIC INFORMATION:\n{diagnosis}")
             
             # Set a fallback content
-            self.conversation_state["generated_content"][section_id] = f"Für diesen Abschnitt konnte kein Inhalt generiert werden. Fehler: {str(e)}"
+            stage_timer.stop()
+            FALLBACKS.inc(kind="placeholder_content")
+            results["generated_content"][section_id] = f"Für diesen Abschnitt konnte kein Inhalt generiert werden. Fehler: {str(e)}"
             # Also save a record of the error in the quality checks
-            self.conversation_state["content_quality_checks"][section_id] = {
+            results["content_quality_checks"][section_id] = {
                 "has_issues": True,
                 "confidence_score": 0.0,
                 "suspicious_sections": [f"Fehler bei der Inhaltsgenerierung: {str(e)}"]
             }
 
+    def _section_context_steps(self, section: Dict[str, Any], section_id: str, key_information: Any,
+                               section_queries: List[str], section_docs: List[Document],
+                               section_filter: Dict[str, Any]) -> Generator:
+        """Retrieves the documents for the key concepts and builds the context text of a section."""
+        if isinstance(key_information, Exception):
+            logger.error(f"Error extracting key information: {key_information}")
+            key_concepts = []  # Use empty list as fallback
+        else:
+            # Get key concepts from user response
+            key_concepts = ensure_list(key_information, str)  # Ensure all items are strings
+            logger.info(f"Extracted {len(key_concepts)} key concepts for section {section_id}")
+
+        # STEP 2: Generate retrieval queries based on key concepts
+        retrieval_queries = []
+        try:
+            # Build queries from key concepts
+            for concept in key_concepts:
+                concept = ensure_str(concept)
+                if concept.strip():
+                    retrieval_queries.append(f"{concept} Informationssicherheit")
+            
+            logger.info(f"Generated {len(retrieval_queries) + len(section_queries)} total retrieval queries")
+            
+        except Exception as e:
+            logger.error(f"Error generating retrieval queries: {e}")
+
+        # If we have no queries at this point, add a basic fallback query
+        if not retrieval_queries and not section_queries:
+            retrieval_queries = [f"Informationssicherheit {section_id}"]
+
+        # STEP 3: Retrieve the documents for the key concepts
+        try:
+            concept_docs = []
+            if retrieval_queries:
+                concept_docs = ensure_list((yield ("retrieve", "retrieve_with_multiple_queries", {
+                    "queries": retrieval_queries,
+                    "filter": section_filter,
+                    "top_k": 5
+                })))
+
+            # Concept documents first, as if all queries had been run together
+            retrieved_docs = self.vector_store_manager.merge_unique_documents(
+                [concept_docs, ensure_list(section_docs)])
+            
+            logger.info(f"Retrieved {len(retrieved_docs)} documents for context")
+            
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {e}")
+            retrieved_docs = ensure_list(section_docs)  # Use the section documents as fallback
+
+        # STEP 4: Extract context from retrieved documents
+        context_text = ""
+        try:
+            # Join document contents into a single context string
+            if retrieved_docs:
+                context_text = "\n\n".join([
+                    doc.page_content for doc in retrieved_docs 
+                    if hasattr(doc, 'page_content') and isinstance(doc.page_content, str)
+                ])
+                
+            else:
+                # If no documents were retrieved, use a minimal context
+                context_text = f"Bitte erstellen Sie Inhalte zum Thema {section['title']} für Informationssicherheitsschulungen."
+                
+        except Exception as e:
+            logger.error(f"Error creating context text: {e}")
+            # Fallback to minimal context
+            context_text = f"Informationssicherheit Schulung für {section['title']}"
+
+        return retrieved_docs, context_text
+
+    def _perform(self, request: Tuple[str, Any, Any]) -> Any:
+        """
+        Executes one request of a step generator synchronously.
+
+        Args:
+            request: ("llm", LLMManager method, kwargs), ("retrieve", VectorStoreManager
+                method, kwargs), ("blocking", callable, kwargs) or ("gather", requests, None)
+
+        Returns:
+            Result of the request; for "gather" a list with results or exceptions
+        """
+        kind, target, kwargs = request
+        if kind == "llm":
+            return getattr(self.llm_manager, target)(**kwargs)
+        if kind == "retrieve":
+            return getattr(self.vector_store_manager, target)(**kwargs)
+        if kind == "blocking":
+            # Keeps waits such as wait_for_pending_sections off the eventlet hub
+            return run_blocking(target, **kwargs)
+        if kind == "gather":
+            results = []
+            for sub_request in target:
+                try:
+                    results.append(self._perform(sub_request))
+                except Exception as e:
+                    results.append(e)
+            return results
+        raise ValueError(f"Unknown request: {kind}")
+
+    async def _aperform(self, request: Tuple[str, Any, Any]) -> Any:
+        """
+        Executes one request of a step generator with the async variants
+        (a<method>) and runs the requests of "gather" concurrently.
+        """
+        kind, target, kwargs = request
+        if kind == "llm":
+            return await getattr(self.llm_manager, "a" + target)(**kwargs)
+        if kind == "retrieve":
+            return await getattr(self.vector_store_manager, "a" + target)(**kwargs)
+        if kind == "blocking":
+            return await asyncio.to_thread(target, **kwargs)
+        if kind == "gather":
+            return list(await asyncio.gather(*(self._aperform(sub_request) for sub_request in target),
+                                             return_exceptions=True))
+        raise ValueError(f"Unknown request: {kind}")
+
+    def _run_steps(self, steps: Generator) -> Any:
+        """Runs a step generator (the _*_steps methods) synchronously."""
+        return run_steps(steps, self._perform)
+
+    async def _arun_steps(self, steps: Generator) -> Any:
+        """Runs a step generator with ainvoke and concurrent independent steps."""
+        return await arun_steps(steps, self._aperform)
+
+    def _bump_state_version(self) -> None:
+        """Marks the conversation state as changed, so cached renderings are rebuilt."""
+        self.conversation_state["state_version"] = ensure_int(self.conversation_state.get("state_version", 0)) + 1
+
+    def estimate_memory(self) -> Dict[str, int]:
+        """
+        Approximates the memory held by the state of this dialog.
+
+        Returns:
+            Bytes held by the conversation state and the render cache
+        """
+        with self._render_lock:
+            render_cache = dict(self._render_cache)
+        return {
+            "conversation_state": deep_sizeof(self.conversation_state),
+            "render_cache": deep_sizeof(render_cache)
+        }
+
+    def invalidate_render_cache(self) -> None:
+        """Drops all cached renderings, e.g. after the state was replaced."""
+        with self._render_lock:
+            self._render_cache = {}
+            self._render_cache_version = None
+
+    def _cached_render(self, key: str, builder) -> Any:
+        """
+        Returns a rendering from the cache or builds and caches it for the current state version.
+        Applies finished section jobs first, so the caller must own the state (hold the session lock).
+
+        Args:
+            key: Name of the rendering
+            builder: Callable building the rendering
+
+        Returns:
+            The cached or newly built rendering
+        """
+        self.apply_section_results()
+        version = self.conversation_state.get("state_version", 0)
+        with self._render_lock:
+            if self._render_cache_version != version:
+                self._render_cache = {}
+                self._render_cache_version = version
+            elif key in self._render_cache:
+                RENDER_CACHE.inc(result="hit")
+                return self._render_cache[key]
+
+        RENDER_CACHE.inc(result="miss")
+        with span("dialog.render", format=key):
+            value = builder()
+
+        with self._render_lock:
+            if self._render_cache_version == version:
+                self._render_cache[key] = value
+        return value
+
     def generate_script(self) -> Dict[str, Any]:
         """
-        Generates the final e-learning course.
+        Generates the final e-learning course. The result is cached per state
+        version and must not be modified by the caller.
 
         Returns:
             Course as a dictionary
         """
+        return self._cached_render("script", self._build_script)
+
+    def get_script_summary(self) -> str:
+        """
+        Creates a summary of the generated course in the format of the example script.
+
+        Returns:
+            Summary as a string
+        """
+        return self._cached_render("txt", self._render_script_summary)
+
+    def generate_html_script(self) -> str:
+        """
+        Generates an HTML version of the script in the format of the example script.
+
+        Returns:
+            HTML-formatted script
+        """
+        return self._cached_render("html", self._render_html_script)
+
+    def generate_json_script(self) -> str:
+        """
+        Generates a JSON version of the script.
+
+        Returns:
+            JSON-formatted script
+        """
+        return self._cached_render(
+            "json", lambda: json.dumps(self.generate_script(), ensure_ascii=False, indent=2))
+
+    def save_script(self, output_path: str, format: str = "txt") -> str:
+        """
+        Writes the script to a file.
+
+        Args:
+            output_path: Path of the output file
+            format: Format of the output ("txt", "json", or "html")
+
+        Returns:
+            Path to the saved file
+        """
+        renderers = {
+            "txt": self.get_script_summary,
+            "html": self.generate_html_script,
+            "json": self.generate_json_script
+        }
+        if format not in renderers:
+            raise ValueError(f"Unsupported format: {format}")
+
+        version = self.conversation_state.get("state_version", 0)
+        content = renderers[format]()
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+        # Remember the file so that it is not written again for the same state
+        with self._render_lock:
+            if self._render_cache_version == version:
+                self._render_cache[f"file:{format}"] = output_path
+
+        logger.info(f"Script saved to {output_path}")
+        return output_path
+
+    def get_saved_script_path(self, format: str = "txt") -> Optional[str]:
+        """
+        Returns the file this state was already saved to in the given format.
+
+        Args:
+            format: Format of the output
+
+        Returns:
+            Path to the saved file or None if the current state was not saved yet
+        """
+        self.apply_section_results()
+        version = self.conversation_state.get("state_version", 0)
+        with self._render_lock:
+            if self._render_cache_version != version:
+                return None
+            path = self._render_cache.get(f"file:{format}")
+        return path if path and os.path.exists(path) else None
+
+    def _build_script(self) -> Dict[str, Any]:
+        """Assembles the course from the generated contents."""
         # Create a script from the generated contents
         try:
             script = self.template_manager.create_script_from_responses(
@@ -804,13 +1601,8 @@ class DialogManager:
                 ]
             }
 
-    def get_script_summary(self) -> str:
-        """
-        Creates a summary of the generated course in the format of the example script.
-
-        Returns:
-            Summary as a string
-        """
+    def _render_script_summary(self) -> str:
+        """Renders the course as text."""
         try:
             # Generate the course
             script = self.generate_script()
@@ -850,13 +1642,8 @@ class DialogManager:
             logger.error(f"Error creating script summary: {e}")
             return f"Bei der Erstellung der Zusammenfassung ist ein Fehler aufgetreten: {str(e)}"
 
-    def generate_html_script(self) -> str:
-        """
-        Generates an HTML version of the script in the format of the example script.
-
-        Returns:
-            HTML-formatted script
-        """
+    def _render_html_script(self) -> str:
+        """Renders the course as HTML."""
         try:
             script = self.generate_script()
             organization = self.conversation_state["context_info"].get(
@@ -977,14 +1764,18 @@ class DialogManager:
             logger.error(f"Fehler in safe_llm_call: {e}")
             return f"Es ist ein Fehler bei der Generierung der Antwort aufgetreten: {str(e)}"
         
-    def diagnose_state(self):
+    def diagnose_state(self, dry_run: bool = True):
         """
         Run diagnostics on the current conversation state.
         Useful for troubleshooting.
+
+        Args:
+            dry_run: If False, also exercises get_next_question(), which may
+                     change the state and call the LLM
         """
         try:
             from modules.diagnostics import run_diagnostics
-            results = run_diagnostics(self)
+            results = run_diagnostics(self, dry_run=dry_run)
             
             if results["issues_found"]:
                 logger.warning(f"DIAGNOSTIC RESULTS:\n{json.dumps(results, indent=2)}")
@@ -1,19 +1,32 @@
 import os
 import json
+import time
+import asyncio
+import atexit
 import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 
 # Import the component modules
 from modules.document_processor import DocumentProcessor
-from modules.vector_store_manager import VectorStoreManager
 from modules.llm_manager import LLMManager
 from modules.template_manager import TemplateManager
 from modules.dialog_manager import DialogManager
+from modules.session_manager import SessionManager
+from modules.session_store import create_session_store
+from modules.job_manager import JobManager
+from modules.llm_health import LLMHealthMonitor
+from modules.metrics import SCRIPTS_GENERATED, read_process_rss
+from modules.http_cache import precompress_file
+from modules.async_runner import AsyncRunner
+from modules.log_pipeline import configure_logging, log_context
+from modules.tracing import configure_tracing
+from modules.llm_cache import LLMResponseCache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class ELearningCourseGenerator:
@@ -31,6 +44,23 @@ class ELearningCourseGenerator:
         # Load the configuration
         self.config = self.load_config(config_path)
 
+        # Log records are written by a listener thread instead of the logging caller
+        configure_logging(
+            level=self.config["log_level"],
+            json_format=os.environ.get("LOG_FORMAT", self.config["log_format"]) == "json",
+            sampling=self.config["log_sampling"],
+            log_file=self.config["log_file"]
+        )
+
+        # Spans of the dialog pipeline, written to a rotating JSONL file
+        if os.environ.get("TRACING_ENABLED", str(self.config["tracing_enabled"])).lower() in ("1", "true"):
+            configure_tracing(
+                trace_file=self.config["trace_file"],
+                max_bytes=self.config["trace_max_bytes"],
+                backup_count=self.config["trace_backup_count"],
+                slow_trace_threshold=self.config["slow_trace_threshold"]
+            )
+
         # Create required directories
         self.create_directories()
 
@@ -41,23 +71,105 @@ class ELearningCourseGenerator:
             chunk_overlap=self.config["chunk_overlap"]
         )
 
-        self.vector_store_manager = VectorStoreManager(
-            persist_directory=self.config["vectorstore_dir"]
-        )
+        # Loading the embedding model is expensive, so the VectorStoreManager is created by setup()
+        self.vector_store_manager = None
+
+        # Semantic cache of verified section content, created with the embedding model
+        self.content_cache = None
+
+        # Ollama servers the LLM calls are spread over
+        endpoints = os.environ.get("OLLAMA_ENDPOINTS")
+        endpoints = endpoints.split(",") if endpoints else self.config["ollama_endpoints"]
+        endpoints = [url.strip() for url in endpoints or [] if url and url.strip()] or [self.config["ollama_base_url"]]
+
+        # Admission control: as many parallel requests as the Ollama servers serve (OLLAMA_NUM_PARALLEL each)
+        max_concurrency = self.config["llm_max_concurrency"]
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("OLLAMA_NUM_PARALLEL", 1)) * len(endpoints)
+
+        # Identical prompts (repeat runs, batch regeneration) are answered from the cache
+        response_cache = None
+        if self.config["llm_cache_enabled"]:
+            response_cache = LLMResponseCache(
+                db_path=self.config["llm_cache_path"],
+                memory_entries=self.config["llm_cache_memory_entries"],
+                max_bytes=int(self.config["llm_cache_max_mb"] * 1024 * 1024)
+            )
+            atexit.register(response_cache.close)
 
         self.llm_manager = LLMManager(
-            model_name=self.config["model_name"]
+            model_name=self.config["model_name"],
+            base_url=self.config["ollama_base_url"],
+            max_concurrency=max_concurrency,
+            max_queue=self.config["llm_max_queue"],
+            queue_timeout=self.config["llm_queue_timeout"],
+            # Load tests run the real app against the dummy LLM, selected via the environment
+            backend=os.environ.get("LLM_BACKEND", self.config["llm_backend"]),
+            dummy_latency=float(os.environ.get("DUMMY_LLM_LATENCY", self.config["dummy_llm_latency"])),
+            response_cache=response_cache,
+            endpoints=endpoints,
+            pool_connections=self.config["llm_pool_connections"],
+            keepalive_expiry=self.config["llm_keepalive_expiry"],
+            request_timeout=self.config["llm_request_timeout"]
+        )
+        self.llm_manager.cache_bypass = os.environ.get("LLM_CACHE_BYPASS", "").lower() in ("1", "true")
+
+        # Cheap background availability check; status requests only read its cache
+        self.llm_health_monitor = LLMHealthMonitor(
+            model_name=self.config["model_name"],
+            base_url=self.config["ollama_base_url"],
+            interval=self.config["llm_health_interval"],
+            endpoints=endpoints
         )
+        self.llm_health_monitor.add_listener(self._on_llm_status)
 
         self.template_manager = TemplateManager(
             template_path=self.config.get("template_path")
         )
 
-        self.dialog_manager = None
+        self.session_manager = None
+
+        # Optional callable(event, payload) receiving per-session events (e.g. streamed tokens)
+        self.event_handler = None
+
+        # Worker pool for section content generation in the background
+        self.job_manager = None
+        if self.config["background_generation"]:
+            self.job_manager = JobManager(max_workers=self.config["generation_workers"])
+
+        # Worker threads generating the question of the next section ahead of time
+        self.speculation_executor = None
+        if self.config["speculative_questions"]:
+            self.speculation_executor = ThreadPoolExecutor(
+                max_workers=self.config["speculation_workers"], thread_name_prefix="speculative-question")
+            atexit.register(self.speculation_executor.shutdown, wait=False, cancel_futures=True)
+
+        # Section content from one JSON call instead of separate key information, content and check calls
+        self.structured_generation = os.environ.get(
+            "STRUCTURED_GENERATION", str(self.config["structured_generation"])).lower() in ("1", "true")
+
+        # Event loop for turns processed by the async dialog pipeline
+        self.async_runner = AsyncRunner() if self.config["async_turns"] else None
 
         # Statistics for evaluation
         self.generated_scripts_count = 0
 
+        # Initialization state of the components created by setup()
+        self.started_at = time.time()
+        self.component_status = {
+            name: {
+                "state": "pending",
+                "attempts": 0,
+                "last_error": None,
+                "ready_at": None,
+                "duration": None,
+                "next_retry_at": None
+            }
+            for name in ("vector_store", "session_store")
+        }
+        self._setup_lock = threading.Lock()
+        self._setup_thread = None
+
     def load_config(self, config_path: str) -> Dict[str, Any]:
         """
         Loads the configuration from a JSON file.
@@ -74,7 +186,58 @@ class ELearningCourseGenerator:
             "output_dir": "./data/output",
             "model_name": "llama3:8b",
             "chunk_size": 1000,
-            "chunk_overlap": 200
+            "chunk_overlap": 200,
+            "max_sessions": 100,
+            "session_ttl": 3600,
+            "session_memory_limit_mb": 256,
+            "session_store": "sqlite",
+            "session_db_path": "./data/sessions.db",
+            "session_flush_interval": 1.0,
+            "session_compression_level": 6,
+            "background_generation": True,
+            "generation_workers": 2,
+            "batch_workers": 4,
+            "blocking_pool_size": 20,
+            "async_turns": False,
+            "log_level": "INFO",
+            "log_format": "text",
+            "log_sampling": {},
+            "log_file": None,
+            "admin_token": None,
+            "profiles_dir": "./data/profiles",
+            "profile_interval": 0.005,
+            "tracing_enabled": False,
+            "trace_file": "./data/traces/spans.jsonl",
+            "trace_max_bytes": 10 * 1024 * 1024,
+            "trace_backup_count": 5,
+            "slow_trace_threshold": 10,
+            "llm_cache_enabled": True,
+            "llm_cache_path": "./data/llm_cache.db",
+            "llm_cache_memory_entries": 512,
+            "llm_cache_max_mb": 200,
+            "structured_generation": False,
+            "speculative_questions": True,
+            "speculation_workers": 2,
+            "content_cache_enabled": True,
+            "content_cache_threshold": 0.95,
+            "content_cache_draft_threshold": 0.9,
+            "content_cache_max_entries": 1000,
+            "content_cache_path": "./data/content_cache.jsonl",
+            "stream_tokens": True,
+            "ollama_base_url": None,
+            "ollama_endpoints": [],
+            "llm_pool_connections": 8,
+            "llm_keepalive_expiry": 60,
+            "llm_request_timeout": None,
+            "llm_max_concurrency": None,
+            "llm_max_queue": 8,
+            "llm_queue_timeout": 60,
+            "llm_health_interval": 30,
+            "llm_backend": "ollama",
+            "dummy_llm_latency": 0,
+            "lazy_startup": True,
+            "startup_retry_delay": 1,
+            "startup_retry_max_delay": 60
         }
 
         try:
@@ -105,7 +268,150 @@ class ELearningCourseGenerator:
     def setup(self) -> None:
         """
         Sets up the generator by loading documents and creating the vector database.
+
+        Blocks until all components are ready and raises the error of the first
+        component that fails. Components that are already ready are skipped.
+        """
+        with self._setup_lock:
+            for name, step in (("vector_store", self._setup_vector_store),
+                               ("session_store", self._setup_session_store)):
+                if self.component_status[name]["state"] != "ready":
+                    self._run_setup_step(name, step)
+
+    def start_background_setup(self) -> None:
+        """
+        Runs setup() in a background thread, retrying failed components with
+        exponential backoff until all of them are ready.
+        """
+        if self._setup_thread is not None and self._setup_thread.is_alive():
+            return
+
+        self._setup_thread = threading.Thread(target=self._background_setup, name="generator-setup", daemon=True)
+        self._setup_thread.start()
+
+    def is_ready(self) -> bool:
+        """
+        Checks whether all components required for serving conversations are ready.
+
+        Returns:
+            True if setup has completed
         """
+        return all(status["state"] == "ready" for status in self.component_status.values())
+
+    def get_memory_report(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Measures the memory held per session and per cache.
+
+        Args:
+            limit: Number of largest sessions listed
+
+        Returns:
+            Dictionary with process RSS, session report and cache sizes in bytes
+        """
+        caches = {
+            "llm_token_buffer": self.llm_manager.estimate_memory(),
+            "section_jobs": self.job_manager.estimate_memory() if self.job_manager else 0
+        }
+        if self.vector_store_manager is not None:
+            caches["vector_index"] = self.vector_store_manager.get_index_stats().get("bytes_in_ram", 0)
+        if self.content_cache is not None:
+            caches["content_cache"] = self.content_cache.estimate_memory()
+
+        sessions = self.session_manager.get_memory_report(limit) if self.session_manager else {}
+        if sessions:
+            caches["render_cache"] = sessions["totals"]["render_cache"]
+            caches["session_store"] = sessions["store"]
+
+        return {
+            "rss_bytes": read_process_rss(),
+            "sessions": sessions,
+            "caches": caches
+        }
+
+    def get_component_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the initialization state of each component.
+
+        Returns:
+            Dictionary with one status dictionary per component
+        """
+        components = {name: dict(status, required=True) for name, status in self.component_status.items()}
+
+        # The LLM is not required: without Ollama the fallback model answers
+        health = self.llm_health_monitor.get_status()
+        if self.llm_manager.backend == "dummy":
+            llm_state = "ready"
+        elif self.llm_manager.is_fallback:
+            llm_state = "degraded"
+        elif health["status"] == "unknown":
+            llm_state = "initializing"
+        else:
+            llm_state = "ready" if health["status"] == "available" else "degraded"
+
+        components["llm"] = {
+            "state": llm_state,
+            "backend": "dummy" if self.llm_manager.is_fallback else "ollama",
+            "health": health["status"],
+            "endpoints": {name: endpoint["status"] for name, endpoint in health.get("endpoints", {}).items()},
+            "last_error": health["last_error"],
+            "required": False
+        }
+        return components
+
+    def _background_setup(self) -> None:
+        delay = self.config["startup_retry_delay"]
+        while True:
+            try:
+                self.setup()
+                logger.info(f"All components ready after {time.time() - self.started_at:.1f}s")
+                return
+            except Exception as e:
+                logger.error(f"Setup failed, retrying in {delay:.0f}s: {e}")
+                for status in self.component_status.values():
+                    if status["state"] == "failed":
+                        status["next_retry_at"] = time.time() + delay
+                time.sleep(delay)
+                delay = min(delay * 2, self.config["startup_retry_max_delay"])
+
+    def _run_setup_step(self, name: str, step) -> None:
+        status = self.component_status[name]
+        status["state"] = "initializing"
+        status["attempts"] += 1
+        status["next_retry_at"] = None
+        start_time = time.time()
+
+        try:
+            step()
+        except Exception as e:
+            status["state"] = "failed"
+            status["last_error"] = str(e)
+            logger.error(f"Initialization of {name} failed (attempt {status['attempts']}): {e}")
+            raise
+
+        status["state"] = "ready"
+        status["ready_at"] = time.time()
+        status["duration"] = status["ready_at"] - start_time
+        logger.info(f"Component {name} ready in {status['duration']:.1f}s")
+
+    def _setup_vector_store(self) -> None:
+        if self.vector_store_manager is None:
+            # Imported here because it loads torch and the embedding model
+            from modules.vector_store_manager import VectorStoreManager
+            self.vector_store_manager = VectorStoreManager(
+                persist_directory=self.config["vectorstore_dir"]
+            )
+
+        # Similar answers reuse verified content, embedded with the same model as the documents
+        if self.content_cache is None and self.config["content_cache_enabled"]:
+            from modules.content_cache import SemanticContentCache
+            self.content_cache = SemanticContentCache(
+                embeddings=self.vector_store_manager.embeddings,
+                threshold=self.config["content_cache_threshold"],
+                draft_threshold=self.config["content_cache_draft_threshold"],
+                max_entries=self.config["content_cache_max_entries"],
+                persist_path=self.config["content_cache_path"]
+            )
+
         # Try to load an existing vector database
         database_loaded = self.vector_store_manager.load_vectorstore()
 
@@ -114,67 +420,184 @@ class ELearningCourseGenerator:
             documents = self.document_processor.load_documents()
             processed_docs = self.document_processor.process_documents(documents)
             self.vector_store_manager.create_vectorstore(processed_docs)
+            self._invalidate_content_cache()
+
+    def _invalidate_content_cache(self) -> None:
+        """Drops cached section content, which was verified against the previous documents."""
+        if self.content_cache is not None:
+            self.content_cache.clear()
+            logger.info("Content cache cleared because the documents were reindexed")
+
+    def _setup_session_store(self) -> None:
+        # Initialize the session registry; each session gets its own dialog manager
+        if self.session_manager is None:
+            session_store = create_session_store(
+                self.config["session_store"],
+                db_path=self.config["session_db_path"],
+                ttl=self.config["session_ttl"],
+                flush_interval=self.config["session_flush_interval"],
+                compression_level=self.config["session_compression_level"]
+            )
+            atexit.register(session_store.close)
+
+            self.session_manager = SessionManager(
+                dialog_manager_factory=self.create_dialog_manager,
+                max_sessions=self.config["max_sessions"],
+                session_ttl=self.config["session_ttl"],
+                memory_limit_mb=self.config["session_memory_limit_mb"],
+                store=session_store
+            )
+
+            # Persist section content once a background job has produced it
+            if self.job_manager is not None:
+                self.job_manager.add_listener(self._on_job_event)
+
+    def create_dialog_manager(self, session_id: str = None, headless: bool = False) -> DialogManager:
+        """
+        Creates a new dialog manager that shares the expensive components.
+
+        Args:
+            session_id: ID of the session the dialog manager belongs to
+            headless: Whether the dialog runs without a client, i.e. generates
+                content inline and emits no events
 
-        # Initialize the dialog manager
-        self.dialog_manager = DialogManager(
+        Returns:
+            DialogManager instance
+        """
+        return DialogManager(
             template_manager=self.template_manager,
             llm_manager=self.llm_manager,
-            vector_store_manager=self.vector_store_manager
+            vector_store_manager=self.vector_store_manager,
+            job_manager=None if headless else self.job_manager,
+            session_id=session_id,
+            event_handler=None if headless else self.event_handler,
+            stream_tokens=False if headless else self.config["stream_tokens"],
+            content_cache=self.content_cache,
+            structured_generation=self.structured_generation,
+            speculation_executor=None if headless else self.speculation_executor,
+            section_results_loader=None if headless else partial(self._load_section_results, session_id)
         )
 
-    def start_conversation(self) -> str:
+    def _load_section_results(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Reads the section results of a session from the session store."""
+        if self.session_manager is None:
+            return None
+        return self.session_manager.load_section_results(session_id)
+
+    def get_dialog_manager(self, session_id: str) -> DialogManager:
         """
-        Starts the conversation with the user.
+        Returns the dialog manager of a session.
+
+        Args:
+            session_id: Session ID
 
         Returns:
-            First question for the user
+            DialogManager of the session
         """
-        if self.dialog_manager is None:
+        if self.session_manager is None:
             self.setup()
 
-        return self.dialog_manager.get_next_question()
+        # Called within a turn, so the local copy must not be refreshed from the store
+        session = self.session_manager.get_session(session_id, refresh=False)
+        if session is None:
+            raise ValueError(f"Unknown session: {session_id}")
+
+        return session.dialog_manager
+
+    def _on_llm_status(self, status: Dict[str, Any]) -> None:
+        """
+        Switches the LLM back to Ollama once a server is reachable again and to the fallback
+        otherwise; servers without the model are taken out of the rotation.
+        """
+        self.llm_manager.set_endpoint_health({
+            name: endpoint["status"] == "available" for name, endpoint in status.get("endpoints", {}).items()
+        })
+        self.llm_manager.set_available(status["status"] == "available")
+
+    def _on_job_event(self, event: str, job: Dict[str, Any]) -> None:
+        """Persists section results when a background job has finished."""
+        if event in ("section_completed", "section_failed") and self.session_manager is not None:
+            self.session_manager.save_section_results(job["session_id"])
+
+    def start_conversation(self, session_id: str) -> str:
+        """
+        Starts the conversation with the user.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            First question for the user
+        """
+        return self.get_dialog_manager(session_id).get_next_question()
 
-    def process_user_input(self, user_input: str) -> str:
+    def process_user_input(self, session_id: str, user_input: str) -> str:
         """
         Processes the user's input and returns the next question.
 
         Args:
+            session_id: Session ID
             user_input: User's input
 
         Returns:
             Next question or message
         """
-        if self.dialog_manager is None:
-            self.setup()
+        if self.async_runner is not None:
+            return self.async_runner.run(self.aprocess_user_input(session_id, user_input))
+
+        with log_context(session_id=session_id):
+            response = self.get_dialog_manager(session_id).process_user_response(user_input)
+        self._count_generated_script(response)
+        return response
 
-        response = self.dialog_manager.process_user_response(user_input)
+    async def aprocess_user_input(self, session_id: str, user_input: str) -> str:
+        """
+        Async variant of process_user_input based on the async dialog pipeline.
+
+        Args:
+            session_id: Session ID
+            user_input: User's input
+
+        Returns:
+            Next question or message
+        """
+        with log_context(session_id=session_id):
+            dialog_manager = await asyncio.to_thread(self.get_dialog_manager, session_id)
+            response = await dialog_manager.aprocess_user_response(user_input)
+        self._count_generated_script(response)
+        return response
 
+    def _count_generated_script(self, response: str) -> None:
         # Check if a script was generated
         if "Hier ist der entworfene E-Learning-Kurs" in response:
             self.generated_scripts_count += 1
+            SCRIPTS_GENERATED.inc()
             logger.info(f"Script {self.generated_scripts_count} generated!")
 
-        return response
-
-    def save_generated_script(self, filename: str = None, format: str = "txt") -> str:
+    def save_generated_script(self, session_id: str, filename: str = None, format: str = "txt") -> str:
         """
         Saves the generated course and returns the path.
 
         Args:
+            session_id: Session ID
             filename: Name of the output file (optional)
             format: Format of the output ("txt", "json", or "html")
 
         Returns:
             Path to the saved file
         """
-        if self.dialog_manager is None:
-            raise ValueError("Dialog manager has not been initialized")
+        dialog_manager = self.get_dialog_manager(session_id)
 
         if filename is None:
+            # Nothing changed since the last save in this format
+            saved_path = dialog_manager.get_saved_script_path(format)
+            if saved_path is not None:
+                return saved_path
+
             # Generate a filename based on the context
-            organization = self.dialog_manager.conversation_state["context_info"].get(
+            organization = dialog_manager.conversation_state["context_info"].get(
                 "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?", "")
-            audience = self.dialog_manager.conversation_state["context_info"].get(
+            audience = dialog_manager.conversation_state["context_info"].get(
                 "Welche Mitarbeitergruppen sollen geschult werden?", "")
 
             sanitized_organization = ''.join(c for c in organization if c.isalnum() or c.isspace()).strip().replace(' ', '_')
@@ -184,21 +607,22 @@ class ELearningCourseGenerator:
             filename = f"elearning_{sanitized_organization}_{sanitized_audience}_{timestamp}.{format}"
 
         output_path = os.path.join(self.config["output_dir"], filename)
-        self.dialog_manager.save_script(output_path, format)
+        dialog_manager.save_script(output_path, format)
+
+        # Compressed variants are served to clients that accept them
+        precompress_file(output_path)
 
         return output_path
 
-    def reset_conversation(self) -> None:
+    def reset_conversation(self, session_id: str) -> None:
         """
-        Resets the conversation to create a new course.
+        Resets the conversation of one session to create a new course.
+
+        Args:
+            session_id: Session ID
         """
-        if self.dialog_manager is not None:
-            # Create a new dialog manager with the same components
-            self.dialog_manager = DialogManager(
-                template_manager=self.template_manager,
-                llm_manager=self.llm_manager,
-                vector_store_manager=self.vector_store_manager
-            )
+        if self.session_manager is not None:
+            self.session_manager.reset_session(session_id)
 
     def reindex_documents(self):
         """
@@ -206,6 +630,9 @@ class ELearningCourseGenerator:
         """
         logger.info("Starting document reindexing...")
 
+        if self.vector_store_manager is None:
+            self.setup()
+
         # Reload all documents
         documents = self.document_processor.load_documents()
         processed_docs = self.document_processor.process_documents(documents)
@@ -236,6 +663,7 @@ class ELearningCourseGenerator:
         
         # Create new vector database
         self.vector_store_manager.create_vectorstore(processed_docs)
+        self._invalidate_content_cache()
         logger.info(f"Reindexing completed. {len(processed_docs)} documents indexed.")
 
         return len(processed_docs)
@@ -0,0 +1,194 @@
+import os
+import re
+import gzip
+import hashlib
+import logging
+import mimetypes
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+FINGERPRINT_PATTERN = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{12})(?P<ext>\.[^./]+)$")
+
+
+def precompress_file(path: str) -> List[str]:
+    """
+    Writes gzip and, if the brotli package is installed, brotli variants next to a file.
+
+    Args:
+        path: Path of the file to compress
+
+    Returns:
+        Paths of the written variants
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    variants = []
+    try:
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        variants.append(path + ".gz")
+
+        if brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(data, quality=11))
+            variants.append(path + ".br")
+    except Exception as e:
+        logger.warning(f"Could not precompress {path}: {e}")
+
+    return variants
+
+
+def select_precompressed(path: str, accept_encoding: str) -> Tuple[str, Optional[str]]:
+    """
+    Chooses the best precompressed variant of a file that the client accepts.
+
+    Args:
+        path: Path of the uncompressed file
+        accept_encoding: Value of the Accept-Encoding request header
+
+    Returns:
+        Tuple (path to send, content encoding or None for the original file)
+    """
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(token.lower())
+
+    try:
+        original_mtime = os.path.getmtime(path)
+    except OSError:
+        return path, None
+
+    for encoding, suffix in ENCODINGS:
+        variant = path + suffix
+        # A variant older than the original is stale
+        if encoding in accepted and os.path.exists(variant) and os.path.getmtime(variant) >= original_mtime:
+            return variant, encoding
+
+    return path, None
+
+
+def send_download(path: str, download_name: str) -> Response:
+    """
+    Sends a file as an attachment, precompressed if the client accepts it. Unchanged
+    files are answered with 304 via ETag/Last-Modified; must be called in a request.
+
+    Args:
+        path: Path of the uncompressed file
+        download_name: File name offered to the client
+
+    Returns:
+        Flask response
+    """
+    send_path, encoding = select_precompressed(path, request.headers.get("Accept-Encoding", ""))
+    response = send_file(
+        send_path,
+        mimetype=mimetypes.guess_type(download_name)[0] or "application/octet-stream",
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=True
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    # Always revalidate; the file name stays the same when a course is saved again
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class StaticFingerprinter:
+    """
+    Maps static asset names to names that contain a hash of their content
+    (js/main.js -> js/main.0123456789ab.js), so they can be cached forever:
+    a changed file gets a new URL.
+    """
+
+    def __init__(self, static_folder: str):
+        """
+        Initializes the StaticFingerprinter.
+
+        Args:
+            static_folder: Directory containing the static assets
+        """
+        self.static_folder = static_folder
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get_hash(self, filename: str) -> Optional[str]:
+        """
+        Returns the content hash of an asset, recomputed only when the file changed.
+
+        Args:
+            filename: Path relative to the static folder
+
+        Returns:
+            First 12 hex digits of the SHA-256 hash or None if the file does not exist
+        """
+        path = os.path.join(self.static_folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._hashes.get(filename)
+            if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                return cached[2]
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+
+        with self._lock:
+            self._hashes[filename] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def fingerprint(self, filename: str) -> str:
+        """
+        Returns the hashed name of an asset.
+
+        Args:
+            filename: Path relative to the static folder
+
+        Returns:
+            Hashed name, or the name itself if the file does not exist
+        """
+        digest = self.get_hash(filename)
+        if digest is None:
+            return filename
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}.{digest}{ext}"
+
+    def resolve(self, hashed_name: str) -> Tuple[Optional[str], bool]:
+        """
+        Maps a hashed name back to the asset.
+
+        Args:
+            hashed_name: Name as produced by fingerprint()
+
+        Returns:
+            Tuple (filename or None if unknown, whether the hash matches the current content)
+        """
+        match = FINGERPRINT_PATTERN.match(hashed_name)
+        if not match:
+            return None, False
+
+        filename = match.group("stem") + match.group("ext")
+        digest = self.get_hash(filename)
+        if digest is None:
+            return None, False
+        return filename, digest == match.group("hash")
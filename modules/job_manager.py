@@ -0,0 +1,184 @@
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.memory_profiler import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    """
+    Runs section content generation as background jobs on a worker pool
+    and notifies listeners about progress and completion.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished_jobs: int = 500):
+        """
+        Initializes the JobManager.
+
+        Args:
+            max_workers: Number of worker threads
+            max_finished_jobs: Number of finished job records kept for status queries
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section-job")
+        self.max_finished_jobs = max_finished_jobs
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Any] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._lock = threading.RLock()
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """
+        Registers a callback that receives (event_name, payload) for every job event.
+
+        Args:
+            listener: Callback function
+        """
+        self._listeners.append(listener)
+
+    def submit(self, session_id: str, section_id: str, func: Callable, *args, **kwargs) -> str:
+        """
+        Submits a section generation job.
+
+        The callable is invoked with an additional ``progress_callback`` keyword
+        argument that it can call with the name of the current stage.
+
+        Args:
+            session_id: Session the job belongs to
+            section_id: Section that is generated
+            func: Callable doing the work
+
+        Returns:
+            Job ID
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "session_id": session_id,
+            "section_id": section_id,
+            "status": "queued",
+            "stage": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+
+        self._notify("section_progress", job)
+
+        with self._lock:
+            self._futures[job_id] = self.executor.submit(self._run, job, func, args, kwargs)
+
+        return job_id
+
+    def get_jobs(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Returns the job records of a session.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            List of job dictionaries
+        """
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if job["session_id"] == session_id]
+
+    def has_pending(self, session_id: str) -> bool:
+        """
+        Checks whether a session still has queued or running jobs.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            True if at least one job is not finished
+        """
+        return any(job["status"] in ("queued", "running") for job in self.get_jobs(session_id))
+
+    def wait_for_session(self, session_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until all jobs of a session are finished.
+
+        Args:
+            session_id: Session ID
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            True if all jobs finished within the timeout
+        """
+        with self._lock:
+            futures = [self._futures[job_id] for job_id, job in self._jobs.items()
+                       if job["session_id"] == session_id and job_id in self._futures]
+
+        if not futures:
+            return True
+
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait_for_jobs: bool = True) -> None:
+        """Stops the worker pool."""
+        self.executor.shutdown(wait=wait_for_jobs)
+
+    def _run(self, job: Dict[str, Any], func: Callable, args, kwargs) -> None:
+        def progress_callback(stage: str) -> None:
+            job["stage"] = stage
+            self._notify("section_progress", job)
+
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        self._notify("section_progress", job)
+
+        try:
+            func(*args, progress_callback=progress_callback, **kwargs)
+            job["status"] = "completed"
+            job["finished_at"] = time.time()
+            logger.info(f"Job {job['job_id']} for section {job['section_id']} completed "
+                        f"in {job['finished_at'] - job['started_at']:.1f}s")
+            self._notify("section_completed", job)
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            job["finished_at"] = time.time()
+            logger.error(f"Job {job['job_id']} for section {job['section_id']} failed: {e}")
+            self._notify("section_failed", job)
+        finally:
+            self._prune()
+
+    def _notify(self, event: str, job: Dict[str, Any]) -> None:
+        payload = dict(job)
+        for listener in self._listeners:
+            try:
+                listener(event, payload)
+            except Exception as e:
+                logger.error(f"Error in job listener for event {event}: {e}")
+
+    def estimate_memory(self) -> int:
+        """
+        Approximates the memory held by the job records.
+
+        Returns:
+            Size in bytes
+        """
+        with self._lock:
+            return deep_sizeof(dict(self._jobs))
+
+    def _prune(self) -> None:
+        """Drops the oldest finished job records."""
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job["status"] in ("completed", "failed")]
+            if len(finished) <= self.max_finished_jobs:
+                return
+            finished.sort(key=lambda job: job["finished_at"] or 0)
+            for job in finished[:len(finished) - self.max_finished_jobs]:
+                self._jobs.pop(job["job_id"], None)
+                self._futures.pop(job["job_id"], None)
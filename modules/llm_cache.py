@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from modules.metrics import LLM_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses: a bounded in-memory LRU in front of a
+    persistent SQLite table that is shared by all workers and survives restarts.
+
+    Entries are keyed by model, generation options and the full prompt, so
+    repeated runs over the same interviews are answered without Ollama. The
+    SQLite tier is evicted by total response size, least recently used first.
+    """
+
+    def __init__(self, db_path: Optional[str] = "./data/llm_cache.db", memory_entries: int = 512,
+                 max_bytes: int = 200 * 1024 * 1024, busy_timeout: float = 5.0):
+        """
+        Initializes the LLMResponseCache.
+
+        Args:
+            db_path: Path of the SQLite database (None keeps only the in-memory tier)
+            memory_entries: Maximum number of responses kept in memory
+            max_bytes: Maximum total size of the responses in the SQLite tier
+            busy_timeout: Seconds to wait for a database locked by another worker
+        """
+        self.memory_entries = max(0, int(memory_entries))
+        self.max_bytes = int(max_bytes)
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._stored_bytes = 0
+
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_access ON llm_responses (last_access)")
+            self._stored_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+            logger.info(f"LLM response cache at {db_path} ({self._stored_bytes} bytes)")
+
+    @staticmethod
+    def make_key(model: str, options: Dict[str, Any], prompt: str) -> str:
+        """
+        Builds the cache key of a request.
+
+        Args:
+            model: Model name
+            options: Generation options that influence the response
+            prompt: Full prompt
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps([model, options, prompt], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """
+        Looks a response up in the in-memory tier only (never blocks on I/O).
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached response or None
+        """
+        with self._memory_lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+        if response is not None:
+            LLM_CACHE.inc(result="memory_hit")
+        return response
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks a response up in both tiers; disk hits are promoted to memory.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached response or None
+        """
+        response = self.get_memory(key)
+        if response is not None:
+            return response
+
+        response = self._load(key)
+        if response is None:
+            self.misses += 1
+            LLM_CACHE.inc(result="miss")
+            return None
+
+        self.hits["disk"] += 1
+        LLM_CACHE.inc(result="disk_hit")
+        self._remember(key, response)
+        return response
+
+    def put(self, key: str, response: str, model: str = None) -> None:
+        """
+        Stores a response in both tiers.
+
+        Args:
+            key: Cache key
+            response: LLM response
+            model: Model name, stored for inspection
+        """
+        if not isinstance(response, str) or not response:
+            return
+        self._remember(key, response)
+        self._store(key, response, model)
+
+    def _remember(self, key: str, response: str) -> None:
+        if not self.memory_entries:
+            return
+        with self._memory_lock:
+            self._memory[key] = response
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[str]:
+        if self._conn is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading LLM response cache: {e}")
+            return None
+
+    def _store(self, key: str, response: str, model: Optional[str]) -> None:
+        if self._conn is None:
+            return
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        try:
+            with self._db_lock:
+                previous = self._conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now)
+                )
+                self._stored_bytes += size - (previous[0] if previous else 0)
+                if self.max_bytes and self._stored_bytes > self.max_bytes:
+                    self._evict()
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing LLM response cache: {e}")
+
+    def _evict(self) -> None:
+        """Deletes the least recently used responses until 90% of the size limit is reached."""
+        # Other workers write to the same file, so the total is recounted first
+        self._stored_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self._stored_bytes <= target:
+            return
+
+        removed = 0
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_access").fetchall():
+            if self._stored_bytes - freed <= target:
+                break
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            freed += size
+            removed += 1
+
+        self._stored_bytes -= freed
+        self.evictions += removed
+        logger.info(f"Evicted {removed} LLM responses ({freed} bytes) from the cache")
+
+    def clear(self) -> None:
+        """Removes all cached responses."""
+        with self._memory_lock:
+            self._memory.clear()
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.execute("DELETE FROM llm_responses")
+                self._stored_bytes = 0
+
+    def close(self) -> None:
+        """Closes the database."""
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns statistics about the cache.
+
+        Returns:
+            Dictionary with sizes, hits per tier, misses and evictions
+        """
+        with self._memory_lock:
+            memory_entries = len(self._memory)
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "memory_entries": memory_entries,
+            "memory_limit": self.memory_entries,
+            "db_path": self.db_path,
+            "stored_bytes": self._stored_bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": (self.hits["memory"] + self.hits["disk"]) / lookups if lookups else None,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,192 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import ollama
+
+logger = logging.getLogger(__name__)
+
+
+class LLMHealthMonitor:
+    """
+    Checks the availability of the Ollama servers in the background.
+
+    Instead of running a generation, the monitor calls Ollama's model list
+    endpoint, which is cheap and does not occupy a generation slot. Status
+    requests only read the cached result. With several servers the LLM counts
+    as available as long as one of them serves the model.
+    """
+
+    def __init__(self, model_name: str, base_url: Optional[str] = None, interval: float = 30,
+                 timeout: float = 5, history_size: int = 20, endpoints: Optional[List[str]] = None):
+        """
+        Initializes the LLMHealthMonitor.
+
+        Args:
+            model_name: Name of the model that has to be available
+            base_url: URL of the Ollama server (None uses the Ollama default)
+            interval: Seconds between two checks
+            timeout: Timeout of a single check in seconds
+            history_size: Number of latency measurements kept
+            endpoints: URLs of several Ollama servers that are checked (None checks only base_url)
+        """
+        self.model_name = model_name
+        self.base_url = base_url
+        self.interval = interval
+        self.timeout = timeout
+
+        # One client per server, keyed like the endpoints of the LLM pool
+        self.clients = {
+            url or "default": ollama.Client(host=url, timeout=timeout)
+            for url in dict.fromkeys(endpoints or [base_url])
+        }
+        self._executor = ThreadPoolExecutor(max_workers=len(self.clients), thread_name_prefix="llm-health")
+
+        self.latency_history = deque(maxlen=history_size)
+        self._status = {
+            "status": "unknown",
+            "model": model_name,
+            "available_models": [],
+            "last_checked": None,
+            "last_success": None,
+            "last_error": None,
+            "last_error_at": None,
+            "consecutive_failures": 0,
+            "endpoints": {}
+        }
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Registers a callback that receives the status after every check.
+
+        Args:
+            listener: Callback function
+        """
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Starts the background thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="llm-health-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"LLM health monitor started (interval {self.interval}s)")
+
+    def stop(self) -> None:
+        """Stops the background thread."""
+        self._stop_event.set()
+
+    def check_now(self) -> Dict[str, Any]:
+        """
+        Performs a single check and updates the cached status.
+
+        Returns:
+            The updated status
+        """
+        start_time = time.time()
+        # The servers are checked concurrently, so one that times out does not delay the others
+        results = dict(zip(self.clients, self._executor.map(self._check_endpoint, self.clients.values())))
+        reachable = {name: result for name, result in results.items() if result["status"] != "unavailable"}
+        available = [name for name, result in results.items() if result["status"] == "available"]
+        errors = [result["error"] if len(results) == 1 else f"{name}: {result['error']}"
+                  for name, result in results.items() if result["error"]]
+        unreachable = [name for name, result in results.items() if result["status"] == "unavailable"]
+
+        with self._lock:
+            self._status["last_checked"] = start_time
+            self._status["endpoints"] = results
+            if reachable:
+                latencies = [result["latency"] for result in reachable.values()]
+                self.latency_history.append((start_time, sum(latencies) / len(latencies)))
+                self._status.update({
+                    "status": "available" if available else "degraded",
+                    "available_models": sorted({model for result in reachable.values() for model in result["models"]}),
+                    "last_success": start_time,
+                    "consecutive_failures": 0
+                })
+            else:
+                self._status.update({
+                    "status": "unavailable",
+                    "consecutive_failures": self._status["consecutive_failures"] + 1
+                })
+            if errors:
+                self._status["last_error"] = "; ".join(errors)
+                self._status["last_error_at"] = start_time
+
+        if unreachable:
+            logger.warning(f"LLM health check failed: {'; '.join(errors)}")
+
+        status = self.get_status()
+        for listener in self._listeners:
+            try:
+                listener(status)
+            except Exception as e:
+                logger.error(f"Error in LLM health listener: {e}")
+        return status
+
+    def _check_endpoint(self, client: ollama.Client) -> Dict[str, Any]:
+        """Checks whether one server is reachable and serves the model."""
+        start_time = time.time()
+        try:
+            models = self._extract_model_names(client.list())
+        except Exception as e:
+            return {"status": "unavailable", "latency": None, "models": [], "error": str(e)}
+
+        model_found = any(self._matches_model(name) for name in models)
+        return {
+            "status": "available" if model_found else "degraded",
+            "latency": time.time() - start_time,
+            "models": models,
+            "error": None if model_found else f"Model {self.model_name} is not available on the Ollama server"
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Returns the cached status including the latency history.
+
+        Returns:
+            Dictionary with status, latency statistics and the last error
+        """
+        with self._lock:
+            status = dict(self._status)
+            status["endpoints"] = {name: dict(result) for name, result in self._status["endpoints"].items()}
+            latencies = [latency for _, latency in self.latency_history]
+            status["latency_history"] = [
+                {"timestamp": timestamp, "latency": latency} for timestamp, latency in self.latency_history
+            ]
+
+        status["response_time"] = latencies[-1] if latencies else None
+        status["average_response_time"] = sum(latencies) / len(latencies) if latencies else None
+        return status
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.check_now()
+            self._stop_event.wait(self.interval)
+
+    def _matches_model(self, name: str) -> bool:
+        # "llama3.1" matches "llama3.1:latest", "llama3.1:8b" matches only itself
+        return name == self.model_name or name.split(":")[0] == self.model_name
+
+    @staticmethod
+    def _extract_model_names(response: Any) -> List[str]:
+        """Reads the model names from the list response of different Ollama client versions."""
+        models = response.get("models", []) if isinstance(response, dict) else getattr(response, "models", [])
+        names = []
+        for model in models or []:
+            if isinstance(model, dict):
+                name = model.get("model") or model.get("name")
+            else:
+                name = getattr(model, "model", None) or getattr(model, "name", None)
+            if name:
+                names.append(name)
+        return names
@@ -1,16 +1,23 @@
 import re
-import random
+import json
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any, Tuple, Optional
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Optional, Callable, Generator
 from langchain.prompts import PromptTemplate
 from langchain_core.prompts import PromptTemplate
-from langchain_ollama.llms import OllamaLLM
-from langchain_core.runnables import RunnablePassthrough
 from langchain.callbacks.base import BaseCallbackHandler
-from langchain.chains import LLMChain
+from modules.metrics import timed, LLM_METHOD_DURATION, LLM_CALL_DURATION, LLM_CALLS_IN_FLIGHT, FALLBACKS, CORRECTIONS
+from modules.metrics import LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_REJECTED
+from modules.offload import run_blocking
+from modules.steps import run_steps, arun_steps
+from modules.memory_profiler import deep_sizeof
+from modules.tracing import traced, span, tracing_enabled, set_span_attributes
+from modules.llm_pool import OllamaPool, CONNECT_ERRORS
 
-# Logging-Konfiguration
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Callback-Handler für verbessertes Logging und Überwachung von LLM-Antworten
@@ -29,6 +36,8 @@ class LLMCallbackHandler(BaseCallbackHandler):
             r"ich kann nicht",
         ]
         self.potential_hallucinations = []
+        self._hallucination_regex = re.compile("|".join(f"({pattern})" for pattern in self.hallucination_patterns),
+                                               re.IGNORECASE)
 
     def on_llm_start(self, serialized, prompts, **kwargs):
         """Wird aufgerufen, wenn das LLM eine Anfrage erhält."""
@@ -43,10 +52,12 @@ class LLMCallbackHandler(BaseCallbackHandler):
 
         # Überprüfe auf potenzielle Halluzinationen
         current_text = "".join(self.current_tokens[-50:])  # Überprüfe nur die letzten 50 Tokens
-        for pattern in self.hallucination_patterns:
-            if re.search(pattern, current_text, re.IGNORECASE):
+        for match in self._hallucination_regex.finditer(current_text):
+            pattern = self.hallucination_patterns[match.lastindex - 1]
+            # Ein Treffer bleibt bis zu 50 Tokens im Fenster: jedes Muster nur einmal pro Antwort melden
+            if all(found != pattern for found, _ in self.potential_hallucinations):
                 self.potential_hallucinations.append((pattern, current_text))
-                logger.warning(f"Potenzielle Halluzination erkannt: {pattern} in '{current_text}'")
+                logger.warning(f"Potenzielle Halluzination erkannt: {pattern}")
 
     def on_llm_end(self, response, **kwargs):
         """Wird aufgerufen, wenn das LLM eine Antwort abgeschlossen hat."""
@@ -64,15 +75,80 @@ class LLMCallbackHandler(BaseCallbackHandler):
         logger.error(f"LLM-Fehler aufgetreten: {error}")
 
 
+# Callback-Handler, der die Tokens eines einzelnen LLM-Aufrufs weiterreicht (z.B. an Socket.IO)
+class TokenStreamHandler(BaseCallbackHandler):
+    def __init__(self, on_token: Callable[[str], None], on_done: Optional[Callable[[str], None]] = None):
+        """
+        Initialisiert den TokenStreamHandler.
+
+        Args:
+            on_token: Wird für jeden neuen Token aufgerufen
+            on_done: Wird mit dem vollständigen Text aufgerufen, sobald die Antwort abgeschlossen ist
+        """
+        self.on_token = on_token
+        self.on_done = on_done
+        self.tokens = []
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        """Reicht einen neuen Token weiter."""
+        self.tokens.append(token)
+        self.on_token(token)
+
+    def on_llm_end(self, response, **kwargs):
+        """Meldet den vollständigen Text."""
+        if self.on_done is not None:
+            self.on_done("".join(self.tokens))
+
+
+# Zählt die Tokens eines einzelnen LLM-Aufrufs für dessen Trace-Span
+class TokenCountingHandler(BaseCallbackHandler):
+    def __init__(self):
+        """Initialisiert den TokenCountingHandler."""
+        self.token_count = 0
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        """Zählt einen neuen Token."""
+        self.token_count += 1
+
+
+# Generierungsoptionen von OllamaLLM, die die Antwort beeinflussen und daher Teil des Cache-Schlüssels sind
+CACHE_KEY_OPTIONS = ("temperature", "top_p", "top_k", "num_ctx", "num_predict", "repeat_penalty",
+                     "repeat_last_n", "mirostat", "mirostat_eta", "mirostat_tau", "tfs_z", "seed",
+                     "stop", "format")
+
+# Gesetzt durch LLMManager.bypass_cache() für die Aufrufe im Block
+_cache_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+# Mindestlänge des Inhalts einer strukturierten Antwort, kürzere gelten als ungültig
+MIN_STRUCTURED_CONTENT_CHARS = 200
+
+
 # Fallback-Modell für den Fall, dass Ollama nicht verfügbar ist
 class DummyLLM:
     """Ein einfaches Fallback-LLM, das vordefinierte Antworten zurückgibt"""
     
-    def __init__(self):
-        logger.warning("Verwende DummyLLM aufgrund eines Initialisierungsfehlers mit dem echten LLM")
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialisiert das DummyLLM.
+
+        Args:
+            latency: Simulierte Antwortzeit in Sekunden (z.B. für Lasttests)
+        """
+        self.latency = max(0.0, float(latency or 0))
+        logger.warning("Verwende DummyLLM, da das echte LLM nicht erreichbar ist")
+
+    def invoke(self, prompt, config=None):
+        """Wie __call__, meldet die Antwort aber auch an übergebene Callback-Handler"""
+        response = self(prompt)
+        for handler in (config or {}).get("callbacks") or []:
+            handler.on_llm_new_token(response)
+            handler.on_llm_end(None)
+        return response
     
     def __call__(self, prompt):
         """Einfache Implementierung, die eine vordefinierte Antwort zurückgibt"""
+        if self.latency:
+            time.sleep(self.latency)
         if "frage" in prompt.lower() or "question" in prompt.lower():
             return "Können Sie mir mehr über Ihre täglichen Abläufe im Krankenhaus erzählen, besonders wenn Sie mit Patientendaten oder E-Mails arbeiten?"
         elif "inhalt" in prompt.lower() or "content" in prompt.lower():
@@ -81,49 +157,545 @@ class DummyLLM:
             return "Ich bin ein Hilfeassistent für Informationssicherheit im Gesundheitswesen. Wie kann ich Ihnen bei der Erstellung eines Schulungsskripts helfen?"
 
 
+class LLMOverloadedError(Exception):
+    """Wird ausgelöst, wenn ein LLM-Aufruf wegen voller Warteschlange abgewiesen wird."""
+
+
 class LLMManager:
     """
     Verwaltet die Interaktion mit dem Large Language Model.
+
+    Alle Aufrufe laufen durch ein Gateway, das höchstens max_concurrency
+    Anfragen gleichzeitig an Ollama schickt (passend zu OLLAMA_NUM_PARALLEL).
+    Weitere Aufrufe warten in einer begrenzten Warteschlange; ist sie voll,
+    wird sofort LLMOverloadedError ausgelöst, statt Ollama zu überlasten.
+    Bei mehreren Ollama-Servern geht jeder Aufruf an den verfügbaren Server
+    mit den wenigsten laufenden Anfragen.
     """
 
-    def __init__(self, model_name: str = "mistral"):
+    def __init__(self, model_name: str = "mistral", base_url: Optional[str] = None,
+                 max_concurrency: int = 1, max_queue: int = 8, queue_timeout: float = 60,
+                 backend: str = "ollama", dummy_latency: float = 0.0, response_cache=None,
+                 endpoints: Optional[List[str]] = None, pool_connections: int = 8,
+                 keepalive_expiry: float = 60, request_timeout: Optional[float] = None):
         """
         Initialisiert den LLMManager.
 
         Args:
             model_name: Name des zu verwendenden LLM-Modells
+            base_url: URL des Ollama-Servers (None verwendet den Ollama-Standard)
+            max_concurrency: Maximale Anzahl gleichzeitiger Anfragen an Ollama
+            max_queue: Maximale Anzahl wartender Aufrufe
+            queue_timeout: Maximale Wartezeit auf einen freien Platz in Sekunden
+            backend: "ollama" oder "dummy", um immer das Dummy-LLM zu verwenden (z.B. für Lasttests)
+            dummy_latency: Simulierte Antwortzeit des Dummy-LLM in Sekunden
+            response_cache: Optionaler LLMResponseCache für Antworten von Ollama
+            endpoints: URLs mehrerer Ollama-Server, auf die die Aufrufe verteilt werden
+                (None verwendet nur base_url)
+            pool_connections: Maximale Anzahl offener Verbindungen je Ollama-Server
+            keepalive_expiry: Sekunden, die eine unbenutzte Verbindung offen bleibt
+            request_timeout: Timeout einer Anfrage an Ollama in Sekunden (None wartet unbegrenzt)
         """
+        if backend not in ("ollama", "dummy"):
+            raise ValueError(f"Unbekanntes LLM-Backend: {backend}")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.dummy_latency = dummy_latency
+
+        # Gateway für die Zugangskontrolle
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = queue_timeout
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._gateway_lock = threading.Lock()
+        self._active_calls = 0
+        self._waiting_calls = 0
+        # Asynchron wartende Aufrufe: (Event-Loop, asyncio.Event), geweckt bei jeder Freigabe
+        self._async_waiters = []
+        self._rejected_calls = 0
+        self._local = threading.local()
+
         # LLM-Callback für verbesserte Überwachung
         self.callback_handler = LLMCallbackHandler()
 
-        # Initialisiere das LLM mit Callback
-        self.llm = OllamaLLM(
-            model=model_name,
+        # Initialisiere ein LLM mit Callback und eigenem Verbindungspool je Ollama-Server. Die
+        # Verbindungen werden nicht beim Start getestet, sondern vom LLMHealthMonitor überwacht,
+        # der über set_available und set_endpoint_health umschaltet.
+        self.pool = OllamaPool(
+            model_name=model_name,
+            base_urls=endpoints or [base_url],
             callbacks=[self.callback_handler],
+            max_connections=pool_connections,
+            keepalive_expiry=keepalive_expiry,
+            request_timeout=request_timeout
         )
-        
-        # Teste die LLM-Verbindung
-        try:
-            test_result = self.llm('Test')
-            logger.info(f'LLM erfolgreich initialisiert mit Modell {model_name}')
-        except Exception as e:
-            logger.error(f'Fehler bei der Verbindung zu Ollama: {e}')
-            logger.warning('Fallback auf Dummy-LLM. Überprüfen Sie, ob Ollama läuft.')
-            self.llm = DummyLLM()
+        self.ollama_llm = self.pool.endpoints[0].llm
+        self.llm = DummyLLM(dummy_latency) if backend == "dummy" else self.ollama_llm
+
+        # Antwort-Cache; cache_bypass schaltet ihn für alle Aufrufe ab (z.B. für eine Neugenerierung)
+        self.response_cache = response_cache
+        self.cache_bypass = False
+        self._cache_options = {
+            option: getattr(self.ollama_llm, option, None) for option in CACHE_KEY_OPTIONS
+        }
 
         # Definiere Standardprompts für verschiedene Aufgaben
         self.prompts = {
             "question_generation": self._create_question_generation_prompt(),
             "content_generation": self._create_content_generation_prompt(),
             "hallucination_check": self._create_hallucination_check_prompt(),
-            "key_info_extraction": self._create_key_info_extraction_prompt()
+            "key_info_extraction": self._create_key_info_extraction_prompt(),
+            "structured_section": self._create_structured_section_prompt()
         }
 
-        # Erstelle LLM-Chains für die verschiedenen Aufgaben
-        self.chains = {
-            name: LLMChain(llm=self.llm, prompt=prompt)
-            for name, prompt in self.prompts.items()
-        }
+    @property
+    def is_fallback(self) -> bool:
+        """Gibt an, ob gerade das Dummy-LLM verwendet wird."""
+        return isinstance(self.llm, DummyLLM)
+
+    def set_available(self, available: bool) -> None:
+        """
+        Schaltet zwischen dem Ollama-Modell und dem Dummy-LLM um.
+
+        Args:
+            available: Ob der Ollama-Server mit dem Modell erreichbar ist
+        """
+        if self.backend == "dummy":
+            return
+
+        if available and self.is_fallback:
+            self.llm = self.ollama_llm
+            logger.info(f'Ollama wieder erreichbar, verwende wieder Modell {self.model_name}')
+        elif not available and not self.is_fallback:
+            logger.warning('Ollama nicht erreichbar. Fallback auf Dummy-LLM, bis der Server wieder antwortet.')
+            self.llm = DummyLLM(self.dummy_latency)
+
+    def set_endpoint_health(self, health: Dict[str, bool]) -> None:
+        """
+        Nimmt nicht erreichbare Ollama-Server aus der Verteilung und erreichbare wieder auf.
+
+        Args:
+            health: Verfügbarkeit des Modells je Server (URL bzw. "default")
+        """
+        self.pool.set_health(health)
+
+    def get_endpoint_stats(self) -> List[Dict[str, Any]]:
+        """
+        Gibt Statistiken je Ollama-Server zurück.
+
+        Returns:
+            Liste mit laufenden Anfragen, Aufrufen, Fehlern und mittlerer Dauer je Server
+        """
+        return self.pool.get_stats()
+
+    def is_saturated(self) -> bool:
+        """
+        Gibt an, ob die Warteschlange voll ist und neue Aufrufe abgewiesen würden.
+
+        Returns:
+            True, wenn alle Plätze belegt sind und die Warteschlange voll ist
+        """
+        with self._gateway_lock:
+            return self._active_calls >= self.max_concurrency and self._waiting_calls >= self.max_queue
+
+    def estimate_memory(self) -> int:
+        """
+        Schätzt den Speicher der Token-Puffer des Callback-Handlers, die bis zum
+        nächsten Aufruf die letzte Antwort halten.
+
+        Returns:
+            Größe in Bytes
+        """
+        handler = self.callback_handler
+        return deep_sizeof(handler.current_tokens) + deep_sizeof(handler.potential_hallucinations)
+
+    def get_gateway_stats(self) -> Dict[str, Any]:
+        """
+        Gibt den Zustand des Gateways zurück.
+
+        Returns:
+            Dictionary mit Limits, laufenden, wartenden und abgewiesenen Aufrufen
+        """
+        with self._gateway_lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "active_calls": self._active_calls,
+                "waiting_calls": self._waiting_calls,
+                "rejected_calls": self._rejected_calls
+            }
+
+    @contextmanager
+    def background_calls(self):
+        """
+        Aufrufe in diesem Block (im aktuellen Thread) warten ohne Warteschlangenlimit
+        und ohne Timeout auf einen freien Platz. Für Hintergrundjobs, deren Anzahl
+        bereits durch den Worker-Pool begrenzt ist.
+        """
+        previous = getattr(self._local, "background", False)
+        self._local.background = True
+        try:
+            yield
+        finally:
+            self._local.background = previous
+
+    @contextmanager
+    def bypass_cache(self):
+        """
+        Aufrufe in diesem Block (im aktuellen Thread bzw. Task) gehen immer an das
+        LLM; ihre Antworten ersetzen die Einträge im Cache.
+        """
+        token = _cache_bypass.set(True)
+        try:
+            yield
+        finally:
+            _cache_bypass.reset(token)
+
+    def _cache_key(self, prompt: str, output_format: Optional[str] = None) -> Optional[str]:
+        """Liefert den Cache-Schlüssel eines Ollama-Aufrufs oder None, wenn der Cache umgangen wird."""
+        if self.response_cache is None:
+            return None
+        options = dict(self._cache_options, format=output_format) if output_format else self._cache_options
+        return self.response_cache.make_key(self.model_name, options, prompt)
+
+    def _use_cached(self) -> bool:
+        """Gibt an, ob Antworten aus dem Cache gelesen werden dürfen."""
+        return not (self.cache_bypass or _cache_bypass.get())
+
+    def cache_bypassed(self) -> bool:
+        """
+        Gibt an, ob Caches im aktuellen Thread bzw. Task umgangen werden, z.B. damit
+        auch der Inhalts-Cache des DialogManagers bei einer Neugenerierung übersprungen wird.
+        """
+        return not self._use_cached()
+
+    @staticmethod
+    def _replay_cached(response: str, callbacks: Optional[List[BaseCallbackHandler]]) -> str:
+        """Reicht eine Antwort aus dem Cache an die Callbacks weiter, als wäre sie gestreamt worden."""
+        for handler in callbacks or []:
+            try:
+                handler.on_llm_new_token(response)
+                handler.on_llm_end(None)
+            except Exception as e:
+                logger.warning(f"Fehler im Callback für eine Antwort aus dem Cache: {e}")
+        set_span_attributes(cache="hit")
+        return response
+
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Gibt Statistiken des Antwort-Caches zurück.
+
+        Returns:
+            Dictionary mit Größen, Treffern und Fehlschlägen oder None ohne Cache
+        """
+        if self.response_cache is None:
+            return None
+        return dict(self.response_cache.get_stats(), bypass=self.cache_bypass)
+
+    def _enter_gateway(self, background: bool) -> bool:
+        """
+        Belegt einen freien Platz oder reiht den Aufruf in die Warteschlange ein.
+
+        Args:
+            background: Ob das Warteschlangenlimit ignoriert wird
+
+        Returns:
+            True, wenn ein Platz belegt wurde, False, wenn der Aufruf warten muss
+        """
+        with self._gateway_lock:
+            if self._slots.acquire(blocking=False):
+                self._active_calls += 1
+                LLM_QUEUE_WAIT.observe(0)
+                return True
+
+            if not background and self._waiting_calls >= self.max_queue:
+                self._rejected_calls += 1
+                LLM_REJECTED.inc(reason="queue_full")
+                raise LLMOverloadedError(f"LLM-Warteschlange voll ({self._waiting_calls} wartende Aufrufe)")
+
+            self._waiting_calls += 1
+            LLM_QUEUE_DEPTH.inc()
+            return False
+
+    def _leave_queue(self, acquired: bool, wait_time: float) -> None:
+        """Nimmt einen wartenden Aufruf aus der Warteschlange; ohne Platz wird er abgewiesen."""
+        LLM_QUEUE_WAIT.observe(wait_time)
+        set_span_attributes(queue_wait=wait_time)
+
+        with self._gateway_lock:
+            self._waiting_calls -= 1
+            LLM_QUEUE_DEPTH.dec()
+            if not acquired:
+                self._rejected_calls += 1
+                LLM_REJECTED.inc(reason="timeout")
+                raise LLMOverloadedError(f"Kein freier LLM-Platz nach {self.queue_timeout}s")
+            self._active_calls += 1
+
+    def _acquire_slot(self, background: bool = False) -> None:
+        """
+        Wartet auf einen freien Platz im Gateway oder löst LLMOverloadedError aus.
+
+        Args:
+            background: Ob ohne Warteschlangenlimit und Timeout gewartet wird
+        """
+        if self._enter_gateway(background):
+            return
+
+        start_time = time.time()
+        acquired = self._slots.acquire(timeout=None if background else self.queue_timeout)
+        self._leave_queue(acquired, time.time() - start_time)
+
+    async def _aacquire_slot(self) -> None:
+        """Wie _acquire_slot, wartet aber, ohne die Event-Loop zu blockieren."""
+        if self._enter_gateway(False):
+            return
+
+        # Das Semaphor wird mit den synchronen Aufrufen geteilt; _release_slot weckt die
+        # asynchron Wartenden über ein asyncio.Event, worauf sie es erneut versuchen
+        start_time = time.time()
+        deadline = start_time + self.queue_timeout
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._gateway_lock:
+            self._async_waiters.append(waiter)
+        acquired = False
+        try:
+            while True:
+                # Vor dem Versuch zurücksetzen, damit keine Freigabe verloren geht
+                waiter[1].clear()
+                acquired = self._slots.acquire(blocking=False)
+                remaining = deadline - time.time()
+                if acquired or remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Abgebrochener Aufruf: nur die Warteschlange verlassen
+            with self._gateway_lock:
+                self._async_waiters.remove(waiter)
+                self._waiting_calls -= 1
+                LLM_QUEUE_DEPTH.dec()
+            raise
+        with self._gateway_lock:
+            self._async_waiters.remove(waiter)
+        self._leave_queue(acquired, time.time() - start_time)
+
+    def _release_slot(self) -> None:
+        with self._gateway_lock:
+            self._active_calls -= 1
+            waiters = list(self._async_waiters)
+        self._slots.release()
+        for loop, released in waiters:
+            try:
+                loop.call_soon_threadsafe(released.set)
+            except RuntimeError:
+                # Die Event-Loop ist bereits geschlossen
+                pass
+
+    def _call_llm(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]] = None,
+                  output_format: Optional[str] = None) -> str:
+        """
+        Zentraler Aufruf des LLM. Alle Generierungen laufen über diese Methode.
+
+        Args:
+            prompt: Vollständiger Prompt
+            callbacks: Optionale Callback-Handler nur für diesen Aufruf (z.B. für Token-Streaming)
+            output_format: Optionales Ausgabeformat von Ollama (z.B. "json"); das Dummy-LLM ignoriert es
+
+        Returns:
+            Antwort des LLM
+        """
+        # Warten und Anfrage blockieren; auf dem eventlet-Hub laufen sie daher im Thread-Pool
+        background = getattr(self._local, "background", False)
+        return run_blocking(self._invoke_llm, prompt, callbacks, background, output_format)
+
+    def _invoke_llm(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]], background: bool,
+                    output_format: Optional[str] = None) -> str:
+        """Belegt einen Platz im Gateway und ruft das aktuelle LLM auf."""
+        llm = self.llm
+        backend = "dummy" if isinstance(llm, DummyLLM) else "ollama"
+        with span("llm.invoke", backend=backend, prompt_chars=len(prompt), output_format=output_format) as current:
+            callbacks, counter = self._count_tokens(callbacks)
+            response = self._invoke_backend(llm, backend, prompt, callbacks, background, output_format)
+            self._record_response(current, response, counter)
+            return response
+
+    def _invoke_backend(self, llm, backend: str, prompt: str, callbacks: Optional[List[BaseCallbackHandler]],
+                        background: bool, output_format: Optional[str] = None) -> str:
+        if isinstance(llm, DummyLLM) and not llm.latency:
+            # Das Dummy-LLM antwortet sofort und braucht keinen Platz im Gateway
+            FALLBACKS.inc(kind="dummy_llm")
+            with LLM_CALL_DURATION.time(backend="dummy"):
+                return llm.invoke(prompt, config={"callbacks": callbacks} if callbacks else None)
+
+        # Ein Dummy-LLM mit simulierter Antwortzeit belegt das Gateway wie Ollama
+        if backend == "dummy":
+            FALLBACKS.inc(kind="dummy_llm")
+
+        # Nur Antworten von Ollama werden zwischengespeichert, nie die des Fallbacks
+        cache_key = self._cache_key(prompt, output_format) if backend == "ollama" else None
+        if cache_key and self._use_cached():
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return self._replay_cached(cached, callbacks)
+
+        self._acquire_slot(background)
+        LLM_CALLS_IN_FLIGHT.inc()
+        try:
+            with LLM_CALL_DURATION.time(backend=backend):
+                if backend == "ollama":
+                    response = self._invoke_pool(prompt, callbacks, output_format)
+                elif callbacks:
+                    response = llm.invoke(prompt, config={"callbacks": callbacks})
+                else:
+                    response = llm.invoke(prompt)
+        finally:
+            LLM_CALLS_IN_FLIGHT.dec()
+            self._release_slot()
+
+        if cache_key:
+            self.response_cache.put(cache_key, response, self.model_name)
+        return response
+
+    def _invoke_pool(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]],
+                     output_format: Optional[str] = None) -> str:
+        """
+        Ruft den Ollama-Server mit den wenigsten laufenden Anfragen auf. Ist ein Server
+        nicht erreichbar, wird der Aufruf an den nächsten weitergegeben.
+        """
+        config = {"callbacks": callbacks} if callbacks else None
+        kwargs = {"format": output_format} if output_format else {}
+        failed = []
+        while True:
+            try:
+                with self.pool.lease(failed) as endpoint:
+                    set_span_attributes(endpoint=endpoint.name)
+                    return endpoint.llm.invoke(prompt, config=config, **kwargs)
+            except CONNECT_ERRORS as e:
+                failed.append(endpoint)
+                if len(failed) >= len(self.pool):
+                    raise
+                logger.warning(f"Ollama-Server {endpoint.name} nicht erreichbar, versuche einen anderen: {e}")
+
+    async def _ainvoke_pool(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]],
+                            output_format: Optional[str] = None) -> str:
+        """Asynchrone Variante von _invoke_pool auf Basis von ainvoke."""
+        config = {"callbacks": callbacks} if callbacks else None
+        kwargs = {"format": output_format} if output_format else {}
+        failed = []
+        while True:
+            try:
+                with self.pool.lease(failed) as endpoint:
+                    set_span_attributes(endpoint=endpoint.name)
+                    return await endpoint.llm.ainvoke(prompt, config=config, **kwargs)
+            except CONNECT_ERRORS as e:
+                failed.append(endpoint)
+                if len(failed) >= len(self.pool):
+                    raise
+                logger.warning(f"Ollama-Server {endpoint.name} nicht erreichbar, versuche einen anderen: {e}")
+
+    @staticmethod
+    def _count_tokens(callbacks: Optional[List[BaseCallbackHandler]]) -> Tuple[Optional[List[BaseCallbackHandler]], Any]:
+        """Ergänzt bei aktivem Tracing einen Handler, der die Tokens des Aufrufs zählt."""
+        if not tracing_enabled():
+            return callbacks, None
+        counter = TokenCountingHandler()
+        return list(callbacks or []) + [counter], counter
+
+    @staticmethod
+    def _record_response(current, response: Any, counter: Optional[TokenCountingHandler]) -> None:
+        """Hängt Antwortlänge und Tokenanzahl an den Span des Aufrufs."""
+        attributes = {"response_chars": len(response) if isinstance(response, str) else 0}
+        if counter is not None and counter.token_count:
+            attributes["completion_tokens"] = counter.token_count
+        current.set_attributes(**attributes)
+
+    async def _acall_llm(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]] = None,
+                         output_format: Optional[str] = None) -> str:
+        """
+        Asynchrone Variante von _call_llm auf Basis von ainvoke. Wartende Aufrufe
+        belegen keinen Thread.
+
+        Args:
+            prompt: Vollständiger Prompt
+            callbacks: Optionale Callback-Handler nur für diesen Aufruf
+            output_format: Optionales Ausgabeformat von Ollama (z.B. "json")
+
+        Returns:
+            Antwort des LLM
+        """
+        llm = self.llm
+        if isinstance(llm, DummyLLM):
+            # Das Dummy-LLM ist synchron
+            return await asyncio.to_thread(self._invoke_llm, prompt, callbacks, False, output_format)
+
+        with span("llm.invoke", backend="ollama", prompt_chars=len(prompt), output_format=output_format) as current:
+            # Der Speicher-Cache wird direkt gelesen, SQLite in einem Thread
+            cache_key = self._cache_key(prompt, output_format)
+            if cache_key and self._use_cached():
+                cached = self.response_cache.get_memory(cache_key)
+                if cached is None:
+                    cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+                if cached is not None:
+                    return self._replay_cached(cached, callbacks)
+
+            callbacks, counter = self._count_tokens(callbacks)
+            await self._aacquire_slot()
+            LLM_CALLS_IN_FLIGHT.inc()
+            try:
+                with LLM_CALL_DURATION.time(backend="ollama"):
+                    response = await self._ainvoke_pool(prompt, callbacks, output_format)
+            finally:
+                LLM_CALLS_IN_FLIGHT.dec()
+                self._release_slot()
+            if cache_key:
+                await asyncio.to_thread(self.response_cache.put, cache_key, response, self.model_name)
+            self._record_response(current, response, counter)
+            return response
+
+    def _run_steps(self, steps: Generator) -> Any:
+        """
+        Führt einen Ablauf synchron aus. Die Abläufe (_*_steps) liefern für jeden
+        LLM-Aufruf ein Tupel (prompt, callbacks) bzw. (prompt, callbacks, output_format)
+        und teilen sich so die Implementierung der synchronen und der asynchronen Methoden.
+        """
+        with span(self._span_name(steps)):
+            return run_steps(steps, lambda request: self._call_llm(*request))
+
+    async def _arun_steps(self, steps: Generator) -> Any:
+        """Führt einen Ablauf wie _run_steps aus, die LLM-Aufrufe aber mit ainvoke."""
+        with span(self._span_name(steps)):
+            return await arun_steps(steps, lambda request: self._acall_llm(*request))
+
+    @staticmethod
+    def _span_name(steps: Generator) -> str:
+        """Benennt den Span eines Ablaufs nach der Methode, z.B. _content_steps -> llm.content."""
+        name = steps.__name__.strip("_")
+        return f"llm.{name[:-len('_steps')] if name.endswith('_steps') else name}"
+
+    @timed(LLM_METHOD_DURATION, method="generate_text")
+    @traced("llm.generate_text")
+    def generate_text(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """
+        Generiert eine freie Antwort auf einen Prompt.
+
+        Args:
+            prompt: Vollständiger Prompt
+            callbacks: Optionale Callback-Handler nur für diesen Aufruf
+
+        Returns:
+            Antwort des LLM
+        """
+        return self._call_llm(prompt, callbacks)
+
+    @timed(LLM_METHOD_DURATION, method="generate_text")
+    @traced("llm.generate_text")
+    async def agenerate_text(self, prompt: str, callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Asynchrone Variante von generate_text."""
+        return await self._acall_llm(prompt, callbacks)
 
     def _create_question_generation_prompt(self) -> PromptTemplate:
         """
@@ -343,8 +915,65 @@ class LLMManager:
             input_variables=["section_type", "user_response"]
         )
         
+    def _create_structured_section_prompt(self) -> PromptTemplate:
+        """
+        Erstellt eine Prompt-Vorlage, die Schlüsselinformationen, Inhalt und Selbstprüfung
+        eines Abschnitts in einer einzigen JSON-Antwort anfordert.
+
+        Returns:
+            PromptTemplate Objekt
+        """
+        template = """
+        Erstelle in einem Durchgang den Abschnitt "{section_title}" eines E-Learning-Kurses zur Informationssicherheit für den Gesundheitsbereich und prüfe ihn selbst.
+
+        WICHTIG: Der gesamte Text MUSS auf Deutsch sein! Verwende durchgehend eine klare, präzise deutsche Sprache ohne Fachbegriffe aus dem Englischen.
+
+        Beschreibung des Abschnitts: {section_description}
+
+        Die Antwort des Kunden zu diesem Thema/Abschnitt war:
+        "{user_response}"
+
+        Kontext und weitere Informationen:
+        - Organisation: {organization}
+        - Zielgruppe: {audience}
+        - Dauer: {duration}
+        - Relevante Fachinformationen: {context_text}
+
+        Gehe in drei Schritten vor:
+
+        1. key_facts: Extrahiere 5-8 konkrete Schlüsselinformationen aus der Antwort des Kunden (medizinische Abläufe, Umgang mit Patientendaten, Kommunikationswege wie E-Mail, Telefon oder Fax, Sicherheitsrisiken). Bevorzuge Aspekte, die in der Antwort tatsächlich vorkommen, statt allgemeiner Annahmen.
+
+        2. content: Schreibe auf Basis dieser Schlüsselinformationen den Skriptabschnitt. Er soll:
+        - speziell auf das beschriebene Krankenhaus-Umfeld zugeschnitten sein und konkrete Beispiele aus dem Klinikalltag enthalten
+        - auf genau einen konkreten Bedrohungsvektor oder Sicherheitsaspekt fokussiert sein
+        - in einem direkten, anleitenden Ton geschrieben sein (wie ein Schulungsskript für ein Video), mit kurzen Absätzen, Aufzählungspunkten für Listen und Schritte und aktivierenden Verben
+        - dem Format des Abschnitts folgen:
+          "Threat Awareness / Bedrohungsbewusstsein": eine typische Arbeitssituation, in der ein Sicherheitsrisiko auftreten könnte
+          "Threat Identification / Bedrohungserkennung": konkrete Merkmale, an denen man die Bedrohung erkennt
+          "Threat Impact Assessment / Bedrohungsausmaß": mögliche Folgen für das Krankenhaus und die Patientenversorgung
+          "Tactic Choice / Taktische Maßnahmenauswahl": 2-3 konkrete Handlungsoptionen zur Bedrohungsabwehr
+          "Tactic Justification / Maßnahmenrechtfertigung": warum die Maßnahmen wirksam und angemessen sind
+          "Tactic Mastery / Maßnahmenbeherrschung": eine schrittweise Anleitung zur Umsetzung
+          "Tactic Check & Follow-Up / Anschlusshandlungen": weitere Maßnahmen nach dem Vorfall
+        - wo sinnvoll einen "Nice to know"-Abschnitt enthalten und für Personen ohne IT-Hintergrund verständlich sein
+
+        3. self_check: Prüfe den Inhalt gegen die Antwort des Kunden und die Fachinformationen auf nicht gestützte Aussagen, für den Krankenhaus-Kontext ungeeignete Empfehlungen, falsch verwendete Begriffe, Widersprüche zu bewährten Sicherheitspraktiken im Gesundheitswesen und fehlenden Bezug zum klinischen Alltag. Korrigiere gefundene Probleme direkt im Feld "content".
+        Setze "verdict" auf "ok", wenn keine Probleme gefunden wurden, und auf "revised", wenn du den Inhalt korrigiert hast. Liste die korrigierten Probleme in "issues" auf.
+
+        Antworte ausschließlich mit einem JSON-Objekt in genau dieser Form:
+        {{"key_facts": ["..."], "content": "...", "self_check": {{"verdict": "ok", "issues": []}}}}
+        """
+
+        return PromptTemplate(
+            template=template,
+            input_variables=["section_title", "section_description", "user_response",
+                             "organization", "audience", "duration", "context_text"]
+        )
+
+    @timed(LLM_METHOD_DURATION, method="generate_question")
     def generate_question(self, section_title: str, section_description: str,
-                         context_text: str, organization: str, audience: str) -> str:
+                         context_text: str, organization: str, audience: str,
+                         callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
         """
         Generiert eine Frage für einen Abschnitt der Vorlage.
 
@@ -354,11 +983,25 @@ class LLMManager:
             context_text: Kontextinformationen aus dem Retrieval
             organization: Art der Organisation
             audience: Zielgruppe für das Training
+            callbacks: Optionale Callback-Handler für das Token-Streaming
 
         Returns:
             Generierte Frage
         """
-
+        return self._run_steps(self._question_steps(
+            section_title, section_description, context_text, organization, audience, callbacks))
+
+    @timed(LLM_METHOD_DURATION, method="generate_question")
+    async def agenerate_question(self, section_title: str, section_description: str,
+                                 context_text: str, organization: str, audience: str,
+                                 callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Asynchrone Variante von generate_question."""
+        return await self._arun_steps(self._question_steps(
+            section_title, section_description, context_text, organization, audience, callbacks))
+
+    def _question_steps(self, section_title: str, section_description: str,
+                        context_text: str, organization: str, audience: str,
+                        callbacks: Optional[List[BaseCallbackHandler]]) -> Generator:
         try:
             # Formatiere den Prompt
             prompt = self.prompts["question_generation"].format(
@@ -372,7 +1015,7 @@ class LLMManager:
             )
             
             # Rufe das LLM auf
-            response = self.llm(prompt)
+            response = yield prompt, callbacks
             
             # Überprüfe Antworttyp
             if not isinstance(response, str):
@@ -386,9 +1029,11 @@ class LLMManager:
             # Fallback-Frage mit Fokus auf Gesundheitswesen
             return f"Wie gehen Sie in Ihrem Krankenhausalltag mit dem Thema {section_title} um? Können Sie konkrete Beispiele nennen?"
 
+    @timed(LLM_METHOD_DURATION, method="generate_content")
     def generate_content(self, section_title: str, section_description: str,
                         user_response: str, organization: str, audience: str,
-                        duration: str, context_text: str) -> str:
+                        duration: str, context_text: str,
+                        callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
         """
         Generiert Inhalte für einen Abschnitt des Trainings.
 
@@ -400,20 +1045,39 @@ class LLMManager:
             audience: Zielgruppe für das Training
             duration: Maximale Dauer des Trainings
             context_text: Kontextinformationen aus dem Retrieval
+            callbacks: Optionale Callback-Handler für das Token-Streaming
 
         Returns:
             Generierter Inhalt
         """
+        return self._run_steps(self._content_steps(
+            section_title, section_description, user_response, organization, audience,
+            duration, context_text, callbacks))
+
+    @timed(LLM_METHOD_DURATION, method="generate_content")
+    async def agenerate_content(self, section_title: str, section_description: str,
+                                user_response: str, organization: str, audience: str,
+                                duration: str, context_text: str,
+                                callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Asynchrone Variante von generate_content."""
+        return await self._arun_steps(self._content_steps(
+            section_title, section_description, user_response, organization, audience,
+            duration, context_text, callbacks))
+
+    def _content_steps(self, section_title: str, section_description: str,
+                       user_response: str, organization: str, audience: str,
+                       duration: str, context_text: str,
+                       callbacks: Optional[List[BaseCallbackHandler]]) -> Generator:
         try:
-            response = self.chains["content_generation"].run({
-                "section_title": section_title,
-                "section_description": section_description,
-                "user_response": user_response,
-                "organization": organization,
-                "audience": audience,
-                "duration": duration,
-                "context_text": context_text
-            })
+            response = yield self.prompts["content_generation"].format(
+                section_title=section_title,
+                section_description=section_description,
+                user_response=user_response,
+                organization=organization,
+                audience=audience,
+                duration=duration,
+                context_text=context_text
+            ), callbacks
             
             # Stelle sicher, dass wir einen String zurückgeben
             if not isinstance(response, str):
@@ -444,7 +1108,9 @@ class LLMManager:
             
             return fallback_content.strip()
 
-    def check_hallucinations(self, content: str, user_input: str, context_text: str) -> Tuple[bool, str]:
+    @timed(LLM_METHOD_DURATION, method="check_hallucinations")
+    def check_hallucinations(self, content: str, user_input: str, context_text: str,
+                             callbacks: Optional[List[BaseCallbackHandler]] = None) -> Tuple[bool, str]:
         """
         Überprüft den generierten Inhalt auf Halluzinationen.
 
@@ -452,23 +1118,35 @@ class LLMManager:
             content: Generierter Inhalt
             user_input: Ursprüngliche Benutzereingabe
             context_text: Kontextinformationen aus dem Retrieval
+            callbacks: Optionale Callback-Handler für das Streaming des korrigierten Inhalts
 
         Returns:
             Tuple aus (hat_probleme, korrigierter_inhalt)
         """
+        return self._run_steps(self._hallucination_check_steps(content, user_input, context_text, callbacks))
+
+    @timed(LLM_METHOD_DURATION, method="check_hallucinations")
+    async def acheck_hallucinations(self, content: str, user_input: str, context_text: str,
+                                    callbacks: Optional[List[BaseCallbackHandler]] = None) -> Tuple[bool, str]:
+        """Asynchrone Variante von check_hallucinations."""
+        return await self._arun_steps(self._hallucination_check_steps(content, user_input, context_text, callbacks))
+
+    def _hallucination_check_steps(self, content: str, user_input: str, context_text: str,
+                                   callbacks: Optional[List[BaseCallbackHandler]]) -> Generator:
         try:
-            response = self.chains["hallucination_check"].run({
-                "content": content,
-                "user_input": user_input,
-                "context_text": context_text
-            })
+            response = yield self.prompts["hallucination_check"].format(
+                content=content,
+                user_input=user_input,
+                context_text=context_text
+            ), None
 
             # Überprüfe, ob Probleme gefunden wurden
             hat_probleme = "KEINE_PROBLEME" not in response
 
             # Korrigiere den Inhalt basierend auf der Überprüfung
             if hat_probleme:
-                korrigierter_inhalt = self.generate_content_with_corrections(content, response)
+                CORRECTIONS.inc()
+                korrigierter_inhalt = yield from self._correction_steps(content, response, callbacks)
             else:
                 korrigierter_inhalt = content
 
@@ -479,17 +1157,30 @@ class LLMManager:
             # Bei einem Fehler nehmen wir an, dass es möglicherweise Probleme gibt, und geben den ursprünglichen Inhalt zurück
             return True, content
 
-    def generate_content_with_corrections(self, original_content: str, correction_feedback: str) -> str:
+    @timed(LLM_METHOD_DURATION, method="generate_content_with_corrections")
+    def generate_content_with_corrections(self, original_content: str, correction_feedback: str,
+                                          callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
         """
         Generiert korrigierten Inhalt basierend auf Feedback.
 
         Args:
             original_content: Ursprünglicher Inhalt
             correction_feedback: Feedback für die Korrektur
+            callbacks: Optionale Callback-Handler für das Token-Streaming
 
         Returns:
             Korrigierter Inhalt
         """
+        return self._run_steps(self._correction_steps(original_content, correction_feedback, callbacks))
+
+    @timed(LLM_METHOD_DURATION, method="generate_content_with_corrections")
+    async def agenerate_content_with_corrections(self, original_content: str, correction_feedback: str,
+                                                 callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Asynchrone Variante von generate_content_with_corrections."""
+        return await self._arun_steps(self._correction_steps(original_content, correction_feedback, callbacks))
+
+    def _correction_steps(self, original_content: str, correction_feedback: str,
+                          callbacks: Optional[List[BaseCallbackHandler]]) -> Generator:
         correction_prompt = f"""
         Überarbeite den folgenden E-Learning-Inhalt für ein Schulungsskript im Gesundheitsbereich basierend auf dem Feedback:
 
@@ -514,7 +1205,7 @@ class LLMManager:
         """
 
         try:
-            corrected_content = self.llm(correction_prompt)
+            corrected_content = yield correction_prompt, callbacks
             
             # Stelle sicher, dass wir einen String zurückgeben
             if not isinstance(corrected_content, str):
@@ -527,6 +1218,118 @@ class LLMManager:
             logger.error(f"Fehler bei der Inhaltskorrektur: {e}")
             return original_content
 
+    @timed(LLM_METHOD_DURATION, method="generate_section_structured")
+    def generate_section_structured(self, section_title: str, section_description: str,
+                                    user_response: str, organization: str, audience: str,
+                                    duration: str, context_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Erzeugt Schlüsselinformationen, Inhalt und Selbstprüfung eines Abschnitts mit
+        einem einzigen Aufruf im JSON-Format von Ollama, statt mit bis zu vier Aufrufen
+        (extract_key_information, generate_content, check_hallucinations und die Korrektur).
+
+        Args:
+            section_title: Titel des Abschnitts
+            section_description: Beschreibung des Abschnitts
+            user_response: Antwort des Benutzers
+            organization: Art der Organisation
+            audience: Zielgruppe
+            duration: Maximale Dauer
+            context_text: Kontextinformationen aus dem Retrieval
+
+        Returns:
+            Dictionary mit key_facts, content, verdict ("ok" oder "revised") und issues
+            oder None, wenn die Antwort ungültig ist und der Ablauf mit mehreren Aufrufen
+            verwendet werden muss
+        """
+        return self._run_steps(self._structured_section_steps(
+            section_title, section_description, user_response, organization, audience, duration, context_text))
+
+    @timed(LLM_METHOD_DURATION, method="generate_section_structured")
+    async def agenerate_section_structured(self, section_title: str, section_description: str,
+                                           user_response: str, organization: str, audience: str,
+                                           duration: str, context_text: str) -> Optional[Dict[str, Any]]:
+        """Asynchrone Variante von generate_section_structured."""
+        return await self._arun_steps(self._structured_section_steps(
+            section_title, section_description, user_response, organization, audience, duration, context_text))
+
+    def _structured_section_steps(self, section_title: str, section_description: str,
+                                  user_response: str, organization: str, audience: str,
+                                  duration: str, context_text: str) -> Generator:
+        try:
+            # Die Antwort ist JSON und wird daher nicht an den Client gestreamt
+            response = yield self.prompts["structured_section"].format(
+                section_title=section_title,
+                section_description=section_description,
+                user_response=user_response,
+                organization=organization,
+                audience=audience,
+                duration=duration,
+                context_text=context_text
+            ), None, "json"
+        except Exception as e:
+            logger.error(f"Fehler bei der strukturierten Inhaltsgenerierung: {e}")
+            FALLBACKS.inc(kind="structured_generation")
+            return None
+
+        result = self._parse_structured_section(response)
+        if result is None:
+            logger.warning("Strukturierte Antwort ungültig, verwende die Generierung mit mehreren Aufrufen")
+            FALLBACKS.inc(kind="structured_generation")
+            return None
+
+        if result["verdict"] == "revised":
+            CORRECTIONS.inc()
+        set_span_attributes(verdict=result["verdict"], key_facts=len(result["key_facts"]))
+        return result
+
+    @staticmethod
+    def _parse_structured_section(response: Any) -> Optional[Dict[str, Any]]:
+        """
+        Liest und validiert die JSON-Antwort der strukturierten Generierung.
+
+        Args:
+            response: Antwort des LLM
+
+        Returns:
+            Dictionary mit key_facts, content, verdict und issues oder None, wenn die
+            Antwort kein gültiges Objekt der erwarteten Form ist
+        """
+        if not isinstance(response, str):
+            return None
+
+        # Ohne JSON-Modus (z.B. ältere Ollama-Versionen) steht das Objekt mitunter in einem Codeblock
+        start, end = response.find("{"), response.rfind("}")
+        if start < 0 or end <= start:
+            return None
+        try:
+            data = json.loads(response[start:end + 1])
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        content = data.get("content")
+        key_facts = data.get("key_facts")
+        self_check = data.get("self_check")
+        if not isinstance(content, str) or len(content.strip()) < MIN_STRUCTURED_CONTENT_CHARS:
+            return None
+        if not isinstance(key_facts, list) or not isinstance(self_check, dict):
+            return None
+        verdict = str(self_check.get("verdict", "")).strip().lower()
+        if verdict not in ("ok", "revised"):
+            return None
+
+        issues = self_check.get("issues") or []
+        if not isinstance(issues, list):
+            issues = [issues]
+        return {
+            "key_facts": [str(fact).strip() for fact in key_facts if str(fact).strip()],
+            "content": content.strip(),
+            "verdict": verdict,
+            "issues": [str(issue).strip() for issue in issues if str(issue).strip()]
+        }
+
+    @timed(LLM_METHOD_DURATION, method="extract_key_information")
     def extract_key_information(self, section_type: str, user_response: str) -> List[str]:
         """
         Extrahiert Schlüsselinformationen aus der Antwort des Benutzers.
@@ -534,6 +1337,14 @@ class LLMManager:
         Returns:
             Liste von Schlüsselbegriffen als Strings
         """
+        return self._run_steps(self._key_information_steps(section_type, user_response))
+
+    @timed(LLM_METHOD_DURATION, method="extract_key_information")
+    async def aextract_key_information(self, section_type: str, user_response: str) -> List[str]:
+        """Asynchrone Variante von extract_key_information."""
+        return await self._arun_steps(self._key_information_steps(section_type, user_response))
+
+    def _key_information_steps(self, section_type: str, user_response: str) -> Generator:
         try:
             # Formatiere den Prompt
             prompt = self.prompts["key_info_extraction"].format(
@@ -542,7 +1353,7 @@ class LLMManager:
             )
             
             # Rufe das LLM auf
-            response = self.llm(prompt)
+            response = yield prompt, None
             
             # Überprüfe Antworttyp
             if not isinstance(response, str):
@@ -565,6 +1376,9 @@ class LLMManager:
             logger.error(f"Fehler bei der Extraktion von Schlüsselinformationen: {e}")
             return []  # Gib leere Liste als Fallback zurück
 
+    @timed(LLM_METHOD_DURATION, method="advanced_hallucination_detection")
+    @traced("llm.advanced_hallucination_detection",
+            attributes=lambda self, content: {"content_chars": len(content) if isinstance(content, str) else 0})
     def advanced_hallucination_detection(self, content: str) -> Dict[str, Any]:
         """
         Führt eine erweiterte Halluzinationserkennung durch.
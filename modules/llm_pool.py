@@ -0,0 +1,202 @@
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import httpx
+from langchain_ollama.llms import OllamaLLM
+
+from modules.metrics import LLM_ENDPOINT_CALLS, LLM_ENDPOINT_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+# Errors raised before a request reached the server; such calls can be retried on another endpoint
+CONNECT_ERRORS = (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class OllamaEndpoint:
+    """
+    One Ollama server of the pool.
+
+    The endpoint owns its OllamaLLM and thereby one sync and one async httpx
+    client, whose keep-alive connections are reused across requests.
+    """
+
+    def __init__(self, base_url: Optional[str], model_name: str, callbacks: Optional[List[Any]] = None,
+                 max_connections: int = 8, keepalive_expiry: float = 60, request_timeout: Optional[float] = None):
+        """
+        Initializes the OllamaEndpoint.
+
+        Args:
+            base_url: URL of the Ollama server (None uses the Ollama default)
+            model_name: Name of the model
+            callbacks: Callback handlers attached to every call
+            max_connections: Maximum number of open connections to the server
+            keepalive_expiry: Seconds an idle connection is kept open
+            request_timeout: Timeout of a request in seconds (None waits for long generations)
+        """
+        self.base_url = base_url
+        self.name = base_url or "default"
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                              keepalive_expiry=keepalive_expiry)
+        self.llm = OllamaLLM(
+            model=model_name,
+            base_url=base_url,
+            callbacks=callbacks,
+            client_kwargs={"limits": limits, "timeout": request_timeout}
+        )
+
+        # Routing state, guarded by the pool's lock
+        self.in_flight = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.suspended_until = 0.0
+
+        # Statistics
+        self.calls = 0
+        self.errors = 0
+        self.total_duration = 0.0
+        self.last_error = None
+        self.last_error_at = None
+
+    def is_available(self, now: float) -> bool:
+        """Whether requests are routed to the endpoint."""
+        return self.healthy and now >= self.suspended_until
+
+
+class OllamaPool:
+    """
+    Spreads LLM calls over several Ollama servers.
+
+    Each call goes to the available endpoint with the fewest outstanding
+    requests. An endpoint is taken out of rotation when the health monitor
+    reports it as down or after `failure_threshold` consecutive failed calls;
+    in the latter case it is tried again after `suspend_time` seconds.
+    """
+
+    def __init__(self, model_name: str, base_urls: List[Optional[str]], callbacks: Optional[List[Any]] = None,
+                 max_connections: int = 8, keepalive_expiry: float = 60, request_timeout: Optional[float] = None,
+                 failure_threshold: int = 3, suspend_time: float = 30):
+        """
+        Initializes the OllamaPool.
+
+        Args:
+            model_name: Name of the model
+            base_urls: URLs of the Ollama servers (None is the Ollama default)
+            callbacks: Callback handlers attached to every call
+            max_connections: Maximum number of open connections per server
+            keepalive_expiry: Seconds an idle connection is kept open
+            request_timeout: Timeout of a request in seconds
+            failure_threshold: Consecutive failed calls after which a server is suspended
+            suspend_time: Seconds a suspended server receives no calls
+        """
+        base_urls = list(dict.fromkeys(base_urls or [None]))
+        self.endpoints = [
+            OllamaEndpoint(base_url, model_name, callbacks, max_connections, keepalive_expiry, request_timeout)
+            for base_url in base_urls
+        ]
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.suspend_time = suspend_time
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _select(self, exclude: List[OllamaEndpoint]) -> OllamaEndpoint:
+        now = time.time()
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        available = [endpoint for endpoint in candidates if endpoint.is_available(now)]
+        # Without an available endpoint, trying one beats failing right away
+        candidates = available or candidates or self.endpoints
+        fewest = min(endpoint.in_flight for endpoint in candidates)
+        return random.choice([endpoint for endpoint in candidates if endpoint.in_flight == fewest])
+
+    @contextmanager
+    def lease(self, exclude: Optional[List[OllamaEndpoint]] = None):
+        """
+        Selects an endpoint for one call and records its outcome.
+
+        Args:
+            exclude: Endpoints that already failed for this call
+
+        Yields:
+            The selected OllamaEndpoint
+        """
+        with self._lock:
+            endpoint = self._select(exclude or [])
+            endpoint.in_flight += 1
+        LLM_ENDPOINT_IN_FLIGHT.inc(endpoint=endpoint.name)
+        start_time = time.time()
+        error = None
+        try:
+            yield endpoint
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Cancelled calls only release the endpoint
+            self._record(endpoint, time.time() - start_time, error)
+
+    def _record(self, endpoint: OllamaEndpoint, duration: float, error: Optional[Exception]) -> None:
+        LLM_ENDPOINT_IN_FLIGHT.dec(endpoint=endpoint.name)
+        LLM_ENDPOINT_CALLS.inc(endpoint=endpoint.name, result="error" if error else "ok")
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.calls += 1
+            endpoint.total_duration += duration
+            if error is None:
+                endpoint.consecutive_failures = 0
+                return
+
+            endpoint.errors += 1
+            endpoint.consecutive_failures += 1
+            endpoint.last_error = str(error)
+            endpoint.last_error_at = time.time()
+            if endpoint.consecutive_failures >= self.failure_threshold and len(self.endpoints) > 1:
+                endpoint.suspended_until = time.time() + self.suspend_time
+                logger.warning(f"Ollama endpoint {endpoint.name} suspended for {self.suspend_time}s "
+                               f"after {endpoint.consecutive_failures} failed calls: {error}")
+
+    def set_health(self, health: Dict[str, bool]) -> None:
+        """
+        Applies the result of a health check.
+
+        Args:
+            health: Whether the model is available, per endpoint name
+        """
+        with self._lock:
+            for endpoint in self.endpoints:
+                if endpoint.name not in health:
+                    continue
+                healthy = health[endpoint.name]
+                if healthy and not endpoint.healthy:
+                    logger.info(f"Ollama endpoint {endpoint.name} is available again")
+                    endpoint.consecutive_failures = 0
+                    endpoint.suspended_until = 0.0
+                elif not healthy and endpoint.healthy:
+                    logger.warning(f"Ollama endpoint {endpoint.name} is unavailable, routing around it")
+                endpoint.healthy = healthy
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """
+        Returns statistics per endpoint.
+
+        Returns:
+            One dictionary per endpoint with routing state, calls, errors and average duration
+        """
+        now = time.time()
+        with self._lock:
+            return [{
+                "endpoint": endpoint.name,
+                "available": endpoint.is_available(now),
+                "healthy": endpoint.healthy,
+                "suspended_for": max(0.0, endpoint.suspended_until - now),
+                "in_flight": endpoint.in_flight,
+                "calls": endpoint.calls,
+                "errors": endpoint.errors,
+                "average_duration": endpoint.total_duration / endpoint.calls if endpoint.calls else None,
+                "last_error": endpoint.last_error,
+                "last_error_at": endpoint.last_error_at
+            } for endpoint in self.endpoints]
@@ -0,0 +1,161 @@
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import contextvars
+import logging.handlers
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Structured fields attached to every record, either from the log context or via extra={...}
+CONTEXT_FIELDS = ("session_id", "section_id", "stage", "duration")
+
+_log_context = contextvars.ContextVar("log_context", default={})
+_listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attaches structured fields (e.g. session_id, section_id) to all records logged
+    within the block by the current thread, greenthread or asyncio task.
+
+    Args:
+        **fields: Field values
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the fields of the current log context onto the record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records of hot-path loggers.
+
+    Rates apply to a logger and its children; records at ERROR and above are
+    always kept.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        """
+        Initializes the SamplingFilter.
+
+        Args:
+            rates: Fraction of records to keep (0.0 - 1.0) per logger name
+        """
+        super().__init__()
+        self.rates = {name: max(0.0, min(1.0, float(rate))) for name, rate in (rates or {}).items()}
+        self._resolved = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            # The most specific configured logger wins
+            for candidate, candidate_rate in sorted(self.rates.items(), key=lambda item: -len(item[0])):
+                if name == candidate or name.startswith(candidate + "."):
+                    rate = candidate_rate
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = round(value, 4) if key == "duration" else value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = "INFO", json_format: bool = False,
+                      sampling: Optional[Dict[str, float]] = None, log_file: Optional[str] = None) -> None:
+    """
+    Routes all log records through a queue to a listener thread.
+
+    Callers (request handlers, token callbacks) only enqueue the record; formatting
+    and writing happen on the listener thread, so log I/O adds no latency to the
+    hot path. Replaces the handlers installed by logging.basicConfig.
+
+    Args:
+        level: Level of the root logger
+        json_format: Whether records are written as structured JSON lines
+        sampling: Fraction of records to keep per logger name, e.g. {"modules.llm_manager": 0.1}
+        log_file: Optional file that records are written to in addition to stderr
+    """
+    global _listener
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Never blocks: SimpleQueue is unbounded and lock-free for put()
+    record_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(record_queue)
+    queue_handler.addFilter(SamplingFilter(sampling))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    stop_listener()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(record_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    logger.info(f"Logging pipeline configured ({'json' if json_format else 'text'} format)")
+
+
+def stop_listener() -> None:
+    """Writes the queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_listener)
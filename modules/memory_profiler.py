@@ -0,0 +1,172 @@
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Traces of these files are the profiler's own bookkeeping
+IGNORED_TRACES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+]
+
+
+def deep_sizeof(obj: Any, max_depth: int = 32) -> int:
+    """
+    Approximates the memory held by an object and everything it references.
+
+    Follows containers and instance attributes; objects shared between several
+    references are counted once. Modules, classes and functions are not followed.
+
+    Args:
+        obj: Object to measure
+        max_depth: Maximum nesting depth that is followed
+
+    Returns:
+        Approximate size in bytes
+    """
+    seen = set()
+    total = 0
+    stack = [(obj, 0)]
+
+    while stack:
+        current, depth = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(current))
+
+        try:
+            total += sys.getsizeof(current)
+            if depth >= max_depth or isinstance(current, (str, bytes, bytearray, int, float, bool)):
+                continue
+
+            # Snapshot the children: the object may be changed by a running turn meanwhile
+            if isinstance(current, dict):
+                children = [item for pair in list(current.items()) for item in pair]
+            elif isinstance(current, (list, tuple, set, frozenset)) or hasattr(current, "maxlen"):
+                children = list(current)
+            elif hasattr(current, "__dict__"):
+                children = [current.__dict__]
+            else:
+                children = []
+        except Exception:
+            continue
+
+        stack.extend((child, depth + 1) for child in children)
+
+    return total
+
+
+class MemoryProfiler:
+    """
+    Controls tracemalloc at runtime and compares snapshots of the heap.
+
+    Tracing slows down allocations noticeably, so it is only enabled on demand.
+    """
+
+    def __init__(self):
+        """Initializes the MemoryProfiler."""
+        self.baseline = None
+        self.previous = None
+        self.started_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_tracing(self) -> bool:
+        """Whether tracemalloc is currently tracing allocations."""
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 25) -> None:
+        """
+        Starts tracing and takes the baseline snapshot.
+
+        Args:
+            frames: Number of frames stored per allocation traceback
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, int(frames)))
+                self.started_at = time.time()
+            self.baseline = self._take_snapshot()
+            self.previous = self.baseline
+        logger.info(f"tracemalloc started with {tracemalloc.get_traceback_limit()} frames")
+
+    def stop(self) -> None:
+        """Stops tracing and releases the traces and snapshots."""
+        with self._lock:
+            tracemalloc.stop()
+            self.baseline = None
+            self.previous = None
+            self.started_at = None
+        logger.info("tracemalloc stopped")
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> Dict[str, Any]:
+        """
+        Takes a snapshot and reports the top allocation sites.
+
+        Args:
+            limit: Number of allocation sites per list
+            key_type: Grouping of the allocations ("lineno", "filename" or "traceback")
+
+        Returns:
+            Top allocation sites and the largest growth since the previous snapshot
+            and since tracing was started
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not tracing, start it first")
+
+            snapshot = self._take_snapshot()
+            report = {
+                "top": self._format_stats(snapshot.statistics(key_type)[:limit]),
+                "since_previous": self._format_stats(snapshot.compare_to(self.previous, key_type)[:limit]),
+                "since_start": self._format_stats(snapshot.compare_to(self.baseline, key_type)[:limit])
+            }
+            self.previous = snapshot
+            return report
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Returns the tracing state.
+
+        Returns:
+            Dictionary with tracing flag, traced memory and tracing duration
+        """
+        status = {"tracing": tracemalloc.is_tracing()}
+        if status["tracing"]:
+            current, peak = tracemalloc.get_traced_memory()
+            status.update({
+                "traced_bytes": current,
+                "traced_peak_bytes": peak,
+                "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+                "frames": tracemalloc.get_traceback_limit(),
+                "tracing_for": time.time() - self.started_at if self.started_at else None
+            })
+        return status
+
+    @staticmethod
+    def _take_snapshot():
+        return tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+
+    @staticmethod
+    def _format_stats(stats: List[Any]) -> List[Dict[str, Any]]:
+        formatted = []
+        for stat in stats:
+            entry = {
+                "site": str(stat.traceback[0]) if len(stat.traceback) else "<unknown>",
+                "size_bytes": stat.size,
+                "count": stat.count
+            }
+            if hasattr(stat, "size_diff"):
+                entry["size_diff_bytes"] = stat.size_diff
+                entry["count_diff"] = stat.count_diff
+            if len(stat.traceback) > 1:
+                entry["traceback"] = [str(frame) for frame in stat.traceback]
+            formatted.append(entry)
+        return formatted
+
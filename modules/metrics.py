@@ -0,0 +1,399 @@
+import math
+import time
+import inspect
+import logging
+import threading
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Buckets in seconds, from fast retrievals up to long LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def read_process_rss() -> int:
+    """
+    Returns the resident set size of the current process.
+
+    Returns:
+        RSS in bytes (peak RSS where /proc is not available)
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    """Base class of all metrics: holds one value per label combination."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+        # Unlabelled metrics are exported from the start, not only after the first update
+        if not self.labelnames:
+            self._values[()] = self._initial_value()
+
+    def _initial_value(self):
+        return 0
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increments the counter.
+
+        Args:
+            amount: Increment, must not be negative
+            **labels: Label values
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Returns the current value for the given labels."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or is read from a function when rendered."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        """Sets the gauge to a value."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increments the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrements the gauge."""
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        """Returns the current value for the given labels."""
+        if self._function is not None:
+            return self._function()
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Reads the value of an unlabelled gauge from a function whenever it is rendered.
+
+        Args:
+            function: Callable returning the current value
+        """
+        self._function = function
+
+    def _render_samples(self) -> List[str]:
+        if self._function is None:
+            return super()._render_samples()
+        try:
+            value = self._function()
+        except Exception as e:
+            logger.warning(f"Could not read gauge {self.name}: {e}")
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, labelnames)
+
+    def _initial_value(self):
+        return {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Records one observation.
+
+        Args:
+            value: Observed value (e.g. a duration in seconds)
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._initial_value()
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """
+        Returns a context manager that observes the duration of its block.
+
+        Args:
+            **labels: Label values
+        """
+        return _Timer(self, labels)
+
+    def get(self, **labels) -> Dict[str, float]:
+        """Returns count and sum for the given labels."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {"count": state["count"], "sum": state["sum"]} if state else {"count": 0, "sum": 0.0}
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state["counts"]))) for key, state in self._values.items())
+
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start_time, **self.labels)
+        return False
+
+
+class StageTimer:
+    """
+    Times consecutive stages of a pipeline: starting a stage ends the previous one.
+    """
+
+    def __init__(self, histogram: Histogram):
+        """
+        Initializes the StageTimer.
+
+        Args:
+            histogram: Histogram with a single "stage" label
+        """
+        self.histogram = histogram
+        self.stage = None
+        self.start_time = None
+
+    def start(self, stage: str) -> None:
+        """Ends the current stage and starts the next one."""
+        self.stop()
+        self.stage = stage
+        self.start_time = time.perf_counter()
+
+    def stop(self) -> None:
+        """Ends the current stage."""
+        if self.stage is not None:
+            duration = time.perf_counter() - self.start_time
+            self.histogram.observe(duration, stage=self.stage)
+            logger.info(f"Stage {self.stage} finished", extra={"stage": self.stage, "duration": duration})
+            self.stage = None
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """
+    Decorator that observes the duration of every call of the decorated function
+    (or coroutine function).
+
+    Args:
+        histogram: Histogram to record into
+        **labels: Label values
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """Collects metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        """Initializes the MetricsRegistry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Adds a metric to the registry.
+
+        Args:
+            metric: Metric to register
+
+        Returns:
+            The registered metric
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Creates and registers a counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Creates and registers a gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Creates and registers a histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Renders all metrics.
+
+        Returns:
+            Metrics in the Prometheus text format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the metrics of the application
+REGISTRY = MetricsRegistry()
+
+LLM_METHOD_DURATION = REGISTRY.histogram(
+    "elearning_llm_method_duration_seconds", "Duration of LLMManager methods", ["method"])
+LLM_CALL_DURATION = REGISTRY.histogram(
+    "elearning_llm_call_duration_seconds", "Duration of single LLM requests", ["backend"])
+LLM_CALLS_IN_FLIGHT = REGISTRY.gauge(
+    "elearning_llm_calls_in_flight", "LLM requests currently running")
+RETRIEVAL_DURATION = REGISTRY.histogram(
+    "elearning_retrieval_duration_seconds", "Duration of vector store retrieval calls", ["method"])
+LLM_ENDPOINT_CALLS = REGISTRY.counter(
+    "elearning_llm_endpoint_calls_total", "LLM requests per Ollama server", ["endpoint", "result"])
+LLM_ENDPOINT_IN_FLIGHT = REGISTRY.gauge(
+    "elearning_llm_endpoint_in_flight", "LLM requests currently running per Ollama server", ["endpoint"])
+LLM_QUEUE_DEPTH = REGISTRY.gauge(
+    "elearning_llm_queue_depth", "LLM requests waiting for a free slot")
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "elearning_llm_queue_wait_seconds", "Time LLM requests waited for a free slot")
+LLM_REJECTED = REGISTRY.counter(
+    "elearning_llm_rejected_total", "LLM requests rejected by admission control", ["reason"])
+SECTION_STAGE_DURATION = REGISTRY.histogram(
+    "elearning_section_stage_duration_seconds", "Duration of the stages of section content generation", ["stage"])
+TURN_DURATION = REGISTRY.histogram(
+    "elearning_turn_duration_seconds", "Duration of processing one user message")
+FALLBACKS = REGISTRY.counter(
+    "elearning_fallbacks_total", "Answers produced by a fallback path", ["kind"])
+CORRECTIONS = REGISTRY.counter(
+    "elearning_content_corrections_total", "Content corrections triggered by the hallucination check")
+SCRIPTS_GENERATED = REGISTRY.counter(
+    "elearning_scripts_generated_total", "Generated e-learning scripts")
+RENDER_CACHE = REGISTRY.counter(
+    "elearning_render_cache_total", "Lookups of assembled and rendered scripts", ["result"])
+LLM_CACHE = REGISTRY.counter(
+    "elearning_llm_cache_total", "Lookups of the LLM response cache", ["result"])
+CONTENT_CACHE = REGISTRY.counter(
+    "elearning_content_cache_total", "Lookups of the semantic section content cache", ["result"])
+SPECULATIVE_QUESTIONS = REGISTRY.counter(
+    "elearning_speculative_questions_total", "Claims of questions generated ahead of time", ["result"])
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "elearning_active_sessions", "Sessions held in memory by this process")
+PROCESS_RSS = REGISTRY.gauge(
+    "elearning_process_resident_memory_bytes", "Resident memory of this process")
+PROCESS_RSS.set_function(read_process_rss)
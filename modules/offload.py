@@ -0,0 +1,232 @@
+import logging
+import threading
+import contextvars
+from collections import deque
+from functools import wraps
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Set by configure_offloading() when the server runs on the eventlet hub
+_tpool = None
+_hub_thread_id = None
+_get_ident = threading.get_ident
+_hub_calls = None
+_green_event = None
+_current_greenlet = None
+
+
+def configure_offloading(async_mode: str, pool_size: int = 20) -> bool:
+    """
+    Routes blocking calls made on the eventlet hub through eventlet's OS thread pool.
+
+    Every greenthread runs on the hub's OS thread, so a blocking embedding pass,
+    FAISS search or Ollama request would freeze all socket connections until it
+    returns. Must be called on the thread that runs the server.
+
+    Args:
+        async_mode: Async mode chosen by Flask-SocketIO
+        pool_size: Number of OS threads for blocking calls
+
+    Returns:
+        True if offloading is enabled
+    """
+    global _tpool, _hub_thread_id, _get_ident, _hub_calls, _green_event, _current_greenlet
+
+    if async_mode != "eventlet":
+        logger.info(f"Async mode {async_mode}: blocking calls run on the request thread")
+        return False
+
+    import eventlet
+    import greenlet
+    from eventlet import event, patcher, tpool
+
+    # The unpatched modules identify OS threads even if threading is monkey patched
+    _get_ident = patcher.original("threading").get_ident
+    _hub_calls = patcher.original("queue").Queue()
+
+    # One pool thread waits for calls handed to the hub, the others run blocking calls
+    pool_size = max(2, int(pool_size))
+    tpool.set_num_threads(pool_size)
+    _green_event = event.Event
+    _current_greenlet = greenlet.getcurrent
+    _tpool = tpool
+    _hub_thread_id = _get_ident()
+    eventlet.spawn(_run_hub_calls)
+
+    logger.info(f"Blocking calls are offloaded to a pool of {pool_size} threads")
+    return True
+
+
+def on_hub_thread() -> bool:
+    """Checks whether the caller runs on the eventlet hub and must not block."""
+    return _tpool is not None and _get_ident() == _hub_thread_id
+
+
+def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a blocking function without blocking the eventlet hub.
+
+    On the hub thread the call is executed in the thread pool while the calling
+    greenthread yields. Everywhere else (worker threads, batch runs, the threading
+    async mode) it is called directly.
+
+    Args:
+        func: Function to run
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+
+    Returns:
+        Return value of the function; its exceptions are re-raised
+    """
+    if not on_hub_thread():
+        return func(*args, **kwargs)
+    # The pool thread sees the caller's context variables (e.g. the log context)
+    return _tpool.execute(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def offloaded(func: Callable) -> Callable:
+    """Decorator that runs every call of a blocking function via run_blocking()."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_blocking(func, *args, **kwargs)
+    return wrapper
+
+
+def call_on_hub(func: Callable, *args, **kwargs) -> None:
+    """
+    Runs a function on the eventlet hub, e.g. a Socket.IO emit from a pool or worker
+    thread (eventlet's sockets and queues must only be used from the hub).
+    The call is asynchronous when made from another thread.
+
+    Args:
+        func: Function to run
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+    """
+    if _tpool is None or on_hub_thread():
+        func(*args, **kwargs)
+    else:
+        _hub_calls.put((func, args, kwargs))
+
+
+def _run_hub_calls() -> None:
+    while True:
+        # Waiting in a pool thread lets the hub serve other greenthreads meanwhile
+        func, args, kwargs = _tpool.execute(_hub_calls.get)
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Error in call handed to the eventlet hub: {e}")
+
+
+class HubSafeRLock:
+    """
+    Reentrant lock that also excludes greenthreads from each other.
+
+    All greenthreads run on the hub's OS thread, so a threading.RLock treats them
+    as one owner; and a greenthread blocking on a plain lock would freeze the hub
+    while the owner waits in the thread pool. Greenthreads are therefore told
+    apart by their greenlet and wait on an eventlet event that release() sends,
+    so the hub keeps serving others and only the next waiter is woken.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._released = threading.Condition(self._mutex)
+        self._green_waiters = deque()
+        self._owner = None
+        self._count = 0
+
+    @staticmethod
+    def _current_owner():
+        if on_hub_thread():
+            return ("greenlet", id(_current_greenlet()))
+        return ("thread", _get_ident())
+
+    def _try_acquire(self, owner) -> bool:
+        if self._owner is None or self._owner == owner:
+            self._owner = owner
+            self._count += 1
+            return True
+        return False
+
+    def acquire(self) -> bool:
+        owner = self._current_owner()
+        if owner[0] == "greenlet":
+            while True:
+                with self._mutex:
+                    if self._try_acquire(owner):
+                        return True
+                    waiter = _green_event()
+                    self._green_waiters.append(waiter)
+                try:
+                    waiter.wait()
+                except BaseException:
+                    # A killed waiter passes a wakeup it already received on to the next one
+                    with self._mutex:
+                        if waiter in self._green_waiters:
+                            self._green_waiters.remove(waiter)
+                            waiter = None
+                        elif self._owner is None:
+                            waiter = self._next_green_waiter()
+                        else:
+                            waiter = None
+                    if waiter is not None:
+                        call_on_hub(waiter.send)
+                    raise
+
+        with self._released:
+            while not self._try_acquire(owner):
+                self._released.wait()
+        return True
+
+    def _next_green_waiter(self):
+        return self._green_waiters.popleft() if self._green_waiters else None
+
+    def release(self) -> None:
+        waiter = None
+        with self._released:
+            if self._owner != self._current_owner():
+                raise RuntimeError("Cannot release a lock that is owned by someone else")
+            self._count -= 1
+            if self._count == 0:
+                self._owner = None
+                self._released.notify()
+                waiter = self._next_green_waiter()
+        if waiter is not None:
+            # eventlet events must be sent on the hub, the owner may be a pool thread
+            call_on_hub(waiter.send)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+def wait_future(future, timeout: float = None) -> Any:
+    """
+    Waits for a concurrent.futures.Future without blocking the eventlet hub.
+
+    On the hub the calling greenthread sleeps on an eventlet event that the future
+    completes, so waiting turns cost neither a hub stall nor a pool thread.
+
+    Args:
+        future: Future to wait for
+        timeout: Maximum time in seconds (None waits indefinitely)
+
+    Returns:
+        Result of the future; its exception is re-raised
+    """
+    if not on_hub_thread():
+        return future.result(timeout)
+
+    from eventlet import event, timeout as eventlet_timeout
+
+    done = event.Event()
+    future.add_done_callback(lambda _: call_on_hub(done.send))
+    with eventlet_timeout.Timeout(timeout, TimeoutError):
+        done.wait()
+    return future.result(0)
@@ -0,0 +1,213 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from modules.offload import on_hub_thread
+
+logger = logging.getLogger(__name__)
+
+# Deepest call stack recorded per sample
+MAX_STACK_DEPTH = 128
+
+
+class SamplingProfiler:
+    """
+    Samples the call stack of one thread or eventlet greenthread at a fixed interval.
+
+    The samples are aggregated as folded stacks ("outer;inner count" per line), the
+    input format of flamegraph.pl and speedscope. A greenthread that waits for a
+    pool thread (embedding, FAISS, Ollama) is sampled at the call that offloaded
+    the work, so waiting time is attributed to its caller.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initializes the SamplingProfiler.
+
+        Args:
+            interval: Seconds between two samples
+        """
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._target_thread = None
+        self._target_greenlet = None
+
+    def start(self) -> None:
+        """Starts sampling the calling thread or greenthread."""
+        self._target_thread = threading.get_ident()
+        if on_hub_thread():
+            import greenlet
+            self._target_greenlet = greenlet.getcurrent()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """
+        Stops sampling.
+
+        Returns:
+            Number of samples per folded stack
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def _current_frame(self):
+        # A suspended greenthread keeps its frame, the running one is the hub thread's frame
+        if self._target_greenlet is not None:
+            if self._target_greenlet.dead:
+                return None
+            frame = self._target_greenlet.gr_frame
+            if frame is not None:
+                return frame
+        return sys._current_frames().get(self._target_thread)
+
+    def _run(self) -> None:
+        own_file = __file__
+        while not self._stop.wait(self.interval):
+            frame = self._current_frame()
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                if code.co_filename != own_file:
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+                self.sample_count += 1
+
+
+class RequestProfiler:
+    """
+    Profiles selected requests on demand and saves their folded stacks.
+
+    Nothing is sampled until the profiler is armed for the next N requests, so
+    the check per request is a single comparison while it is disabled.
+    """
+
+    def __init__(self, profiles_dir: str, interval: float = 0.005):
+        """
+        Initializes the RequestProfiler.
+
+        Args:
+            profiles_dir: Directory the profiles are written to
+            interval: Seconds between two samples
+        """
+        self.profiles_dir = profiles_dir
+        self.interval = interval
+        self.remaining = 0
+        self.endpoints = None
+        self._lock = threading.Lock()
+
+    def arm(self, count: int, endpoints: Optional[List[str]] = None) -> None:
+        """
+        Profiles the next requests.
+
+        Args:
+            count: Number of requests to profile (0 disarms the profiler)
+            endpoints: Endpoint names to profile, None for every profiled endpoint
+        """
+        with self._lock:
+            self.endpoints = set(endpoints) if endpoints else None
+            self.remaining = max(0, int(count))
+        logger.info(f"Profiling the next {self.remaining} requests of {sorted(self.endpoints) if self.endpoints else 'all endpoints'}")
+
+    def claim(self, endpoint: str) -> bool:
+        """
+        Checks whether a request is to be profiled and counts it.
+
+        Args:
+            endpoint: Endpoint name of the request
+
+        Returns:
+            True if the request is to be profiled
+        """
+        if self.remaining <= 0:
+            return False
+        with self._lock:
+            if self.remaining <= 0 or (self.endpoints is not None and endpoint not in self.endpoints):
+                return False
+            self.remaining -= 1
+            return True
+
+    @contextmanager
+    def profile(self, endpoint: str, tags: Dict[str, Any]):
+        """
+        Samples the block and writes the profile afterwards.
+
+        Args:
+            endpoint: Endpoint name of the request
+            tags: Dictionary the caller can complete (e.g. session_id, section_id)
+                  before the profile is written
+        """
+        profiler = SamplingProfiler(self.interval)
+        started_at = time.time()
+        profiler.start()
+        try:
+            yield tags
+        finally:
+            samples = profiler.stop()
+            self._save(endpoint, tags, samples, time.time() - started_at)
+
+    def _save(self, endpoint: str, tags: Dict[str, Any], samples: Counter, duration: float) -> Optional[str]:
+        try:
+            os.makedirs(self.profiles_dir, exist_ok=True)
+            parts = [datetime.now().strftime("%Y%m%d_%H%M%S_%f"), endpoint]
+            parts += [str(tags[key]) for key in ("session_id", "section_id") if tags.get(key)]
+            name = re.sub(r"[^A-Za-z0-9_.-]", "_", "_".join(parts))
+            path = os.path.join(self.profiles_dir, f"{name}.folded")
+
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+
+            metadata = {
+                "endpoint": endpoint,
+                "duration": round(duration, 4),
+                "samples": sum(samples.values()),
+                "interval": self.interval,
+                **tags
+            }
+            with open(os.path.join(self.profiles_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
+
+            logger.info(f"Saved profile of {endpoint} ({duration:.2f}s, {metadata['samples']} samples) to {path}")
+            return path
+        except Exception as e:
+            logger.error(f"Error saving profile: {e}")
+            return None
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """
+        Lists the saved profiles, newest first.
+
+        Returns:
+            Metadata of the profiles including the file name of the folded stacks
+        """
+        profiles = []
+        if not os.path.isdir(self.profiles_dir):
+            return profiles
+
+        for filename in sorted(os.listdir(self.profiles_dir), reverse=True):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.profiles_dir, filename), "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+                metadata["file"] = filename[:-len(".json")] + ".folded"
+                profiles.append(metadata)
+            except Exception as e:
+                logger.warning(f"Error reading profile {filename}: {e}")
+        return profiles
@@ -0,0 +1,455 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.session_store import SessionStore, MemorySessionStore, MERGED_STATE_KEYS
+from modules.offload import HubSafeRLock
+from modules.memory_profiler import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """
+    Holds everything that belongs to one interview: its own DialogManager,
+    the chat transcript and bookkeeping for eviction.
+    """
+
+    def __init__(self, session_id: str, dialog_manager):
+        """
+        Initializes the Session.
+
+        Args:
+            session_id: Unique session identifier
+            dialog_manager: DialogManager instance owned by this session
+        """
+        self.session_id = session_id
+        self.dialog_manager = dialog_manager
+        self.messages: List[Dict[str, str]] = []
+        self.script_generated = False
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.approx_size = 0
+
+        # Revision of the stored record this copy corresponds to
+        self.revision = 0
+
+        # Serializes turns of the same session (e.g. double clicks), also between greenthreads
+        self.lock = HubSafeRLock()
+
+    def touch(self) -> None:
+        """Marks the session as recently used."""
+        self.last_access = time.time()
+
+    def estimate_size(self) -> int:
+        """
+        Estimates the memory held by this session in bytes.
+
+        Returns:
+            Approximate size of transcript and conversation state
+        """
+        try:
+            payload = json.dumps({
+                "messages": self.messages,
+                "conversation_state": self.dialog_manager.conversation_state
+            }, ensure_ascii=False, default=str)
+            self.approx_size = len(payload.encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Could not estimate size of session {self.session_id}: {e}")
+        return self.approx_size
+
+    def measure_memory(self) -> Dict[str, Any]:
+        """
+        Measures the memory held by this session object by object, which is more
+        precise (and slower) than estimate_size().
+
+        Returns:
+            Bytes held by transcript, conversation state and render cache
+        """
+        sizes = {"messages": deep_sizeof(self.messages), **self.dialog_manager.estimate_memory()}
+        return {
+            "session_id": self.session_id,
+            **sizes,
+            "total_bytes": sum(sizes.values()),
+            "estimated_bytes": self.approx_size,
+            "idle_for": time.time() - self.last_access
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Serializes the session for the session store.
+
+        Returns:
+            Session record
+        """
+        # Background jobs only hand over their results; they are applied here, under the session lock
+        self.dialog_manager.apply_section_results()
+        # Copy one level deeper so the record is not changed while it is encoded
+        state = {
+            key: dict(value) if isinstance(value, dict) else list(value) if isinstance(value, list) else value
+            for key, value in self.dialog_manager.conversation_state.items()
+        }
+        return {
+            "session_id": self.session_id,
+            "revision": self.revision,
+            "created_at": self.created_at,
+            "last_access": self.last_access,
+            "script_generated": self.script_generated,
+            "messages": list(self.messages),
+            "conversation_state": state
+        }
+
+    def apply_record(self, record: Dict[str, Any]) -> None:
+        """
+        Replaces the local state with a record loaded from the session store.
+
+        Args:
+            record: Session record
+        """
+        self.dialog_manager.conversation_state = record["conversation_state"]
+        self.dialog_manager.invalidate_render_cache()
+        self.messages = record["messages"]
+        self.script_generated = record["script_generated"]
+        self.created_at = record["created_at"]
+        self.last_access = max(self.last_access, record["last_access"])
+        self.revision = record["revision"]
+
+
+class SessionManager:
+    """
+    Registry that gives each conversation its own DialogManager.
+
+    The expensive components (LLMManager, VectorStoreManager, TemplateManager)
+    are shared; only the lightweight per-conversation state is created per
+    session. Idle sessions are evicted by TTL and in LRU order once the
+    session count or the approximate memory cap is exceeded.
+
+    Every turn is written to a SessionStore. The in-memory registry is only a
+    cache of live DialogManagers: a session that is unknown or stale in this
+    process is restored from the store, so any worker process sharing the
+    store can continue any conversation.
+    """
+
+    def __init__(self, dialog_manager_factory: Callable[[str], Any], max_sessions: int = 100,
+                 session_ttl: int = 3600, memory_limit_mb: float = 256,
+                 store: Optional[SessionStore] = None):
+        """
+        Initializes the SessionManager.
+
+        Args:
+            dialog_manager_factory: Callable taking a session ID and returning a fresh DialogManager
+            max_sessions: Maximum number of sessions kept in memory
+            session_ttl: Seconds of inactivity after which a session is evicted
+            memory_limit_mb: Approximate memory cap for all sessions in megabytes
+            store: SessionStore persisting the sessions (defaults to an in-process store)
+        """
+        self.dialog_manager_factory = dialog_manager_factory
+        self.max_sessions = max(1, int(max_sessions))
+        self.session_ttl = session_ttl
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else 0
+        self.store = store if store is not None else MemorySessionStore(ttl=session_ttl)
+
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.evicted_count = 0
+
+    def create_session(self, session_id: str = None) -> Session:
+        """
+        Creates a new session with its own DialogManager.
+
+        Args:
+            session_id: Optional session ID, a random one is generated otherwise
+
+        Returns:
+            The new Session
+        """
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+
+        session = Session(session_id, self.dialog_manager_factory(session_id))
+        session.revision = self.store.save(session.to_record(), merge=False)
+
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+        logger.info(f"Session {session_id} created ({len(self._sessions)} active)")
+        return session
+
+    def get_session(self, session_id: str, refresh: bool = True) -> Optional[Session]:
+        """
+        Returns a session and marks it as recently used.
+
+        Args:
+            session_id: Session ID
+            refresh: Reload the local copy if another process has written a newer
+                revision. Pass False inside a running turn so that its unsaved
+                changes are not replaced.
+
+        Returns:
+            Session or None if unknown or expired
+        """
+        if not session_id:
+            return None
+
+        if not refresh:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    session.touch()
+                    self._sessions.move_to_end(session_id)
+                    return session
+
+        meta = self.store.get_meta(session_id)
+        if meta is None:
+            # Deleted or expired, possibly by another process
+            with self._lock:
+                self._remove(session_id, reason="removed")
+            return None
+
+        revision, last_access = meta
+        if self.session_ttl and time.time() - last_access > self.session_ttl:
+            self.store.delete(session_id)
+            with self._lock:
+                session = self._sessions.pop(session_id, None)
+                self.evicted_count += 1
+            if session is not None:
+                session.dialog_manager.close()
+            logger.info(f"Session {session_id} evicted (ttl)")
+            return None
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+
+        if session is None:
+            session = self._restore(session_id)
+            if session is None:
+                return None
+        elif revision > session.revision:
+            with session.lock:
+                # A turn of this process may have saved a newer revision while we waited
+                if revision > session.revision and self.store.is_own_revision(session_id, session.revision, revision):
+                    # Only results of this process's section jobs were written, the local copy has them
+                    session.revision = revision
+                elif revision > session.revision:
+                    record = self.store.load(session_id)
+                    if record is not None:
+                        session.apply_record(record)
+                        logger.info(f"Session {session_id} refreshed to revision {session.revision}")
+
+        session.touch()
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+        self.store.touch(session_id, session.last_access)
+        return session
+
+    def reset_session(self, session_id: str) -> Optional[Session]:
+        """
+        Replaces the DialogManager and transcript of a session, leaving
+        all other sessions untouched.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            The reset Session or None if unknown
+        """
+        session = self.get_session(session_id)
+        if session is None:
+            return None
+
+        with session.lock:
+            session.dialog_manager.close()
+            session.dialog_manager = self.dialog_manager_factory(session_id)
+            session.messages = []
+            session.script_generated = False
+            session.approx_size = 0
+            session.revision = self.store.save(session.to_record(), merge=False)
+
+        return session
+
+    def remove_session(self, session_id: str) -> bool:
+        """
+        Removes a session.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            True if the session existed
+        """
+        deleted = self.store.delete(session_id)
+        with self._lock:
+            return self._remove(session_id, reason="removed") or deleted
+
+    def record_turn(self, session: Session) -> None:
+        """
+        Persists a session after a turn, updates its size estimate and
+        enforces the limits.
+
+        Args:
+            session: Session that was just used
+        """
+        with session.lock:
+            session.revision = self.store.save(session.to_record())
+        session.estimate_size()
+        with self._lock:
+            self._evict()
+
+    def save_section_results(self, session_id: str) -> None:
+        """
+        Persists the section content generated in the background for a session.
+
+        Args:
+            session_id: Session ID
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return
+
+        try:
+            # Called on the job's thread, so the conversation state itself is not read
+            self.store.save_section_results(session_id, session.dialog_manager.get_job_results())
+        except Exception as e:
+            logger.error(f"Error saving section results of session {session_id}: {e}")
+
+    def load_section_results(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Loads the section results stored for a session, including those written
+        by background jobs of other worker processes.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Dictionary with generated_content and content_quality_checks or None if unknown
+        """
+        record = self.store.load(session_id)
+        if record is None:
+            return None
+        state = record["conversation_state"]
+        return {key: dict(state.get(key) or {}) for key in MERGED_STATE_KEYS}
+
+    def cleanup_expired(self) -> int:
+        """
+        Removes all sessions whose TTL has expired from the cache and the store.
+
+        Returns:
+            Number of sessions removed from the store
+        """
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, s in self._sessions.items() if self._is_expired(s, now)]
+            for session_id in expired:
+                self._remove(session_id, reason="ttl")
+        return self.store.cleanup_expired(self.session_ttl)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get_session(session_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns statistics about the session registry.
+
+        Returns:
+            Dictionary with session counts and memory estimates
+        """
+        with self._lock:
+            total_size = sum(s.approx_size for s in self._sessions.values())
+            return {
+                "active_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "session_ttl": self.session_ttl,
+                "approx_memory_bytes": total_size,
+                "memory_limit_bytes": self.memory_limit_bytes,
+                "evicted_sessions": self.evicted_count,
+                "store": self.store.get_stats()
+            }
+
+    def get_memory_report(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Measures the memory held per session.
+
+        Args:
+            limit: Number of largest sessions listed
+
+        Returns:
+            Totals over all sessions and the largest sessions
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+
+        measured = [session.measure_memory() for session in sessions]
+        measured.sort(key=lambda entry: entry["total_bytes"], reverse=True)
+        totals = {
+            key: sum(entry[key] for entry in measured)
+            for key in ("messages", "conversation_state", "render_cache", "total_bytes")
+        }
+        return {
+            "session_count": len(measured),
+            "totals": totals,
+            "largest_sessions": measured[:limit],
+            "store": self.store.estimate_memory()
+        }
+
+    def _restore(self, session_id: str) -> Optional[Session]:
+        """Creates a local copy of a session that only exists in the store."""
+        record = self.store.load(session_id)
+        if record is None:
+            return None
+
+        session = Session(session_id, self.dialog_manager_factory(session_id))
+        session.apply_record(record)
+        session.estimate_size()
+
+        with self._lock:
+            # Another thread may have restored it in the meantime
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                return existing
+            self._sessions[session_id] = session
+            self._evict()
+
+        logger.info(f"Session {session_id} restored from the session store (revision {session.revision})")
+        return session
+
+    def _is_expired(self, session: Session, now: float) -> bool:
+        return bool(self.session_ttl) and now - session.last_access > self.session_ttl
+
+    def _remove(self, session_id: str, reason: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.dialog_manager.close()
+        if reason != "removed":
+            self.evicted_count += 1
+        logger.info(f"Session {session_id} evicted ({reason})")
+        return True
+
+    def _evict(self) -> None:
+        """Evicts expired sessions first, then least recently used ones."""
+        now = time.time()
+        for session_id in [sid for sid, s in self._sessions.items() if self._is_expired(s, now)]:
+            self._remove(session_id, reason="ttl")
+
+        while len(self._sessions) > self.max_sessions:
+            session_id = next(iter(self._sessions))
+            self._remove(session_id, reason="lru")
+
+        if self.memory_limit_bytes:
+            total_size = sum(s.approx_size for s in self._sessions.values())
+            # Never evict the most recently used session
+            while total_size > self.memory_limit_bytes and len(self._sessions) > 1:
+                session_id, session = next(iter(self._sessions.items()))
+                total_size -= session.approx_size
+                self._remove(session_id, reason="memory")
@@ -0,0 +1,582 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from modules.memory_profiler import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+# Parts of the conversation state written by background jobs; they are merged instead of overwritten
+MERGED_STATE_KEYS = ("generated_content", "content_quality_checks")
+
+
+def merge_section_results(state: Dict[str, Any], stored_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keeps section results from the stored state that are missing in the new state.
+
+    Args:
+        state: Conversation state that is about to be written
+        stored_state: Conversation state currently in the store
+
+    Returns:
+        The merged conversation state
+    """
+    for key in MERGED_STATE_KEYS:
+        stored = stored_state.get(key) or {}
+        if stored:
+            state[key] = dict(stored, **(state.get(key) or {}))
+    return state
+
+
+class SessionStore:
+    """
+    Interface of a session store.
+
+    A session record is a dictionary with session_id, revision, created_at,
+    last_access, script_generated, messages and conversation_state. The store
+    assigns the revision; every write increments it so that processes sharing
+    the store can tell whether their local copy is stale.
+    """
+
+    backend = "base"
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Loads a session record.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Session record or None if unknown
+        """
+        raise NotImplementedError
+
+    def get_meta(self, session_id: str) -> Optional[Tuple[int, float]]:
+        """
+        Returns revision and last access time of a session without loading it.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Tuple (revision, last_access) or None if unknown
+        """
+        raise NotImplementedError
+
+    def save(self, record: Dict[str, Any], merge: bool = True) -> int:
+        """
+        Writes a session record.
+
+        Args:
+            record: Session record
+            merge: Keep stored section results that are missing in the record
+
+        Returns:
+            The new revision
+        """
+        raise NotImplementedError
+
+    def save_section_results(self, session_id: str, conversation_state: Dict[str, Any]) -> None:
+        """
+        Persists the section results of a session (write-behind where supported).
+
+        Args:
+            session_id: Session ID
+            conversation_state: Conversation state containing the section results
+        """
+        raise NotImplementedError
+
+    def touch(self, session_id: str, timestamp: float = None) -> None:
+        """
+        Updates the last access time of a session (write-behind where supported).
+
+        Args:
+            session_id: Session ID
+            timestamp: Access time, defaults to now
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Deletes a session.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            True if the session existed
+        """
+        raise NotImplementedError
+
+    def cleanup_expired(self, ttl: float) -> int:
+        """
+        Deletes all sessions that were not accessed within the TTL.
+
+        Args:
+            ttl: Time to live in seconds
+
+        Returns:
+            Number of deleted sessions
+        """
+        raise NotImplementedError
+
+    def is_own_revision(self, session_id: str, local_revision: int, revision: int) -> bool:
+        """
+        Checks whether all writes between two revisions were write-behind flushes of this
+        process, i.e. a local copy at local_revision already contains their changes.
+
+        Args:
+            session_id: Session ID
+            local_revision: Revision of the local copy
+            revision: Revision in the store
+
+        Returns:
+            True if the local copy does not need to be reloaded
+        """
+        return False
+
+    def flush(self) -> None:
+        """Writes all pending write-behind updates."""
+
+    def close(self) -> None:
+        """Flushes pending updates and releases resources."""
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns statistics about the store.
+
+        Returns:
+            Dictionary with backend name and session count
+        """
+        return {"backend": self.backend}
+
+    def estimate_memory(self) -> int:
+        """
+        Approximates the memory the store holds in this process.
+
+        Returns:
+            Size in bytes
+        """
+        return 0
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Session store that keeps serialized records in the memory of the current
+    process. Only suitable for a single worker. Expired sessions are removed
+    on the next write once cleanup_interval has passed.
+    """
+
+    backend = "memory"
+
+    def __init__(self, ttl: float = 0, cleanup_interval: float = 300):
+        """
+        Initializes the MemorySessionStore.
+
+        Args:
+            ttl: Seconds of inactivity after which a session is deleted (0 disables the cleanup)
+            cleanup_interval: Seconds between two TTL cleanups
+        """
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self._records: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._last_cleanup = time.time()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self._records.get(session_id)
+        return json.loads(data) if data is not None else None
+
+    def get_meta(self, session_id: str) -> Optional[Tuple[int, float]]:
+        record = self.load(session_id)
+        if record is None:
+            return None
+        return record["revision"], record["last_access"]
+
+    def save(self, record: Dict[str, Any], merge: bool = True) -> int:
+        record = json.loads(json.dumps(record, ensure_ascii=False, default=str))
+        with self._lock:
+            stored = self._records.get(record["session_id"])
+            stored = json.loads(stored) if stored is not None else None
+            if stored is not None and merge:
+                merge_section_results(record["conversation_state"], stored["conversation_state"])
+            record["revision"] = (stored["revision"] if stored else 0) + 1
+            self._records[record["session_id"]] = json.dumps(record, ensure_ascii=False)
+
+        if self.ttl and time.time() - self._last_cleanup > self.cleanup_interval:
+            self._last_cleanup = time.time()
+            self.cleanup_expired(self.ttl)
+        return record["revision"]
+
+    def save_section_results(self, session_id: str, conversation_state: Dict[str, Any]) -> None:
+        with self._lock:
+            data = self._records.get(session_id)
+            if data is None:
+                return
+            record = json.loads(data)
+            state = record["conversation_state"]
+            for key in MERGED_STATE_KEYS:
+                state[key] = dict(state.get(key) or {}, **(conversation_state.get(key) or {}))
+            # No new revision: the results come from this process, whose copy already has them
+            self._records[session_id] = json.dumps(record, ensure_ascii=False, default=str)
+
+    def touch(self, session_id: str, timestamp: float = None) -> None:
+        with self._lock:
+            data = self._records.get(session_id)
+            if data is None:
+                return
+            record = json.loads(data)
+            record["last_access"] = timestamp or time.time()
+            self._records[session_id] = json.dumps(record, ensure_ascii=False)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._records.pop(session_id, None) is not None
+
+    def cleanup_expired(self, ttl: float) -> int:
+        if not ttl:
+            return 0
+        threshold = time.time() - ttl
+        with self._lock:
+            expired = [sid for sid, data in self._records.items() if json.loads(data)["last_access"] < threshold]
+            for session_id in expired:
+                del self._records[session_id]
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "stored_sessions": len(self._records),
+                "stored_bytes": sum(len(data) for data in self._records.values())
+            }
+
+    def estimate_memory(self) -> int:
+        with self._lock:
+            return deep_sizeof(self._records)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Durable session store backed by SQLite in WAL mode.
+
+    Several worker processes can share one database file, so any worker can
+    continue any conversation. Transcript and conversation state are stored
+    as zlib-compressed JSON. Turns are written synchronously because the next
+    turn may be served by another worker; access times and the results of
+    background section jobs are buffered and written in batches by a
+    background thread, which also removes expired sessions.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: str = "./data/sessions.db", ttl: float = 3600, flush_interval: float = 1.0,
+                 cleanup_interval: float = 300, compression_level: int = 6, busy_timeout: float = 5.0):
+        """
+        Initializes the SQLiteSessionStore.
+
+        Args:
+            db_path: Path of the SQLite database file
+            ttl: Seconds of inactivity after which a session is deleted (0 disables the cleanup)
+            flush_interval: Seconds between two write-behind flushes
+            cleanup_interval: Seconds between two TTL cleanups
+            compression_level: zlib compression level for transcript and state
+            busy_timeout: Seconds to wait for a lock held by another process
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.cleanup_interval = cleanup_interval
+        self.compression_level = compression_level
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False,
+                                     isolation_level=None)
+        self._lock = threading.RLock()
+        self._init_db()
+
+        # Write-behind buffers, flushed together in one transaction
+        self._pending_touches: Dict[str, float] = {}
+        self._pending_results: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+
+        # Revisions written by flushes of this process: session_id -> (revision before, revision after)
+        self._flushed_revisions: Dict[str, Tuple[int, int]] = {}
+
+        self.flush_count = 0
+        self.raw_bytes_written = 0
+        self.compressed_bytes_written = 0
+        self._last_cleanup = time.time()
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-store-writer", daemon=True)
+        self._thread.start()
+
+        logger.info(f"SQLite session store at {db_path}")
+
+    def _init_db(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    revision INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    script_generated INTEGER NOT NULL DEFAULT 0,
+                    messages BLOB NOT NULL,
+                    conversation_state BLOB NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access)")
+
+    def _encode(self, value: Any) -> bytes:
+        raw = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+        compressed = zlib.compress(raw, self.compression_level)
+        self.raw_bytes_written += len(raw)
+        self.compressed_bytes_written += len(compressed)
+        return compressed
+
+    @staticmethod
+    def _decode(value: bytes) -> Any:
+        return json.loads(zlib.decompress(value).decode("utf-8"))
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT revision, created_at, last_access, script_generated, messages, conversation_state "
+                "FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        record = {
+            "session_id": session_id,
+            "revision": row[0],
+            "created_at": row[1],
+            "last_access": row[2],
+            "script_generated": bool(row[3]),
+            "messages": self._decode(row[4]),
+            "conversation_state": self._decode(row[5])
+        }
+
+        with self._pending_lock:
+            touched = self._pending_touches.get(session_id)
+            results = self._pending_results.get(session_id)
+        if touched:
+            record["last_access"] = max(record["last_access"], touched)
+        if results:
+            state = record["conversation_state"]
+            for key in MERGED_STATE_KEYS:
+                state[key] = dict(state.get(key) or {}, **(results.get(key) or {}))
+
+        return record
+
+    def get_meta(self, session_id: str) -> Optional[Tuple[int, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT revision, last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        with self._pending_lock:
+            touched = self._pending_touches.get(session_id, 0)
+        return row[0], max(row[1], touched)
+
+    def save(self, record: Dict[str, Any], merge: bool = True) -> int:
+        session_id = record["session_id"]
+        state = dict(record["conversation_state"])
+
+        # A synchronous write supersedes buffered results of the same session
+        with self._pending_lock:
+            self._pending_results.pop(session_id, None)
+            self._pending_touches.pop(session_id, None)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT revision, conversation_state FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is not None and merge:
+                    merge_section_results(state, self._decode(row[1]))
+                revision = (row[0] if row else 0) + 1
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions "
+                    "(session_id, revision, created_at, last_access, script_generated, messages, conversation_state) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, revision, record["created_at"], record["last_access"],
+                     int(record["script_generated"]), self._encode(record["messages"]), self._encode(state))
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return revision
+
+    def save_section_results(self, session_id: str, conversation_state: Dict[str, Any]) -> None:
+        results = {key: dict(conversation_state.get(key) or {}) for key in MERGED_STATE_KEYS}
+        with self._pending_lock:
+            pending = self._pending_results.setdefault(session_id, {})
+            for key, values in results.items():
+                pending[key] = dict(pending.get(key) or {}, **values)
+
+    def touch(self, session_id: str, timestamp: float = None) -> None:
+        with self._pending_lock:
+            self._pending_touches[session_id] = timestamp or time.time()
+
+    def delete(self, session_id: str) -> bool:
+        with self._pending_lock:
+            self._pending_touches.pop(session_id, None)
+            self._pending_results.pop(session_id, None)
+
+        with self._lock:
+            self._flushed_revisions.pop(session_id, None)
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def cleanup_expired(self, ttl: float) -> int:
+        if not ttl:
+            return 0
+
+        # Recent accesses may still be buffered
+        self.flush()
+
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE last_access < ?", (time.time() - ttl,))
+            if cursor.rowcount:
+                remaining = {row[0] for row in self._conn.execute("SELECT session_id FROM sessions")}
+                self._flushed_revisions = {
+                    sid: revisions for sid, revisions in self._flushed_revisions.items() if sid in remaining}
+
+        if cursor.rowcount:
+            logger.info(f"Removed {cursor.rowcount} expired sessions from the session store")
+        return cursor.rowcount
+
+    def flush(self) -> None:
+        with self._pending_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+            results, self._pending_results = self._pending_results, {}
+
+        if not touches and not results:
+            return
+
+        with self._lock:
+            flushed = {}
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if touches:
+                    self._conn.executemany(
+                        "UPDATE sessions SET last_access = MAX(last_access, ?) WHERE session_id = ?",
+                        [(timestamp, session_id) for session_id, timestamp in touches.items()]
+                    )
+
+                for session_id, pending in results.items():
+                    row = self._conn.execute(
+                        "SELECT revision, conversation_state FROM sessions WHERE session_id = ?", (session_id,)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    state = self._decode(row[1])
+                    for key in MERGED_STATE_KEYS:
+                        state[key] = dict(state.get(key) or {}, **(pending.get(key) or {}))
+                    # The new revision tells other processes to reload the session
+                    self._conn.execute(
+                        "UPDATE sessions SET conversation_state = ?, revision = ? WHERE session_id = ?",
+                        (self._encode(state), row[0] + 1, session_id)
+                    )
+                    flushed[session_id] = row[0]
+                self._conn.execute("COMMIT")
+                self.flush_count += 1
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"Error flushing session store: {e}")
+                return
+
+            for session_id, revision in flushed.items():
+                # Consecutive flushes extend the range the local copy can skip
+                base, latest = self._flushed_revisions.get(session_id, (revision, revision))
+                self._flushed_revisions[session_id] = (base if latest == revision else revision, revision + 1)
+
+    def is_own_revision(self, session_id: str, local_revision: int, revision: int) -> bool:
+        with self._lock:
+            flushed = self._flushed_revisions.get(session_id)
+        return flushed is not None and flushed[0] <= local_revision and flushed[1] == revision
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def estimate_memory(self) -> int:
+        # Only the write-behind buffers live in memory
+        with self._pending_lock:
+            return deep_sizeof(self._pending_touches) + deep_sizeof(self._pending_results)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored_sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+        with self._pending_lock:
+            pending_writes = len(self._pending_touches) + len(self._pending_results)
+
+        db_bytes = 0
+        for suffix in ("", "-wal"):
+            if os.path.exists(self.db_path + suffix):
+                db_bytes += os.path.getsize(self.db_path + suffix)
+
+        return {
+            "backend": self.backend,
+            "db_path": self.db_path,
+            "stored_sessions": stored_sessions,
+            "db_bytes": db_bytes,
+            "pending_writes": pending_writes,
+            "flushes": self.flush_count,
+            "compression_ratio": (self.compressed_bytes_written / self.raw_bytes_written
+                                  if self.raw_bytes_written else None)
+        }
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+            if self.ttl and time.time() - self._last_cleanup > self.cleanup_interval:
+                self._last_cleanup = time.time()
+                try:
+                    self.cleanup_expired(self.ttl)
+                except Exception as e:
+                    logger.error(f"Error cleaning up expired sessions: {e}")
+
+
+def create_session_store(backend: str, **kwargs) -> SessionStore:
+    """
+    Creates a session store by backend name.
+
+    Args:
+        backend: "sqlite" or "memory"
+        **kwargs: Arguments for the SQLite store (the memory store only uses ttl)
+
+    Returns:
+        SessionStore instance
+    """
+    if backend == "memory":
+        return MemorySessionStore(ttl=kwargs.get("ttl", 0))
+    if backend == "sqlite":
+        return SQLiteSessionStore(**kwargs)
+    raise ValueError(f"Unknown session store backend: {backend}")
@@ -0,0 +1,54 @@
+from typing import Any, Awaitable, Callable, Generator
+
+
+def run_steps(steps: Generator, perform: Callable[[Any], Any]) -> Any:
+    """
+    Runs a step generator synchronously.
+
+    A step generator yields a request for every blocking operation (an LLM call,
+    a retrieval, ...) and receives its result, so one implementation serves both
+    the sync and the async pipeline. Errors of a request are raised inside the
+    generator at the yield.
+
+    Args:
+        steps: Step generator
+        perform: Callable executing one request
+
+    Returns:
+        Return value of the generator
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = perform(request)
+            except Exception as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def arun_steps(steps: Generator, perform: Callable[[Any], Awaitable[Any]]) -> Any:
+    """
+    Runs a step generator like run_steps(), awaiting each request.
+
+    Args:
+        steps: Step generator
+        perform: Coroutine function executing one request
+
+    Returns:
+        Return value of the generator
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = await perform(request)
+            except Exception as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
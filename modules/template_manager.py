@@ -5,8 +5,8 @@ import random
 import re
 from typing import Dict, Any, List, Optional
 
-# Logging-Konfiguration
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from modules.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 class TemplateManager:
@@ -147,6 +147,8 @@ class TemplateManager:
 
         return None
 
+    @traced("template.create_script_from_responses",
+            attributes=lambda self, section_responses, context_info: {"sections": len(section_responses)})
     def create_script_from_responses(self, section_responses: Dict[str, str], context_info: Dict[str, str]) -> Dict[str, Any]:
         """
         Erstellt ein Skript aus den gegebenen Antworten basierend auf den Beispielformaten.
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import queue
+import atexit
+import inspect
+import logging
+import contextvars
+import logging.handlers
+from functools import wraps
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Longest string attribute exported (queries, section titles)
+MAX_ATTRIBUTE_CHARS = 500
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_logger = logging.getLogger("modules.tracing.export")
+_export_logger.propagate = False
+_listener = None
+_service_name = "elearning-generator"
+_slow_trace_threshold = None
+
+
+class Span:
+    """
+    One timed operation of a trace.
+
+    Spans nest via a context variable, so the span of an LLM call made in a pool
+    thread or an asyncio task still knows the turn it belongs to.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "root", "start_ns", "end_ns",
+                 "attributes", "error", "slowest")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.root = parent.root if parent else self
+        self.attributes = attributes
+        self.error = None
+        # Slowest descendant (duration in ns, span), tracked on the root span only
+        self.slowest = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attributes(self, **attributes) -> None:
+        """Adds attributes, e.g. result sizes that are only known at the end."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """
+        Serializes the span as an OTLP/JSON export request, the line format of the
+        OpenTelemetry Collector's file exporter.
+        """
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", _service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [span]}]
+            }]
+        }
+
+
+class _NoopSpan:
+    """Stand-in while tracing is disabled."""
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)[:MAX_ATTRIBUTE_CHARS]}
+    return {"key": key, "value": typed}
+
+
+def configure_tracing(trace_file: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                      slow_trace_threshold: Optional[float] = None,
+                      service_name: str = "elearning-generator") -> None:
+    """
+    Enables tracing. Finished spans are written as JSON lines to a rotating file
+    by a listener thread.
+
+    Args:
+        trace_file: Path of the JSONL file
+        max_bytes: Size at which the file is rotated
+        backup_count: Number of rotated files kept
+        slow_trace_threshold: Seconds after which a finished trace is logged with its slowest span
+        service_name: service.name resource attribute
+    """
+    global _listener, _service_name, _slow_trace_threshold
+
+    os.makedirs(os.path.dirname(os.path.abspath(trace_file)), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(trace_file, maxBytes=max_bytes,
+                                                   backupCount=backup_count, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    span_queue = queue.SimpleQueue()
+    stop_tracing()
+    _export_logger.addHandler(logging.handlers.QueueHandler(span_queue))
+    _export_logger.setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(span_queue, handler)
+    _listener.start()
+
+    _service_name = service_name
+    _slow_trace_threshold = slow_trace_threshold
+    logger.info(f"Tracing enabled, spans are written to {trace_file}")
+
+
+def stop_tracing() -> None:
+    """Writes the queued spans and disables tracing."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    for handler in list(_export_logger.handlers):
+        _export_logger.removeHandler(handler)
+
+
+def tracing_enabled() -> bool:
+    """Whether spans are recorded."""
+    return _listener is not None
+
+
+def current_span():
+    """Returns the active span (a no-op span while tracing is disabled)."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def set_span_attributes(**attributes) -> None:
+    """Adds attributes to the active span."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Records the block as a span, child of the active span.
+
+    Args:
+        name: Span name
+        **attributes: Span attributes
+
+    Yields:
+        The span, to add attributes known only at the end
+    """
+    if _listener is None:
+        yield NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(current)
+
+
+def _finish(finished: Span) -> None:
+    finished.end_ns = time.time_ns()
+    duration_ns = finished.end_ns - finished.start_ns
+    root = finished.root
+
+    if finished is not root:
+        if root.slowest is None or duration_ns > root.slowest[0]:
+            root.slowest = (duration_ns, finished)
+    elif _slow_trace_threshold is not None and finished.duration >= _slow_trace_threshold:
+        slowest = f", slowest step {root.slowest[1].name} {root.slowest[0] / 1e9:.2f}s" if root.slowest else ""
+        logger.warning(f"Slow trace {finished.trace_id}: {finished.name} took {finished.duration:.2f}s{slowest}")
+
+    try:
+        _export_logger.info(json.dumps(finished.to_otlp(), ensure_ascii=False, default=str))
+    except Exception as e:
+        logger.warning(f"Could not export span {finished.name}: {e}")
+
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None,
+           result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None) -> Callable:
+    """
+    Decorator recording every call of a function (or coroutine function) as a span.
+
+    Args:
+        name: Span name
+        attributes: Optional callable receiving the call's arguments and returning span attributes
+        result_attributes: Optional callable receiving the return value and returning span attributes
+    """
+    def decorator(func):
+        def start(args, kwargs):
+            try:
+                return attributes(*args, **kwargs) if attributes else {}
+            except Exception:
+                return {}
+
+        def finish(current, result):
+            if result_attributes:
+                try:
+                    current.set_attributes(**result_attributes(result))
+                except Exception:
+                    pass
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _listener is None:
+                    return await func(*args, **kwargs)
+                with span(name, **start(args, kwargs)) as current:
+                    result = await func(*args, **kwargs)
+                    finish(current, result)
+                    return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _listener is None:
+                return func(*args, **kwargs)
+            with span(name, **start(args, kwargs)) as current:
+                result = func(*args, **kwargs)
+                finish(current, result)
+                return result
+        return wrapper
+    return decorator
+
+
+atexit.register(stop_tracing)
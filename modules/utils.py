@@ -1,5 +1,6 @@
 # modules/utils.py
 import logging
+import reprlib
 from typing import Type, Any, TypeVar, List, Dict, Optional, Union
 
 logger = logging.getLogger(__name__)
@@ -21,7 +22,8 @@ def ensure_type(value: Any, expected_type: Type[T], default: Optional[T] = None)
     if isinstance(value, expected_type):
         return value
     
-    logger.warning(f"Type mismatch: Expected {expected_type.__name__}, got {type(value).__name__}: {value}")
+    # Values can be whole documents or LLM responses, so only a shortened repr is logged
+    logger.warning(f"Type mismatch: Expected {expected_type.__name__}, got {type(value).__name__}: {reprlib.repr(value)}")
     
     # Handle default value if provided
     if default is not None:
@@ -1,14 +1,20 @@
 import logging
 import os
+import asyncio
+import json
+import time
+from collections import Counter
+from datetime import datetime
 from typing import List, Dict, Any, Set
 import torch
 from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 import faiss
+from modules.metrics import timed, RETRIEVAL_DURATION
+from modules.offload import offloaded
+from modules.tracing import traced
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class VectorStoreManager:
@@ -17,18 +23,25 @@ class VectorStoreManager:
     def __init__(self, persist_directory: str = "./data/faiss_index"):
         """Initialize the VectorStoreManager."""
         self.persist_directory = persist_directory
+        self.embedding_model_name = "BAAI/bge-small-en-v1.5"
         
         # Initialize the embedding model (same as before)
         self.embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-small-en-v1.5",
+            model_name=self.embedding_model_name,
             model_kwargs={'device': 'cuda' if torch.cuda.is_available() else 'cpu'},
             encode_kwargs={'normalize_embeddings': True}
         )
         
         self.vectorstore = None
 
+        # Index metadata, updated on create/load so that statistics can be served without touching the index
+        self.index_stats: Dict[str, Any] = {}
+
+    @offloaded
     def create_vectorstore(self, documents: List[Document]) -> None:
         try:
+            start_time = time.time()
+
             # Create the FAISS index
             self.vectorstore = FAISS.from_documents(
                 documents=documents,
@@ -37,12 +50,16 @@ class VectorStoreManager:
             
             # Save to disk
             self.vectorstore.save_local(self.persist_directory)
+
+            self._update_index_stats(build_duration=time.time() - start_time)
+            self._save_index_stats()
             
             logger.info(f"Vector database created and saved to {self.persist_directory}")
         except Exception as e:
             logger.error(f"Error creating vector database: {e}")
             raise
 
+    @offloaded
     def load_vectorstore(self) -> bool:
         """Load an existing vector database."""
         try:
@@ -52,10 +69,13 @@ class VectorStoreManager:
             
             if os.path.exists(index_file) and os.path.exists(docstore_file):
                 # Load the FAISS index
+                # The docstore pickle is written by create_vectorstore, so we trust it
                 self.vectorstore = FAISS.load_local(
                     folder_path=self.persist_directory,
-                    embeddings=self.embeddings
+                    embeddings=self.embeddings,
+                    allow_dangerous_deserialization=True
                 )
+                self._load_index_stats()
                 logger.info("Existing FAISS vector database loaded")
                 return True
             else:
@@ -65,6 +85,84 @@ class VectorStoreManager:
             logger.error(f"Error loading vector database: {e}")
             return False
 
+    def get_index_stats(self) -> Dict[str, Any]:
+        """
+        Returns the cached index metadata without touching the index.
+
+        Returns:
+            Dictionary with vector count, dimension, index type, sizes,
+            chunk counts per doc_type, build time and embedding model
+        """
+        stats = dict(self.index_stats)
+        if "doc_type_counts" in stats:
+            stats["doc_type_counts"] = dict(stats["doc_type_counts"])
+        return stats
+
+    def _update_index_stats(self, build_duration: float = None) -> None:
+        """
+        Recomputes the index metadata. Called once after an index was built or loaded.
+
+        Args:
+            build_duration: Seconds it took to build the index, if it was just built
+        """
+        index = self.vectorstore.index
+
+        # Size of the serialized index is what the index occupies in RAM
+        try:
+            ram_bytes = int(faiss.serialize_index(index).nbytes)
+        except Exception as e:
+            logger.warning(f"Could not determine in-memory size of the index: {e}")
+            ram_bytes = int(index.ntotal * index.d * 4)
+
+        disk_bytes = 0
+        for file_name in ("index.faiss", "index.pkl"):
+            file_path = os.path.join(self.persist_directory, file_name)
+            if os.path.exists(file_path):
+                disk_bytes += os.path.getsize(file_path)
+
+        doc_type_counts = Counter()
+        docstore = getattr(self.vectorstore.docstore, "_dict", {})
+        for doc in docstore.values():
+            doc_type_counts[doc.metadata.get("doc_type", "unknown")] += 1
+
+        self.index_stats = {
+            "vector_count": int(index.ntotal),
+            "dimension": int(index.d),
+            "index_type": type(index).__name__,
+            "bytes_on_disk": disk_bytes,
+            "bytes_in_ram": ram_bytes,
+            "doc_type_counts": dict(doc_type_counts),
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "build_duration": build_duration,
+            "embedding_model": self.embedding_model_name,
+            "persist_directory": self.persist_directory
+        }
+
+    def _save_index_stats(self) -> None:
+        """Persists the index metadata next to the index."""
+        try:
+            with open(os.path.join(self.persist_directory, "index_meta.json"), "w", encoding="utf-8") as f:
+                json.dump(self.index_stats, f, indent=2)
+        except Exception as e:
+            logger.warning(f"Could not save index metadata: {e}")
+
+    def _load_index_stats(self) -> None:
+        """Loads the persisted index metadata, falling back to recomputing it."""
+        meta_file = os.path.join(self.persist_directory, "index_meta.json")
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+
+            # Only trust the record if it still describes the loaded index
+            if stats.get("vector_count") == self.vectorstore.index.ntotal:
+                self.index_stats = stats
+                return
+        except Exception as e:
+            logger.info(f"No usable index metadata at {meta_file}: {e}")
+
+        self._update_index_stats()
+        self._save_index_stats()
+
     def get_retriever(self, search_type: str = "mmr", search_kwargs: Dict[str, Any] = None):
         """
         Get a retriever for the vector database.
@@ -87,6 +185,11 @@ class VectorStoreManager:
             search_kwargs=search_kwargs
         )
 
+    @offloaded
+    @timed(RETRIEVAL_DURATION, method="retrieve_documents")
+    @traced("vectorstore.retrieve_documents",
+            attributes=lambda self, query, filter=None, k=5: {"query": query, "k": k, "filter": json.dumps(filter) if filter else None},
+            result_attributes=lambda docs: {"documents": len(docs)})
     def retrieve_documents(self, query: str, filter: Dict[str, Any] = None, k: int = 5) -> List[Document]:
         """
         Perform a search in the vector database.
@@ -110,6 +213,11 @@ class VectorStoreManager:
 
         return results
 
+    @offloaded
+    @timed(RETRIEVAL_DURATION, method="retrieve_with_multiple_queries")
+    @traced("vectorstore.retrieve_with_multiple_queries",
+            attributes=lambda self, queries, filter=None, top_k=3: {"queries": len(queries), "k": top_k},
+            result_attributes=lambda docs: {"documents": len(docs)})
     def retrieve_with_multiple_queries(self, queries: List[str], filter: Dict[str, Any] = None, top_k: int = 3) -> List[Document]:
         """
         Retrieves documents using multiple queries and combines the results.
@@ -131,29 +239,80 @@ class VectorStoreManager:
         if not queries:
             return []
             
-        # Create a set to track unique document IDs
-        seen_docs = set()
-        all_docs = []
-        
+        results = []
         for query in queries:
             try:
-                docs = self.safe_retrieve_documents(query, k=top_k)
-                
-                # Add unique documents to the result list
-                for doc in docs:
-                    # Create a unique identifier for the document
-                    doc_id = hash(doc.page_content)
-                    
-                    if doc_id not in seen_docs:
-                        seen_docs.add(doc_id)
-                        all_docs.append(doc)
-                        
+                results.append(self.safe_retrieve_documents(query, k=top_k))
             except Exception as e:
                 logger.error(f"Error retrieving documents for query '{query}': {e}")
                 # Continue with next query
         
+        return self.merge_unique_documents(results)
+
+    @timed(RETRIEVAL_DURATION, method="aretrieve_with_multiple_queries")
+    @traced("vectorstore.retrieve_with_multiple_queries",
+            attributes=lambda self, queries, filter=None, top_k=3: {"queries": len(queries), "k": top_k},
+            result_attributes=lambda docs: {"documents": len(docs)})
+    async def aretrieve_with_multiple_queries(self, queries: List[str], filter: Dict[str, Any] = None, top_k: int = 3) -> List[Document]:
+        """
+        Async variant of retrieve_with_multiple_queries that runs the queries concurrently.
+        Embedding and FAISS search are CPU-bound, so each query runs in the default executor.
+
+        Args:
+            queries: List of query strings
+            filter: Optional filter to apply to search
+            top_k: Number of documents to retrieve per query
+
+        Returns:
+            Combined list of Document objects, in the same order as the sync variant
+        """
+        from modules.utils import ensure_list
+
+        queries = ensure_list(queries, str)
+        if not queries:
+            return []
+
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.safe_retrieve_documents, query, top_k) for query in queries),
+            return_exceptions=True
+        )
+
+        found = []
+        for query, docs in zip(queries, results):
+            if isinstance(docs, Exception):
+                logger.error(f"Error retrieving documents for query '{query}': {docs}")
+            else:
+                found.append(docs)
+        return self.merge_unique_documents(found)
+
+    @staticmethod
+    def merge_unique_documents(results: List[List[Document]]) -> List[Document]:
+        """
+        Concatenates result lists and drops documents with the same content.
+
+        Args:
+            results: Result lists in query order
+
+        Returns:
+            Unique documents in order of first occurrence
+        """
+        seen_docs = set()
+        all_docs = []
+        for docs in results:
+            for doc in docs:
+                # Create a unique identifier for the document
+                doc_id = hash(doc.page_content)
+
+                if doc_id not in seen_docs:
+                    seen_docs.add(doc_id)
+                    all_docs.append(doc)
         return all_docs
     
+    @offloaded
+    @timed(RETRIEVAL_DURATION, method="safe_retrieve_documents")
+    @traced("vectorstore.safe_retrieve_documents",
+            attributes=lambda self, query, k=3: {"query": query, "k": k},
+            result_attributes=lambda docs: {"documents": len(docs)})
     def safe_retrieve_documents(self, query: str, k: int = 3) -> List[Document]:
         """
         Safely retrieve documents with type checking.
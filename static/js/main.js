@@ -18,6 +18,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const refreshVectorDbBtn = document.getElementById('refreshVectorDbBtn');   
     const llmStatus = document.getElementById('llmStatus');
     const refreshLlmBtn = document.getElementById('refreshLlmBtn');
+    const sectionProgress = document.getElementById('sectionProgress');
     
     // Modal elements
     const alertModal = new bootstrap.Modal(document.getElementById('alertModal'));
@@ -30,6 +31,18 @@ document.addEventListener('DOMContentLoaded', function() {
     let sessionId = null;
     let scriptGenerated = false;
     let currentDownloadUrl = null;
+    let sectionJobs = {};
+    let streamingMessage = null;
+    let sectionDrafts = {};
+    
+    // Labels for the stages of background section generation
+    const stageLabels = {
+        content_cache: 'Suche ähnliche Inhalte',
+        key_information: 'Analysiere Antwort',
+        retrieval: 'Suche Fachinformationen',
+        content_generation: 'Erstelle Inhalt',
+        quality_check: 'Prüfe Qualität'
+    };
     
     // Initialize by connecting to the backend
     initializeApp();
@@ -55,14 +68,126 @@ document.addEventListener('DOMContentLoaded', function() {
     // Socket event listeners
     socket.on('connect', function() {
         console.log('Connected to WebSocket');
+        joinSession();
     });
     
     socket.on('disconnect', function() {
         console.log('Disconnected from WebSocket');
     });
     
+    socket.on('section_progress', updateSectionProgress);
+    socket.on('section_completed', updateSectionProgress);
+    socket.on('section_failed', updateSectionProgress);
+    socket.on('llm_token', handleLlmToken);
+    socket.on('llm_done', handleLlmDone);
+    
     // Functions
 
+    /**
+     * Subscribe to the events of the current conversation
+     */
+    function joinSession() {
+        if (sessionId && socket.connected) {
+            socket.emit('join_session', { session_id: sessionId });
+        }
+    }
+
+    /**
+     * Show the progress of sections that are generated in the background
+     */
+    function updateSectionProgress(data) {
+        if (data.session_id !== sessionId) return;
+        
+        sectionJobs[data.section_id] = data;
+        
+        const items = Object.values(sectionJobs).map(function(job) {
+            let text;
+            if (job.status === 'completed') {
+                text = 'fertig';
+            } else if (job.status === 'failed') {
+                text = 'Fehler';
+            } else if (job.status === 'queued') {
+                text = 'wartet';
+            } else {
+                text = stageLabels[job.stage] || 'in Bearbeitung';
+            }
+            return `<div class="section-progress-item">Abschnitt ${job.section_id}: ${text}</div>`;
+        });
+        
+        sectionProgress.innerHTML = items.join('');
+        sectionProgress.classList.remove('d-none');
+    }
+    
+    /**
+     * Show streamed LLM output as it is generated
+     */
+    function handleLlmToken(data) {
+        if (data.session_id !== sessionId) return;
+        
+        if (data.stream === 'section_content') {
+            sectionDrafts[data.section_id] = (sectionDrafts[data.section_id] || '') + data.token;
+            renderSectionDrafts();
+            return;
+        }
+        
+        // Questions and follow-up questions are shown in a temporary chat bubble
+        if (!streamingMessage) {
+            streamingMessage = document.createElement('div');
+            streamingMessage.className = 'message message-assistant message-streaming';
+            streamingMessage.textContent = '';
+            chatContainer.appendChild(streamingMessage);
+        }
+        streamingMessage.textContent += data.token;
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    }
+    
+    /**
+     * Replace the streamed tokens with the complete text of a finished LLM call
+     */
+    function handleLlmDone(data) {
+        if (data.session_id !== sessionId) return;
+        
+        if (data.stream === 'section_content') {
+            sectionDrafts[data.section_id] = data.text;
+            renderSectionDrafts();
+        } else if (streamingMessage) {
+            streamingMessage.textContent = data.text;
+        }
+    }
+    
+    /**
+     * Remove the temporary chat bubble once the final answer has arrived
+     */
+    function clearStreamingMessage() {
+        if (streamingMessage) {
+            streamingMessage.remove();
+            streamingMessage = null;
+        }
+    }
+    
+    /**
+     * Show the drafts of sections that are being generated in the preview area
+     */
+    function renderSectionDrafts() {
+        if (scriptGenerated) return;
+        
+        const drafts = Object.entries(sectionDrafts).map(function([sectionId, text]) {
+            const escaped = text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+            return `<h5>Entwurf: ${sectionId}</h5><div class="preview-text">${escaped.replace(/\n/g, '<br>')}</div>`;
+        });
+        previewContainer.innerHTML = drafts.join('');
+    }
+    
+    /**
+     * Clear the background generation progress
+     */
+    function clearSectionProgress() {
+        sectionJobs = {};
+        sectionDrafts = {};
+        sectionProgress.innerHTML = '';
+        sectionProgress.classList.add('d-none');
+    }
+
     function fetchLlmStatus() {
         llmStatus.innerHTML = `
           <div class="d-flex align-items-center">
@@ -87,7 +212,11 @@ document.addEventListener('DOMContentLoaded', function() {
               statusClass = 'bg-warning';
               statusText = 'Eingeschränkt';
               statusDetails = `<small class="text-muted d-block">Modell: ${data.model}</small>
-                               <small class="text-muted d-block">Antwort: "${data.response}"</small>`;
+                               <small class="text-muted d-block">Hinweis: ${data.message}</small>`;
+            } else if (data.status === 'unknown') {
+              statusClass = 'bg-secondary';
+              statusText = 'Wird geprüft';
+              statusDetails = `<small class="text-muted d-block">Modell: ${data.model}</small>`;
             } else {
               statusClass = 'bg-danger';
               statusText = 'Nicht verfügbar';
@@ -101,7 +230,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 <span class="badge ${statusClass} me-2">${statusText}</span>
               </div>
               ${statusDetails}
-              ${data.status !== 'available' ? 
+              ${data.status !== 'available' && data.status !== 'unknown' ? 
                 `<div class="alert alert-warning mt-2 mb-0 py-1 px-2">
                   <small>Prüfen Sie, ob der Ollama-Service läuft und das Modell "${data.model || 'llama3.1'}" verfügbar ist.</small>
                 </div>` : ''}
@@ -185,6 +314,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             if (data.success) {
                 sessionId = data.session_id;
+                joinSession();
                 addMessage(data.message, 'assistant');
                 userInput.disabled = false;
                 sendBtn.disabled = false;
@@ -215,7 +345,7 @@ document.addEventListener('DOMContentLoaded', function() {
         chatSpinner.classList.remove('d-none');
         
         // Add user message to chat
-        addMessage(message, 'user');
+        const userMessageDiv = addMessage(message, 'user');
         
         // Clear input field
         userInput.value = '';
@@ -246,6 +376,11 @@ document.addEventListener('DOMContentLoaded', function() {
                     refreshPreview();
                     fetchStats();
                 }
+            } else if (data.busy) {
+                // The message was not processed, so let the user send it again
+                userMessageDiv.remove();
+                userInput.value = message;
+                showAlert('Der Server ist gerade ausgelastet. Bitte senden Sie Ihre Nachricht in einigen Sekunden erneut.');
             } else {
                 showAlert('Fehler bei der Verarbeitung der Nachricht: ' + data.error);
             }
@@ -255,6 +390,8 @@ document.addEventListener('DOMContentLoaded', function() {
             showAlert('Fehler beim Senden der Nachricht: ' + error.message);
         })
         .finally(() => {
+            clearStreamingMessage();
+            
             // Re-enable input
             userInput.disabled = false;
             sendBtn.disabled = false;
@@ -300,6 +437,8 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Scroll to bottom
         chatContainer.scrollTop = chatContainer.scrollHeight;
+        
+        return messageDiv;
     }
     
     /**
@@ -359,6 +498,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (data.success) {
                 // Clear chat container
                 chatContainer.innerHTML = '';
+                clearSectionProgress();
                 
                 // Add first message
                 addMessage(data.message, 'assistant');
@@ -0,0 +1,103 @@
+import math
+import threading
+from contextlib import contextmanager
+
+import pytest
+from langchain_core.documents import Document
+
+from modules.dialog_manager import DialogManager
+from modules.template_manager import TemplateManager
+
+
+class FakeLLMManager:
+    """Stands in for LLMManager; generate_content can be held until a test releases it."""
+
+    is_fallback = False
+
+    def __init__(self):
+        self.content_started = threading.Event()
+        self.release_content = threading.Event()
+        self.release_content.set()
+        self.calls = []
+
+    @contextmanager
+    def background_calls(self):
+        yield
+
+    def cache_bypassed(self):
+        return False
+
+    def is_saturated(self):
+        return False
+
+    def advanced_hallucination_detection(self, content):
+        return {"confidence_score": 0.9, "suspicious_sections": []}
+
+    def extract_key_information(self, section_type, user_response):
+        self.calls.append("extract_key_information")
+        return ["E-Mails"]
+
+    def generate_content(self, section_title, **kwargs):
+        self.calls.append("generate_content")
+        self.content_started.set()
+        self.release_content.wait(5)
+        return f"Inhalt für {section_title}"
+
+    def check_hallucinations(self, content, user_input, context_text, callbacks=None):
+        self.calls.append("check_hallucinations")
+        return False, content
+
+    def generate_section_structured(self, **kwargs):
+        self.calls.append("generate_section_structured")
+        return None
+
+    def generate_question(self, section_title, **kwargs):
+        self.calls.append("generate_question")
+        return f"Frage zu {section_title}?"
+
+
+class FakeVectorStoreManager:
+    """Stands in for VectorStoreManager without loading an embedding model."""
+
+    def retrieve_with_multiple_queries(self, queries, filter=None, top_k=3):
+        return [Document(page_content=f"Kontext zu {query}") for query in queries[:1]]
+
+    @staticmethod
+    def merge_unique_documents(results):
+        seen, merged = set(), []
+        for docs in results:
+            for doc in docs:
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    merged.append(doc)
+        return merged
+
+
+class FakeEmbeddings:
+    """Embeds the answer line of a text as a 2D unit vector, so similarities are exactly cos(angle)."""
+
+    def __init__(self, similarities=None):
+        self.angles = {answer: math.acos(similarity) for answer, similarity in (similarities or {}).items()}
+
+    def embed_query(self, text):
+        angle = self.angles.get(text.rsplit("Antwort: ", 1)[-1], math.pi / 2)
+        return [math.cos(angle), math.sin(angle)]
+
+
+@pytest.fixture
+def template_manager():
+    return TemplateManager(template_path=None)
+
+
+@pytest.fixture
+def make_dialog(template_manager):
+    """Creates DialogManagers wired to the fakes."""
+    def factory(session_id="session", **kwargs):
+        kwargs.setdefault("llm_manager", FakeLLMManager())
+        kwargs.setdefault("vector_store_manager", FakeVectorStoreManager())
+        return DialogManager(
+            template_manager=template_manager,
+            session_id=session_id,
+            **kwargs
+        )
+    return factory
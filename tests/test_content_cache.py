@@ -0,0 +1,97 @@
+import pytest
+
+from modules.content_cache import SemanticContentCache
+
+from conftest import FakeEmbeddings
+
+# Similarity of each answer to "Original"
+EMBEDDINGS = FakeEmbeddings({"Original": 1.0, "Fast gleich": 0.97, "Ähnlich": 0.92, "Anders": 0.5})
+
+
+def add(cache, user_response, content="Geprüfter Inhalt", section_id="threat_awareness"):
+    cache.add(section_id, "Krankenhaus", "Pflege", user_response, content)
+
+
+def lookup(cache, user_response, section_id="threat_awareness"):
+    return cache.lookup(section_id, "Krankenhaus", "Pflege", user_response)
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticContentCache(EMBEDDINGS, persist_path=None)
+    add(cache, "Original")
+    return cache
+
+
+def test_default_thresholds():
+    cache = SemanticContentCache(EMBEDDINGS, persist_path=None)
+    assert cache.threshold == 0.95 and cache.draft_threshold == 0.9
+
+
+def test_similarity_selects_reuse_draft_or_miss(cache):
+    reused = lookup(cache, "Fast gleich")
+    assert reused["mode"] == "reuse" and reused["content"] == "Geprüfter Inhalt"
+    assert reused["similarity"] == pytest.approx(0.97, abs=1e-4)
+
+    assert lookup(cache, "Ähnlich")["mode"] == "draft"
+    assert lookup(cache, "Anders") is None
+
+    stats = cache.get_stats()
+    assert (stats["reuses"], stats["drafts"], stats["misses"]) == (1, 1, 1)
+
+
+def test_drafts_can_be_disabled():
+    cache = SemanticContentCache(EMBEDDINGS, draft_threshold=None, persist_path=None)
+    add(cache, "Original")
+    assert lookup(cache, "Ähnlich") is None
+    assert lookup(cache, "Fast gleich")["mode"] == "reuse"
+
+
+def test_lookup_only_compares_the_same_section(cache):
+    assert lookup(cache, "Original", section_id="threat_identification") is None
+
+
+def test_only_newest_entries_are_kept():
+    cache = SemanticContentCache(EMBEDDINGS, max_entries=2, persist_path=None)
+    add(cache, "Original", content="Erster")
+    add(cache, "Original", content="Zweiter")
+    add(cache, "Anders", content="Dritter")
+
+    assert cache.get_stats()["entries"] == 2
+    assert lookup(cache, "Original")["content"] == "Zweiter"
+
+
+def test_entries_are_loaded_from_the_file(tmp_path):
+    path = str(tmp_path / "content_cache.jsonl")
+    add(SemanticContentCache(EMBEDDINGS, persist_path=path), "Original")
+
+    assert lookup(SemanticContentCache(EMBEDDINGS, persist_path=path), "Fast gleich")["mode"] == "reuse"
+
+
+def test_compaction_keeps_entries_of_other_processes(tmp_path):
+    path = str(tmp_path / "content_cache.jsonl")
+    worker_a = SemanticContentCache(EMBEDDINGS, max_entries=2, persist_path=path)
+    worker_b = SemanticContentCache(EMBEDDINGS, max_entries=2, persist_path=path)
+    for content in ("A1", "A2", "A3"):
+        add(worker_a, "Anders", content=content)
+    add(worker_b, "Original", content="B1", section_id="threat_identification")
+
+    # The file holds twice the limit, worker A rewrites it
+    add(worker_a, "Anders", content="A4")
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    restarted = SemanticContentCache(EMBEDDINGS, max_entries=2, persist_path=path)
+    assert lookup(restarted, "Original", section_id="threat_identification")["content"] == "B1"
+    assert lookup(restarted, "Anders")["content"] == "A4"
+    assert not [name for name in tmp_path.iterdir() if name.name.startswith(".content_cache.")]
+
+
+def test_clear_removes_the_file(tmp_path):
+    path = tmp_path / "content_cache.jsonl"
+    cache = SemanticContentCache(EMBEDDINGS, persist_path=str(path))
+    add(cache, "Original")
+    cache.clear()
+
+    assert not path.exists()
+    assert lookup(cache, "Original") is None
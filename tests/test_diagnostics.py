@@ -0,0 +1,81 @@
+import copy
+
+from modules.diagnostics import run_diagnostics
+
+from conftest import FakeLLMManager, FakeVectorStoreManager
+
+
+class RecordingVectorStoreManager(FakeVectorStoreManager):
+    def __init__(self):
+        self.queries = []
+
+    def retrieve_with_multiple_queries(self, queries, filter=None, top_k=3):
+        self.queries.append(queries)
+        return super().retrieve_with_multiple_queries(queries, filter=filter, top_k=top_k)
+
+
+def mid_dialog(make_dialog):
+    llm = FakeLLMManager()
+    vector_store = RecordingVectorStoreManager()
+    dialog = make_dialog(llm_manager=llm, vector_store_manager=vector_store)
+    state = dialog.conversation_state
+    state["current_step"] = "template_navigation"
+    state["current_section"] = "threat_identification"
+    state["completed_sections"] = ["threat_awareness"]
+    state["section_responses"] = {"threat_awareness": "E-Mails mit Anhängen"}
+    state["generated_content"] = {"threat_awareness": "Inhalt"}
+    return dialog, llm, vector_store
+
+
+def test_dry_run_has_no_side_effects(make_dialog):
+    dialog, llm, vector_store = mid_dialog(make_dialog)
+    state_before = copy.deepcopy(dialog.conversation_state)
+
+    results = run_diagnostics(dialog)
+
+    assert not results["issues_found"], results["details"]
+    assert dialog.conversation_state == state_before
+    assert llm.calls == [] and vector_store.queries == []
+
+
+def test_dry_run_reports_inconsistent_state(make_dialog):
+    dialog, llm, _ = mid_dialog(make_dialog)
+    state = dialog.conversation_state
+    state["current_step"] = "unknown_step"
+    state["current_section_question_count"] = "1"
+    state["generated_content"]["missing_section"] = ["kein", "Text"]
+
+    results = run_diagnostics(dialog)
+
+    details = "\n".join(results["details"])
+    assert results["issues_found"]
+    assert "Unknown dialog step 'unknown_step'" in details
+    assert "current_section_question_count" in details
+    assert "unknown sections: missing_section" in details
+    assert "Generated content of section 'missing_section' is list" in details
+    assert llm.calls == []
+
+
+def test_full_run_exercises_the_dialog(make_dialog):
+    dialog, llm, _ = mid_dialog(make_dialog)
+
+    results = run_diagnostics(dialog, dry_run=False)
+
+    assert not results["issues_found"], results["details"]
+    assert "generate_question" in llm.calls
+
+
+def test_failing_turn_does_not_call_the_llm_for_diagnostics(make_dialog, monkeypatch):
+    dialog, llm, vector_store = mid_dialog(make_dialog)
+    # Inconsistent state, so the diagnostics of the error path report issues
+    dialog.conversation_state["generated_content"]["missing_section"] = "Inhalt"
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("kaputt")
+
+    monkeypatch.setattr(dialog, "is_response_adequate", fail)
+
+    answer = dialog.process_user_response("E-Mails mit Anhängen")
+
+    assert answer.startswith("Es tut mir leid, bei der Verarbeitung Ihrer Antwort ist ein Fehler aufgetreten")
+    assert llm.calls == [] and vector_store.queries == []
@@ -0,0 +1,210 @@
+import pytest
+
+from modules.content_cache import SemanticContentCache
+from modules.job_manager import JobManager
+from modules.session_manager import Session, SessionManager
+
+from conftest import FakeEmbeddings, FakeLLMManager
+
+ORGANIZATION_QUESTION = "Für welche Art von Organisation erstellen wir den E-Learning-Kurs (z.B. Krankenhaus, Bank, Behörde)?"
+AUDIENCE_QUESTION = "Welche Mitarbeitergruppen sollen geschult werden?"
+ANSWER = ("Bei uns gibt es jeden Tag viele Gefahr und Risiko durch E-Mails mit Anhängen "
+          "im Krankenhaus, besonders in der Pflege und in der Verwaltung")
+
+
+def start_sections(dialog):
+    """Puts a dialog at the first template section, as after the context questions."""
+    state = dialog.conversation_state
+    state["context_info"] = {ORGANIZATION_QUESTION: "Krankenhaus", AUDIENCE_QUESTION: "Pflege"}
+    state["current_step"] = "template_navigation"
+    state["current_section"] = "threat_awareness"
+
+
+def test_turn_runs_while_section_job_finishes(make_dialog):
+    job_manager = JobManager(max_workers=1)
+    llm = FakeLLMManager()
+    llm.release_content.clear()
+    dialog = make_dialog(llm_manager=llm, job_manager=job_manager)
+    session = Session("session", dialog)
+    start_sections(dialog)
+
+    with session.lock:
+        question = dialog.process_user_response(ANSWER)
+    assert "Nun sprechen wir über" in question
+    assert llm.content_started.wait(5)
+
+    # A turn serializes the session while the job is still generating
+    with session.lock:
+        record = session.to_record()
+    assert "threat_awareness" not in record["conversation_state"]["generated_content"]
+
+    llm.release_content.set()
+    assert job_manager.wait_for_session("session", timeout=5)
+
+    # The job only hands its result over; it is applied by the thread holding the session lock
+    assert "threat_awareness" not in dialog.conversation_state["generated_content"]
+    with session.lock:
+        record = session.to_record()
+    assert record["conversation_state"]["generated_content"]["threat_awareness"].startswith("Inhalt für")
+    assert "threat_awareness" in record["conversation_state"]["content_quality_checks"]
+    job_manager.shutdown()
+
+
+def test_job_results_are_persisted_without_touching_the_state(make_dialog):
+    job_manager = JobManager(max_workers=1)
+    sessions = SessionManager(lambda session_id: make_dialog(session_id, job_manager=job_manager))
+    session = sessions.create_session("session")
+    start_sections(session.dialog_manager)
+
+    with session.lock:
+        session.dialog_manager.process_user_response(ANSWER)
+    assert job_manager.wait_for_session("session", timeout=5)
+
+    sessions.save_section_results("session")
+    stored = sessions.store.load("session")["conversation_state"]
+    assert "threat_awareness" in stored["generated_content"]
+    assert "threat_awareness" not in session.dialog_manager.conversation_state["generated_content"]
+    job_manager.shutdown()
+
+
+def test_review_waits_for_job_of_another_worker(make_dialog, tmp_path):
+    from functools import partial
+    from modules.session_store import SQLiteSessionStore
+
+    db_path = str(tmp_path / "sessions.db")
+    llm = FakeLLMManager()
+    llm.release_content.clear()
+    job_manager = JobManager(max_workers=1)
+    worker_a = SessionManager(lambda session_id: make_dialog(session_id, llm_manager=llm, job_manager=job_manager),
+                              store=SQLiteSessionStore(db_path, flush_interval=0.05))
+
+    worker_b = None
+
+    def dialog_of_worker_b(session_id):
+        dialog = make_dialog(session_id, job_manager=JobManager(max_workers=1),
+                             section_results_loader=partial(worker_b.load_section_results, session_id))
+        dialog.section_poll_interval = 0.05
+        return dialog
+
+    worker_b = SessionManager(dialog_of_worker_b, store=SQLiteSessionStore(db_path, flush_interval=0.05))
+
+    session = worker_a.create_session("session")
+    start_sections(session.dialog_manager)
+    with session.lock:
+        session.dialog_manager.process_user_response(ANSWER)
+    worker_a.record_turn(session)
+    assert llm.content_started.wait(5)
+
+    # The next turn is served by the other worker, which has no local job for the section
+    restored = worker_b.get_session("session")
+    assert restored.dialog_manager.conversation_state["background_sections"].keys() == {"threat_awareness"}
+    assert not restored.dialog_manager.wait_for_pending_sections(timeout=0.2)
+
+    llm.release_content.set()
+    assert job_manager.wait_for_session("session", timeout=5)
+    worker_a.save_section_results("session")
+
+    assert restored.dialog_manager.wait_for_pending_sections(timeout=5)
+    assert restored.dialog_manager.conversation_state["generated_content"]["threat_awareness"].startswith("Inhalt für")
+    worker_a.store.close()
+    worker_b.store.close()
+    job_manager.shutdown()
+
+
+def test_invalid_structured_response_falls_back_to_the_full_pipeline(make_dialog):
+    from modules.metrics import FALLBACKS
+
+    llm = FakeLLMManager()
+    dialog = make_dialog(llm_manager=llm, structured_generation=True)
+    start_sections(dialog)
+    dialog.conversation_state["section_responses"]["threat_awareness"] = ANSWER
+    fallbacks = FALLBACKS.get(kind="structured_multi_call")
+
+    dialog._generate_section_content("threat_awareness")
+
+    assert llm.calls == ["generate_section_structured", "extract_key_information",
+                         "generate_content", "check_hallucinations"]
+    assert FALLBACKS.get(kind="structured_multi_call") == fallbacks + 1
+    assert dialog.conversation_state["generated_content"]["threat_awareness"].startswith("Inhalt für")
+
+
+def test_speculative_question_is_claimed_for_the_next_section(make_dialog):
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    llm = FakeLLMManager()
+    dialog = make_dialog(llm_manager=llm, speculation_executor=executor)
+    start_sections(dialog)
+
+    dialog.get_next_question()
+    future = dialog._speculation["future"]
+    assert dialog._speculation["key"] == ("threat_identification", "Krankenhaus", "Pflege")
+    assert future.result(5).startswith("Frage zu")
+
+    # Another context does not match the speculation and discards it
+    assert dialog._claim_speculative_question("threat_identification", "Bank", "Pflege") is None
+    assert dialog._speculation is None
+
+    dialog._speculate_next_question("threat_awareness")
+    question = dialog._claim_speculative_question("threat_identification", "Krankenhaus", "Pflege")
+    assert question.startswith("Frage zu")
+    executor.shutdown()
+
+
+def test_reset_discards_running_speculation(make_dialog):
+    import threading
+    from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+    from conftest import FakeVectorStoreManager
+
+    class BlockingVectorStoreManager(FakeVectorStoreManager):
+        def __init__(self):
+            self.started = threading.Event()
+            self.release = threading.Event()
+
+        def retrieve_with_multiple_queries(self, queries, filter=None, top_k=3):
+            self.started.set()
+            self.release.wait(5)
+            return super().retrieve_with_multiple_queries(queries, filter, top_k)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    llm = FakeLLMManager()
+    vector_store_manager = BlockingVectorStoreManager()
+    sessions = SessionManager(lambda session_id: make_dialog(
+        session_id, llm_manager=llm, vector_store_manager=vector_store_manager, speculation_executor=executor))
+    session = sessions.create_session("session")
+    dialog = session.dialog_manager
+    start_sections(dialog)
+
+    # The speculation is blocked in its retrieval when the session is reset
+    dialog._speculate_next_question("threat_awareness")
+    future = dialog._speculation["future"]
+    assert vector_store_manager.started.wait(5)
+    sessions.reset_session("session")
+    assert dialog._speculation is None
+
+    vector_store_manager.release.set()
+    with pytest.raises(CancelledError):
+        future.result(5)
+    assert "generate_question" not in llm.calls
+    executor.shutdown()
+
+
+@pytest.mark.parametrize("similar_answer, expected_calls", [
+    # Near-identical answer: the verified content is reused without any LLM generation
+    (ANSWER + ".", []),
+    # Similar answer: the content is a draft that only goes through the hallucination check
+    (ANSWER + "!", ["check_hallucinations"]),
+])
+def test_similar_answer_uses_cached_content(make_dialog, similar_answer, expected_calls):
+    cache = SemanticContentCache(FakeEmbeddings({ANSWER: 1.0, ANSWER + ".": 0.97, ANSWER + "!": 0.92}),
+                                 persist_path=None)
+    cache.add("threat_awareness", "Krankenhaus", "Pflege", ANSWER, "Geprüfter Inhalt")
+    llm = FakeLLMManager()
+    dialog = make_dialog(llm_manager=llm, content_cache=cache)
+    start_sections(dialog)
+
+    dialog.process_user_response(similar_answer)
+
+    assert dialog.conversation_state["generated_content"]["threat_awareness"] == "Geprüfter Inhalt"
+    assert [call for call in llm.calls if call != "generate_question"] == expected_calls
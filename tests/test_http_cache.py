@@ -0,0 +1,105 @@
+import gzip
+import os
+
+import pytest
+from flask import Flask
+
+from modules.http_cache import StaticFingerprinter, precompress_file, select_precompressed, send_download
+
+
+@pytest.fixture
+def course(tmp_path):
+    path = tmp_path / "kurs.txt"
+    path.write_text("Informationssicherheit im Krankenhaus\n" * 50, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def client(course):
+    app = Flask(__name__)
+
+    @app.route("/download")
+    def download():
+        return send_download(course, "kurs.txt")
+
+    return app.test_client()
+
+
+def test_unchanged_download_is_answered_with_304(client):
+    response = client.get("/download")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+
+    response = client.get("/download", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert not response.data
+
+
+def test_changed_download_is_sent_again(client, course):
+    etag = client.get("/download").headers["ETag"]
+    with open(course, "a", encoding="utf-8") as f:
+        f.write("Neuer Abschnitt\n")
+    os.utime(course, (os.path.getmtime(course) + 10,) * 2)
+
+    response = client.get("/download", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.data.endswith(b"Neuer Abschnitt\n")
+
+
+def test_download_is_precompressed_for_accepting_clients(client, course):
+    precompress_file(course)
+
+    response = client.get("/download", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    with open(course, "rb") as f:
+        assert gzip.decompress(response.data) == f.read()
+    compressed_etag = response.headers["ETag"]
+
+    # The variants have their own validators
+    plain = client.get("/download", headers={"If-None-Match": compressed_etag})
+    assert plain.status_code == 200 and "Content-Encoding" not in plain.headers
+
+
+def test_stale_or_refused_variants_are_not_selected(course):
+    precompress_file(course)
+    assert select_precompressed(course, "gzip;q=0") == (course, None)
+
+    os.utime(course, (os.path.getmtime(course + ".gz") + 10,) * 2)
+    assert select_precompressed(course, "gzip") == (course, None)
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "main.js").write_text("console.log('v1');", encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_fingerprint_resolves_to_the_asset(static_folder):
+    fingerprinter = StaticFingerprinter(static_folder)
+    hashed_name = fingerprinter.fingerprint("js/main.js")
+
+    assert hashed_name != "js/main.js" and hashed_name.startswith("js/main.")
+    assert fingerprinter.resolve(hashed_name) == ("js/main.js", True)
+
+
+def test_outdated_fingerprint_resolves_but_is_not_current(static_folder):
+    fingerprinter = StaticFingerprinter(static_folder)
+    hashed_name = fingerprinter.fingerprint("js/main.js")
+
+    path = os.path.join(static_folder, "js", "main.js")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("console.log('version 2');")
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+
+    assert fingerprinter.resolve(hashed_name) == ("js/main.js", False)
+    assert fingerprinter.fingerprint("js/main.js") != hashed_name
+
+
+def test_unknown_assets_do_not_resolve(static_folder):
+    fingerprinter = StaticFingerprinter(static_folder)
+    assert fingerprinter.fingerprint("js/missing.js") == "js/missing.js"
+    assert fingerprinter.resolve("js/main.js") == (None, False)
+    assert fingerprinter.resolve("js/missing.0123456789ab.js") == (None, False)
@@ -0,0 +1,69 @@
+import itertools
+
+import pytest
+
+from modules import llm_cache
+from modules.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Advances the cache's clock by one second per call, so access order is unambiguous."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_key_depends_on_model_options_and_prompt():
+    key = LLMResponseCache.make_key("llama3", {"temperature": 0.2}, "Prompt")
+    assert key == LLMResponseCache.make_key("llama3", {"temperature": 0.2}, "Prompt")
+    assert key != LLMResponseCache.make_key("llama3", {"temperature": 0.7}, "Prompt")
+    assert key != LLMResponseCache.make_key("mistral", {"temperature": 0.2}, "Prompt")
+    assert key != LLMResponseCache.make_key("llama3", {"temperature": 0.2}, "Prompt!")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LLMResponseCache(db_path=None, memory_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get_memory("a") == "A"
+    cache.put("c", "C")
+
+    assert cache.get_memory("b") is None
+    assert cache.get_memory("a") == "A"
+    assert cache.get_memory("c") == "C"
+
+
+def test_disk_tier_evicts_least_recently_used_by_size(tmp_path, clock):
+    cache = LLMResponseCache(db_path=str(tmp_path / "cache.db"), memory_entries=0, max_bytes=100)
+    cache.put("a", "x" * 40)
+    cache.put("b", "y" * 40)
+    # Reading "a" makes "b" the least recently used response
+    assert cache.get("a") == "x" * 40
+    cache.put("c", "z" * 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 40
+    assert cache.get("c") == "z" * 40
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["stored_bytes"] == 80
+    cache.close()
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    path = str(tmp_path / "cache.db")
+    LLMResponseCache(db_path=path).put("a", "A")
+
+    # A new process only has the disk tier
+    cache = LLMResponseCache(db_path=path)
+    assert cache.get_memory("a") is None
+    assert cache.get("a") == "A"
+    assert cache.get_memory("a") == "A"
+    assert cache.get_stats()["disk_hits"] == 1
+    cache.close()
+
+
+def test_empty_responses_are_not_cached():
+    cache = LLMResponseCache(db_path=None)
+    cache.put("a", "")
+    assert cache.get("a") is None
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules.llm_manager import LLMManager, LLMOverloadedError
+
+
+@pytest.fixture
+def llm_manager():
+    return LLMManager(model_name="test", max_concurrency=1, max_queue=2, queue_timeout=2, backend="dummy")
+
+
+def test_async_waiter_is_woken_by_release(llm_manager):
+    llm_manager._acquire_slot()
+
+    async def wait_for_slot():
+        task = asyncio.create_task(llm_manager._aacquire_slot())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        assert llm_manager.get_gateway_stats()["waiting_calls"] == 1
+
+        # Released by a synchronous call on another thread
+        threading.Timer(0.1, llm_manager._release_slot).start()
+        start_time = time.monotonic()
+        await asyncio.wait_for(task, 1)
+        return time.monotonic() - start_time
+
+    assert asyncio.run(wait_for_slot()) < 0.5
+    stats = llm_manager.get_gateway_stats()
+    assert stats["active_calls"] == 1 and stats["waiting_calls"] == 0
+    llm_manager._release_slot()
+
+
+def test_async_waiter_times_out(llm_manager):
+    llm_manager.queue_timeout = 0.1
+    llm_manager._acquire_slot()
+
+    with pytest.raises(LLMOverloadedError):
+        asyncio.run(llm_manager._aacquire_slot())
+    stats = llm_manager.get_gateway_stats()
+    assert stats["waiting_calls"] == 0 and stats["rejected_calls"] == 1
+    assert not llm_manager._async_waiters
+
+
+def test_cancelled_async_waiter_leaves_the_queue(llm_manager):
+    llm_manager._acquire_slot()
+
+    async def cancel_waiter():
+        task = asyncio.create_task(llm_manager._aacquire_slot())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_waiter())
+    stats = llm_manager.get_gateway_stats()
+    assert stats["waiting_calls"] == 0 and stats["active_calls"] == 1
+    assert not llm_manager._async_waiters
+
+    # The slot is still usable after the cancelled wait
+    llm_manager._release_slot()
+    llm_manager._acquire_slot()
+    llm_manager._release_slot()
+
+
+def hold_slots_in_threads(llm_manager, count):
+    """Starts threads that each wait for a slot, returns them with the errors they raised."""
+    errors = []
+
+    def call():
+        try:
+            llm_manager._acquire_slot()
+            llm_manager._release_slot()
+        except LLMOverloadedError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, errors
+
+
+def wait_for_queue(llm_manager, waiting_calls):
+    deadline = time.monotonic() + 1
+    while llm_manager.get_gateway_stats()["waiting_calls"] != waiting_calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_full_queue_rejects_new_calls(llm_manager):
+    llm_manager._acquire_slot()
+    threads, errors = hold_slots_in_threads(llm_manager, 2)
+    wait_for_queue(llm_manager, 2)
+    assert llm_manager.is_saturated()
+
+    with pytest.raises(LLMOverloadedError):
+        llm_manager._acquire_slot()
+    assert llm_manager.get_gateway_stats()["rejected_calls"] == 1
+
+    # Queued calls get the slot one after another
+    llm_manager._release_slot()
+    for thread in threads:
+        thread.join(1)
+    assert not errors
+    stats = llm_manager.get_gateway_stats()
+    assert stats["active_calls"] == 0 and stats["waiting_calls"] == 0
+    assert not llm_manager.is_saturated()
+
+
+def test_queued_call_times_out(llm_manager):
+    llm_manager.queue_timeout = 0.1
+    llm_manager._acquire_slot()
+
+    with pytest.raises(LLMOverloadedError):
+        llm_manager._acquire_slot()
+    stats = llm_manager.get_gateway_stats()
+    assert stats["waiting_calls"] == 0 and stats["rejected_calls"] == 1 and stats["active_calls"] == 1
+
+
+def test_background_calls_ignore_the_queue_limit(llm_manager):
+    llm_manager._acquire_slot()
+    threads, errors = hold_slots_in_threads(llm_manager, 2)
+    wait_for_queue(llm_manager, 2)
+
+    acquired = threading.Event()
+
+    def background_call():
+        llm_manager._acquire_slot(background=True)
+        acquired.set()
+        llm_manager._release_slot()
+
+    thread = threading.Thread(target=background_call)
+    thread.start()
+    wait_for_queue(llm_manager, 3)
+    assert llm_manager.get_gateway_stats()["rejected_calls"] == 0
+
+    llm_manager._release_slot()
+    assert acquired.wait(1)
+    for waiting in threads + [thread]:
+        waiting.join(1)
+    assert not errors
+
+
+def test_llm_call_releases_its_slot():
+    llm_manager = LLMManager(model_name="test", max_concurrency=1, max_queue=0, queue_timeout=1,
+                             backend="dummy", dummy_latency=0.01)
+    assert llm_manager._call_llm("Inhalt")
+    assert llm_manager._call_llm("Inhalt")
+    assert llm_manager.get_gateway_stats()["active_calls"] == 0
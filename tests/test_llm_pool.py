@@ -0,0 +1,81 @@
+import pytest
+
+from modules.llm_pool import OllamaPool
+
+
+@pytest.fixture
+def pool():
+    return OllamaPool("test", ["http://a:11434", "http://b:11434", "http://c:11434"],
+                      failure_threshold=2, suspend_time=30)
+
+
+def endpoint(pool, name):
+    return next(item for item in pool.endpoints if item.name == name)
+
+
+def test_select_prefers_fewest_in_flight(pool):
+    endpoint(pool, "http://a:11434").in_flight = 2
+    endpoint(pool, "http://b:11434").in_flight = 1
+    endpoint(pool, "http://c:11434").in_flight = 3
+    assert pool._select([]).name == "http://b:11434"
+
+
+def test_select_skips_excluded_and_unavailable_endpoints(pool):
+    endpoint(pool, "http://a:11434").healthy = False
+    assert pool._select([endpoint(pool, "http://b:11434")]).name == "http://c:11434"
+
+
+def test_select_falls_back_when_nothing_is_available(pool):
+    for item in pool.endpoints:
+        item.healthy = False
+    # Trying an endpoint beats failing right away
+    assert pool._select(pool.endpoints[:2]).name == "http://c:11434"
+    assert pool._select(pool.endpoints) in pool.endpoints
+
+
+def test_consecutive_failures_suspend_an_endpoint(pool):
+    failing = endpoint(pool, "http://a:11434")
+    failing.in_flight = 2
+    pool._record(failing, 0.1, ConnectionError("refused"))
+    assert failing.is_available(0) and failing.suspended_until == 0
+
+    pool._record(failing, 0.1, ConnectionError("refused"))
+    stats = next(item for item in pool.get_stats() if item["endpoint"] == "http://a:11434")
+    assert not stats["available"] and stats["suspended_for"] > 0
+    assert stats["errors"] == 2 and stats["in_flight"] == 0
+    assert all(pool._select([]) is not failing for _ in range(20))
+
+
+def test_success_resets_the_failure_count(pool):
+    item = endpoint(pool, "http://a:11434")
+    item.in_flight = 3
+    pool._record(item, 0.1, ConnectionError("refused"))
+    pool._record(item, 0.1, None)
+    pool._record(item, 0.1, ConnectionError("refused"))
+    assert item.consecutive_failures == 1 and item.suspended_until == 0
+
+
+def test_single_endpoint_is_never_suspended():
+    pool = OllamaPool("test", [None], failure_threshold=1)
+    item = pool.endpoints[0]
+    item.in_flight = 1
+    pool._record(item, 0.1, ConnectionError("refused"))
+    assert item.suspended_until == 0
+
+
+def test_lease_records_errors_and_reraises(pool):
+    with pytest.raises(ConnectionError):
+        with pool.lease() as leased:
+            assert leased.in_flight == 1
+            raise ConnectionError("refused")
+    assert leased.in_flight == 0 and leased.errors == 1 and leased.calls == 1
+
+
+def test_health_check_takes_endpoints_out_and_back(pool):
+    item = endpoint(pool, "http://a:11434")
+    item.suspended_until = float("inf")
+    pool.set_health({"http://a:11434": False})
+    assert not item.healthy
+
+    pool.set_health({"http://a:11434": True})
+    assert item.healthy and item.is_available(0)
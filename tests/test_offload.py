@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+eventlet = pytest.importorskip("eventlet")
+import greenlet
+from eventlet import event
+
+from modules import offload
+from modules.offload import HubSafeRLock
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    """Makes the test thread the eventlet hub thread, as configure_offloading() does in the server."""
+    monkeypatch.setattr(offload, "_tpool", object())
+    monkeypatch.setattr(offload, "_hub_thread_id", threading.get_ident())
+    monkeypatch.setattr(offload, "_green_event", event.Event)
+    monkeypatch.setattr(offload, "_current_greenlet", greenlet.getcurrent)
+
+
+def hold(lock, name, order, duration=0.02):
+    with lock:
+        order.append(f"{name} in")
+        eventlet.sleep(duration)
+        order.append(f"{name} out")
+
+
+def test_greenthreads_exclude_each_other(hub):
+    lock = HubSafeRLock()
+    order = []
+    greenthreads = [eventlet.spawn(hold, lock, name, order) for name in "abc"]
+
+    # The others are parked on events instead of polling the lock
+    eventlet.sleep(0)
+    assert len(lock._green_waiters) == 2
+
+    for greenthread in greenthreads:
+        greenthread.wait()
+    assert order == ["a in", "a out", "b in", "b out", "c in", "c out"]
+    assert not lock._green_waiters
+
+
+def test_lock_is_reentrant_per_greenthread(hub):
+    lock = HubSafeRLock()
+
+    def nested():
+        with lock:
+            with lock:
+                return lock._count
+
+    assert eventlet.spawn(nested).wait() == 2
+    assert lock._owner is None
+
+
+def test_killed_waiter_does_not_block_the_others(hub):
+    lock = HubSafeRLock()
+    order = []
+    owner = eventlet.spawn(hold, lock, "a", order, 0.05)
+    killed = eventlet.spawn(hold, lock, "b", order)
+    waiting = eventlet.spawn(hold, lock, "c", order)
+    eventlet.sleep(0)
+
+    killed.kill()
+    with eventlet.Timeout(1):
+        owner.wait()
+        waiting.wait()
+    assert order == ["a in", "a out", "c in", "c out"]
+
+
+def test_wakeup_of_a_killed_waiter_is_passed_on(hub):
+    lock = HubSafeRLock()
+    order = []
+    killed = eventlet.spawn(hold, lock, "b", order)
+    waiting = eventlet.spawn(hold, lock, "c", order)
+
+    with lock:
+        eventlet.sleep(0)
+        assert len(lock._green_waiters) == 2
+    # "b" was woken by the release but is killed before it can take the lock
+    killed.kill()
+    with eventlet.Timeout(1):
+        waiting.wait()
+    assert order == ["c in", "c out"]
@@ -0,0 +1,168 @@
+import time
+
+import pytest
+
+from modules.session_manager import SessionManager
+from modules.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def make_record(session_id="session", **state):
+    conversation_state = {"current_step": "template_navigation", "generated_content": {},
+                          "content_quality_checks": {}}
+    conversation_state.update(state)
+    return {
+        "session_id": session_id,
+        "revision": 0,
+        "created_at": 1.0,
+        "last_access": 2.0,
+        "script_generated": False,
+        "messages": [{"role": "user", "content": "Hallo"}],
+        "conversation_state": conversation_state
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemorySessionStore()
+        return
+    # A long flush interval keeps the write-behind buffer under the test's control
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=0, flush_interval=3600)
+    yield store
+    store.close()
+
+
+def test_save_increments_the_revision(store):
+    assert store.save(make_record()) == 1
+    assert store.save(make_record()) == 2
+    assert store.get_meta("session")[0] == 2
+
+
+def test_save_keeps_stored_section_results(store):
+    store.save(make_record(generated_content={"threat_awareness": "A"}))
+    # A turn whose local copy does not know the section yet
+    store.save(make_record(generated_content={"threat_identification": "B"}))
+
+    state = store.load("session")["conversation_state"]
+    assert state["generated_content"] == {"threat_awareness": "A", "threat_identification": "B"}
+
+
+def test_save_prefers_the_new_result_of_a_section(store):
+    store.save(make_record(generated_content={"threat_awareness": "alt"}))
+    store.save(make_record(generated_content={"threat_awareness": "neu"}))
+    assert store.load("session")["conversation_state"]["generated_content"] == {"threat_awareness": "neu"}
+
+
+def test_save_without_merge_replaces_section_results(store):
+    store.save(make_record(generated_content={"threat_awareness": "A"}))
+    store.save(make_record(), merge=False)
+    assert store.load("session")["conversation_state"]["generated_content"] == {}
+
+
+def test_section_results_are_merged_into_the_record(store):
+    store.save(make_record(generated_content={"threat_awareness": "A"}))
+    store.save_section_results("session", {"generated_content": {"threat_identification": "B"},
+                                           "content_quality_checks": {"threat_identification": {"has_issues": False}}})
+    store.flush()
+
+    record = store.load("session")
+    state = record["conversation_state"]
+    assert state["generated_content"] == {"threat_awareness": "A", "threat_identification": "B"}
+    assert state["content_quality_checks"] == {"threat_identification": {"has_issues": False}}
+    assert state["current_step"] == "template_navigation"
+    assert record["messages"] == [{"role": "user", "content": "Hallo"}]
+
+
+def test_sqlite_buffers_section_results_until_flush(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, ttl=0, flush_interval=3600)
+    other_worker = SQLiteSessionStore(path, ttl=0, flush_interval=3600)
+    store.save(make_record())
+
+    store.save_section_results("session", {"generated_content": {"threat_awareness": "A"}})
+    # Visible in this process at once, in other processes after the flush
+    assert store.load("session")["conversation_state"]["generated_content"] == {"threat_awareness": "A"}
+    assert other_worker.load("session")["conversation_state"]["generated_content"] == {}
+
+    store.flush()
+    assert other_worker.load("session")["conversation_state"]["generated_content"] == {"threat_awareness": "A"}
+    assert store.get_stats()["pending_writes"] == 0
+    store.close()
+    other_worker.close()
+
+
+def test_sqlite_flush_merges_results_of_several_jobs(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=0, flush_interval=3600)
+    store.save(make_record())
+    store.save_section_results("session", {"generated_content": {"threat_awareness": "A"}})
+    store.save_section_results("session", {"generated_content": {"threat_identification": "B"}})
+    store.flush()
+
+    assert store.load("session")["conversation_state"]["generated_content"] == {
+        "threat_awareness": "A", "threat_identification": "B"}
+    assert store.flush_count == 1
+    store.close()
+
+
+def test_sqlite_flush_skips_deleted_sessions(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=0, flush_interval=3600)
+    store.save(make_record())
+    store.save_section_results("session", {"generated_content": {"threat_awareness": "A"}})
+    store.touch("session", 10.0)
+    store.delete("session")
+    store.flush()
+    assert store.load("session") is None
+    store.close()
+
+
+def test_memory_store_removes_expired_sessions_on_write():
+    store = MemorySessionStore(ttl=60, cleanup_interval=0)
+    expired = make_record("expired")
+    expired["last_access"] = 1.0
+    store.save(expired)
+    store.save(dict(make_record("active"), last_access=time.time()))
+
+    assert store.load("expired") is None
+    assert store.load("active") is not None
+
+
+def test_own_flush_does_not_make_the_local_copy_stale(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=0, flush_interval=3600)
+    revision = store.save(make_record())
+    store.save_section_results("session", {"generated_content": {"threat_awareness": "A"}})
+    store.flush()
+    store.save_section_results("session", {"generated_content": {"threat_identification": "B"}})
+    store.flush()
+
+    stored_revision = store.get_meta("session")[0]
+    assert stored_revision == revision + 2
+    assert store.is_own_revision("session", revision, stored_revision)
+
+    # Another process writes a turn; this process must reload
+    other_worker = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=0, flush_interval=3600)
+    other_worker.save(make_record())
+    assert not store.is_own_revision("session", revision, store.get_meta("session")[0])
+    store.close()
+    other_worker.close()
+
+
+def test_memory_store_section_results_keep_the_revision():
+    store = MemorySessionStore()
+    revision = store.save(make_record())
+    store.save_section_results("session", {"generated_content": {"threat_awareness": "A"}})
+    assert store.get_meta("session")[0] == revision
+
+
+def test_session_is_not_reloaded_after_its_own_flush(make_dialog, tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=0, flush_interval=3600)
+    sessions = SessionManager(make_dialog, store=store)
+    session = sessions.create_session()
+    session.dialog_manager.conversation_state["current_step"] = "section_content"
+    store.save_section_results(session.session_id, {"generated_content": {"threat_awareness": "A"}})
+    store.flush()
+
+    # A reload would replace the unsaved change with the stored state
+    assert sessions.get_session(session.session_id) is session
+    assert session.dialog_manager.conversation_state["current_step"] == "section_content"
+    assert session.revision == store.get_meta(session.session_id)[0]
+    store.close()
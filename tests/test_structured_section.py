@@ -0,0 +1,45 @@
+import json
+
+from modules.llm_manager import LLMManager, MIN_STRUCTURED_CONTENT_CHARS
+
+CONTENT = "Im Krankenhaus prüfen Sie jeden Morgen Ihre E-Mails. " * 10
+
+
+def response(**overrides):
+    data = {"key_facts": ["E-Mails", " Fax "], "content": CONTENT,
+            "self_check": {"verdict": "ok", "issues": []}}
+    data.update(overrides)
+    return json.dumps(data, ensure_ascii=False)
+
+
+def test_valid_response_is_parsed():
+    result = LLMManager._parse_structured_section(response())
+    assert result == {"key_facts": ["E-Mails", "Fax"], "content": CONTENT.strip(), "verdict": "ok", "issues": []}
+
+
+def test_object_inside_a_code_block_is_parsed():
+    result = LLMManager._parse_structured_section("```json\n" + response() + "\n```")
+    assert result["verdict"] == "ok"
+
+
+def test_revised_verdict_keeps_issues():
+    result = LLMManager._parse_structured_section(
+        response(self_check={"verdict": " Revised ", "issues": "Zahl korrigiert"}))
+    assert result["verdict"] == "revised"
+    assert result["issues"] == ["Zahl korrigiert"]
+
+
+def test_invalid_responses_are_rejected():
+    invalid = [
+        None,
+        "kein json",
+        "{kaputt}",
+        json.dumps(["content"]),
+        response(content="zu kurz"),
+        response(content=" " * (MIN_STRUCTURED_CONTENT_CHARS + 10)),
+        response(key_facts="E-Mails"),
+        response(self_check="ok"),
+        response(self_check={"verdict": "vielleicht"}),
+    ]
+    for item in invalid:
+        assert LLMManager._parse_structured_section(item) is None, item